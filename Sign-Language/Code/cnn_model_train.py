@@ -1,13 +1,14 @@
 import numpy as np
 import pickle
-import cv2, os
+import cv2, os, sys
 from keras import optimizers
 from keras.models import Sequential
 from keras.layers import Dense, Dropout, Flatten, Conv2D, MaxPooling2D
-from keras.utils import np_utils
-from keras.callbacks import ModelCheckpoint
+from keras.utils import to_categorical
 from keras import backend as K
-K.set_image_dim_ordering('tf')
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'train'))
+import harness
 
 def get_image_size():
     img = cv2.imread('gestures/1/100.jpg', 0)
@@ -31,12 +32,9 @@ def cnn_model():
     model.add(Dense(128, activation='relu'))
     model.add(Dropout(0.2))
     model.add(Dense(num_of_classes, activation='softmax'))
-    sgd = optimizers.SGD(lr=1e-2)
+    sgd = optimizers.SGD(learning_rate=1e-2)
     model.compile(loss='categorical_crossentropy', optimizer=sgd, metrics=['accuracy'])
-    filepath="cnn_model_keras2.h5"
-    checkpoint1 = ModelCheckpoint(filepath, monitor='val_acc', verbose=1, save_best_only=True, mode='max')
-    callbacks_list = [checkpoint1]
-    return model, callbacks_list
+    return model
 
 def train():
     with open("train_images", "rb") as f:
@@ -49,14 +47,18 @@ def train():
         val_labels = np.array(pickle.load(f), dtype=np.int32)
     train_images = np.reshape(train_images, (train_images.shape[0], image_x, image_y, 1))
     val_images = np.reshape(val_images, (val_images.shape[0], image_x, image_y, 1))
-    train_labels = np_utils.to_categorical(train_labels)
-    val_labels = np_utils.to_categorical(val_labels)
-    model, callbacks_list = cnn_model()
+    train_labels = to_categorical(train_labels)
+    val_labels = to_categorical(val_labels)
+    model = cnn_model()
     model.summary()
-    model.fit(train_images, train_labels, validation_data=(val_images, val_labels), epochs=15, batch_size=500, callbacks=callbacks_list)
+    # Checkpoints (with optimizer state) go to checkpoints/gesture_cnn so an
+    # interrupted run resumes; the best epoch by val_loss is kept there too and
+    # only replaces the served model once training is done
+    harness.fit(model, (train_images, train_labels), validation_data=(val_images, val_labels),
+                run_name='gesture_cnn', epochs=15, batch_size=500, best_path=harness.best_model_path('gesture_cnn'))
+    harness.publish(model, "cnn_model_keras2.h5")
     scores = model.evaluate(val_images, val_labels, verbose=0)
     print("CNN Error: %.2f%%" % (100-scores[1]*100))
-    #model.save('cnn_model_keras2.h5')
 
 train()
-K.clear_session() 
\ No newline at end of file
+K.clear_session()
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
-import pickle, os, sqlite3, random
+import pickle, os, random
+from gesture_db import init_db, get_gesture_name, upsert_gestures
 
 image_x, image_y = 50, 50
 
@@ -13,30 +14,19 @@ def init_create_folder_database():
     # create the folder and database if not exist
     if not os.path.exists("gestures"):
         os.mkdir("gestures")
-    if not os.path.exists("gesture_db.db"):
-        conn = sqlite3.connect("gesture_db.db")
-        create_table_cmd = "CREATE TABLE gesture ( g_id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE, g_name TEXT NOT NULL )"
-        conn.execute(create_table_cmd)
-        conn.commit()
+    init_db()
 
 def create_folder(folder_name):
     if not os.path.exists(folder_name):
         os.mkdir(folder_name)
 
 def store_in_db(g_id, g_name):
-    conn = sqlite3.connect("gesture_db.db")
-    cmd = "INSERT INTO gesture (g_id, g_name) VALUES (%s, '%s')" % (g_id, g_name)
-    try:
-        conn.execute(cmd)
-    except sqlite3.IntegrityError:
+    if get_gesture_name(g_id) is not None:
         choice = input("g_id already exists. Want to change the record? (y/n): ")
-        if choice.lower() == 'y':
-            cmd = "UPDATE gesture SET g_name = '%s' WHERE g_id = %s" % (g_name, g_id)
-            conn.execute(cmd)
-        else:
+        if choice.lower() != 'y':
             print("Doing nothing...")
             return
-    conn.commit()
+    upsert_gestures([(g_id, g_name)])
     
 def store_images(g_id):
     total_pics = 1200
@@ -48,6 +38,9 @@ def store_images(g_id):
     x, y, w, h = 300, 100, 300, 300
 
     create_folder("gestures/"+str(g_id))
+    # Colour crops of the hand box too, for the landmark model (train_landmarks.py)
+    create_folder("gestures_rgb")
+    create_folder("gestures_rgb/"+str(g_id))
     pic_no = 0
     flag_start_capturing = False
     frames = 0
@@ -97,6 +90,7 @@ def store_images(g_id):
                     save_img = cv2.flip(save_img, 1)
                 cv2.putText(img, "Capturing...", (30, 60), cv2.FONT_HERSHEY_TRIPLEX, 2, (127, 255, 255))
                 cv2.imwrite("gestures/"+str(g_id)+"/"+str(pic_no)+".jpg", save_img)
+                cv2.imwrite("gestures_rgb/"+str(g_id)+"/"+str(pic_no)+".jpg", img[y:y+h, x:x+w])
 
         cv2.rectangle(img, (x,y), (x+w, y+h), (0,255,0), 2)
         cv2.putText(img, str(pic_no), (30, 400), cv2.FONT_HERSHEY_TRIPLEX, 1.5, (127, 127, 255))
@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import defaultdict
+from pathlib import Path
+import cv2
+import numpy as np
+
+# Near-duplicate removal for the captured gesture folders. create_gestures.py
+# saves frames at camera rate, so consecutive samples are nearly identical.
+# Every image gets a 64-bit perceptual hash (low-frequency DCT signs); images
+# within --radius bits of an earlier kept image in the same gesture are
+# duplicates. create_gestures.py mirrors half the frames it saves, so the
+# mirrored hash is checked as well. Rotate_images.py copies (flip_<name>)
+# follow their original. Hashes are cached per file in dedup_index/, so
+# later runs only hash new captures.
+
+GESTURES_DIR = 'gestures'
+INDEX_DIR = 'dedup_index'
+DUPS_DIR = 'gestures_dups'
+FLIP_PREFIX = 'flip_'
+HASH_KIND = 'dct64'
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(x):
+        return np.bitwise_count(x)
+else:
+    _BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(x):
+        x = np.ascontiguousarray(x, dtype=np.uint64)
+        return _BYTE_BITS[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+def perceptual_hash(img):
+    """64-bit hash: signs of the 8x8 lowest DCT frequencies against their median."""
+    small = cv2.resize(img, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    block = cv2.dct(small)[:8, :8].ravel()
+    bits = block > np.median(block[1:])  # DC term left out of the median
+    return int(np.packbits(bits).view('>u8')[0])
+
+def image_hashes(path):
+    """(hash, hash of the mirrored image), or None if the file can't be read."""
+    img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    return perceptual_hash(img), perceptual_hash(cv2.flip(img, 1))
+
+class HammingIndex:
+    """Multi-index over 64-bit hashes for lookups within a Hamming radius.
+
+    Each hash is split into radius + 1 chunks. Two hashes within `radius`
+    bits must agree exactly on at least one chunk (pigeonhole), so a query
+    only compares against hashes sharing one of its chunks.
+    """
+
+    def __init__(self, radius):
+        self.radius = radius
+        chunks = radius + 1
+        bounds = [int(b) for b in np.linspace(0, 64, chunks + 1)]
+        self._masks = [((1 << (hi - lo)) - 1) << lo for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._tables = [defaultdict(list) for _ in self._masks]
+        self._hashes = []
+        self.keys = []
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, h, key):
+        i = len(self._hashes)
+        self._hashes.append(h)
+        self.keys.append(key)
+        for mask, table in zip(self._masks, self._tables):
+            table[h & mask].append(i)
+
+    def nearest(self, h):
+        """(key, distance) of the closest hash within the radius, or None."""
+        candidates = set()
+        for mask, table in zip(self._masks, self._tables):
+            candidates.update(table.get(h & mask, ()))
+        if not candidates:
+            return None
+        ids = np.fromiter(candidates, dtype=np.int64)
+        stored = np.array([self._hashes[i] for i in ids], dtype=np.uint64)
+        distances = popcount(stored ^ np.uint64(h))
+        best = int(distances.argmin())
+        if distances[best] > self.radius:
+            return None
+        return self.keys[ids[best]], int(distances[best])
+
+def capture_order(name):
+    stem = Path(name).stem
+    return (0, int(stem), name) if stem.isdigit() else (1, 0, name)
+
+def load_index(path):
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index.get('files', {}) if index.get('hash') == HASH_KIND else {}
+
+def save_index(path, files, radius):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps({'hash': HASH_KIND, 'radius': radius, 'files': files}))
+    os.replace(tmp, path)
+
+def dedup_gesture(folder, index_path, radius, keep_per_cluster):
+    """Classify the images of one gesture folder; returns (kept, duplicates, stats).
+
+    duplicates maps file name -> the kept image it repeats. Files that can't
+    be read (and their flip_ copies) are in neither and counted as
+    'unreadable'; they are left where they are. Originals are
+    walked in capture order, so the earliest frame of a run is kept and the
+    result is the same on every run.
+    """
+    cached = load_index(index_path)
+    names = sorted((p.name for p in folder.iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png')), key=capture_order)
+    present = set(names)
+    # flip_<name> follows <name> when the original is here; orphans stand alone
+    originals = [n for n in names if not (n.startswith(FLIP_PREFIX) and n[len(FLIP_PREFIX):] in present)]
+
+    files, unreadable, hashed = {}, [], 0
+    for name in originals:
+        stat = (folder / name).stat()
+        entry = cached.get(name)
+        if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            hashes = image_hashes(folder / name)
+            if hashes is None:
+                print(f"Skipping unreadable {folder / name}")
+                unreadable.append(name)
+                continue
+            entry = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': f'{hashes[0]:016x}', 'mirror': f'{hashes[1]:016x}'}
+            hashed += 1
+        files[name] = entry
+
+    index = HammingIndex(radius)
+    cluster_size = defaultdict(int)
+    kept, duplicates = [], {}
+    for name, entry in files.items():
+        h, mirror = int(entry['hash'], 16), int(entry['mirror'], 16)
+        matches = [m for m in (index.nearest(h), index.nearest(mirror)) if m is not None]
+        if matches:
+            rep = min(matches, key=lambda m: m[1])[0]
+            cluster_size[rep] += 1
+            if cluster_size[rep] >= keep_per_cluster:
+                duplicates[name] = rep
+                continue
+        if not matches:
+            index.add(h, name)  # Only cluster representatives are indexed
+        kept.append(name)
+
+    for name in list(duplicates) + kept + unreadable:
+        flip = FLIP_PREFIX + name
+        if flip in present:
+            if name in duplicates:
+                duplicates[flip] = FLIP_PREFIX + duplicates[name]
+            elif name in files:
+                kept.append(flip)
+            else:
+                unreadable.append(flip)
+    save_index(index_path, files, radius)
+    total_bytes = sum((folder / n).stat().st_size for n in names)
+    dup_bytes = sum((folder / n).stat().st_size for n in duplicates)
+    return kept, duplicates, {
+        'images': len(names),
+        'kept': len(kept),
+        'duplicates': len(duplicates),
+        'unreadable': len(unreadable),
+        'hashed': hashed,
+        'bytes': total_bytes,
+        'duplicate_bytes': dup_bytes
+    }
+
+def move_duplicates(folder, duplicates, dups_root):
+    target = dups_root / folder.name
+    target.mkdir(parents=True, exist_ok=True)
+    for name in duplicates:
+        shutil.move(str(folder / name), str(target / name))
+
+def restore_duplicates(gestures_dir, dups_root):
+    restored = 0
+    for folder in sorted(p for p in Path(dups_root).iterdir() if p.is_dir()):
+        target = Path(gestures_dir) / folder.name
+        target.mkdir(parents=True, exist_ok=True)
+        for path in folder.iterdir():
+            shutil.move(str(path), str(target / path.name))
+            restored += 1
+        folder.rmdir()
+    return restored
+
+def read_images(gestures_dir, selection):
+    images, labels = [], []
+    for g_id, names in selection.items():
+        for name in names:
+            img = cv2.imread(str(Path(gestures_dir) / g_id / name), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                images.append(img)
+                labels.append(int(g_id))
+    images = np.array(images, dtype=np.uint8)
+    return images.reshape(images.shape + (1,)), np.array(labels, dtype=np.int32)
+
+def epoch_seconds(images, labels, num_of_classes, batch_size):
+    """Wall time of one training epoch of the gesture CNN on these samples."""
+    from keras.utils import to_categorical
+    from prune_cnn import build_cnn, compile_model
+    model = compile_model(build_cnn(images.shape[1], images.shape[2], num_of_classes))
+    y = to_categorical(labels, num_of_classes)
+    model.fit(images[:batch_size], y[:batch_size], epochs=1, batch_size=batch_size, verbose=0)  # build/compile
+    started = time.perf_counter()
+    model.fit(images, y, epochs=1, batch_size=batch_size, verbose=0)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and remove near-duplicate images in gestures/<id>/")
+    parser.add_argument('--gestures-dir', default=GESTURES_DIR)
+    parser.add_argument('--radius', type=int, default=4, help="Max Hamming distance (of 64 bits) to count as a duplicate")
+    parser.add_argument('--keep-per-cluster', type=int, default=1,
+                        help="Images kept from each group of near-duplicates (>1 thins runs instead of collapsing them)")
+    parser.add_argument('--action', choices=['report', 'move'], default='report',
+                        help=f"'move' puts duplicates under {DUPS_DIR}/<id>/ (undo with --restore)")
+    parser.add_argument('--restore', action='store_true', help=f"Move everything in {DUPS_DIR}/ back and exit")
+    parser.add_argument('--time-epoch', action='store_true', help="Also time one CNN epoch before and after (needs Keras)")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    parser.add_argument('--dups-dir', default=DUPS_DIR)
+    parser.add_argument('--report', default='dedup_report.json')
+    args = parser.parse_args()
+
+    if args.restore:
+        if Path(args.dups_dir).exists():
+            print(f"Restored {restore_duplicates(args.gestures_dir, args.dups_dir)} images")
+        return
+
+    started = time.perf_counter()
+    gestures_dir = Path(args.gestures_dir)
+    folders = sorted((p for p in gestures_dir.iterdir() if p.is_dir()), key=lambda p: capture_order(p.name))
+    per_gesture, all_names, kept_names, moves = {}, {}, {}, []
+    for folder in folders:
+        kept, duplicates, stats = dedup_gesture(folder, Path(args.index_dir) / f'{folder.name}.json',
+                                                args.radius, args.keep_per_cluster)
+        per_gesture[folder.name] = stats
+        all_names[folder.name] = kept + list(duplicates)
+        kept_names[folder.name] = kept
+        print(f"gesture {folder.name:>4}: {stats['images']:>5} images, {stats['duplicates']:>5} duplicates "
+              f"({stats['hashed']} newly hashed, {stats['unreadable']} unreadable)")
+        if duplicates:
+            moves.append((folder, duplicates))
+
+    images = sum(s['images'] for s in per_gesture.values())
+    kept = sum(s['kept'] for s in per_gesture.values())
+    unreadable = sum(s['unreadable'] for s in per_gesture.values())
+    readable = images - unreadable  # What training actually loads, before and after
+    total_bytes = sum(s['bytes'] for s in per_gesture.values())
+    dup_bytes = sum(s['duplicate_bytes'] for s in per_gesture.values())
+    report = {
+        'radius': args.radius,
+        'keep_per_cluster': args.keep_per_cluster,
+        'action': args.action,
+        'images': images,
+        'kept': kept,
+        'unreadable': unreadable,
+        'reduction': round(1 - kept / readable, 4) if readable else 0.0,
+        'bytes': total_bytes,
+        'bytes_removed': dup_bytes,
+        # Epoch time is linear in the sample count for this CNN
+        'estimated_epoch_time_ratio': round(kept / readable, 4) if readable else None,
+        'elapsed_s': round(time.perf_counter() - started, 2),
+        'gestures': per_gesture
+    }
+    print(f"\n{readable} images -> {kept} kept ({report['reduction']:.1%} fewer, "
+          f"{dup_bytes / 1e6:.1f} of {total_bytes / 1e6:.1f} MB)")
+    if unreadable:
+        print(f"{unreadable} unreadable images were neither kept nor moved")
+
+    if args.time_epoch and images:
+        num_of_classes = max(int(g) for g in all_names) + 1
+        timings = {}
+        for label, selection in (('before', all_names), ('after', kept_names)):
+            x, y = read_images(gestures_dir, selection)
+            timings[label] = round(epoch_seconds(x, y, num_of_classes, args.batch_size), 3)
+        report['epoch_seconds'] = timings
+        print(f"One epoch: {timings['before']} s before, {timings['after']} s after")
+
+    if args.action == 'move':
+        for folder, duplicates in moves:
+            move_duplicates(folder, duplicates, Path(args.dups_dir))
+        print(f"Moved {sum(len(d) for _, d in moves)} duplicates to {args.dups_dir}/ (undo with --restore)")
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import numpy as np
 import pickle
 from keras.models import load_model
 import os
+from gesture_db import GestureLabels
 
 def get_hand_hist():
     with open("hist", "rb") as f:
@@ -20,6 +21,7 @@ image_x, image_y = get_image_size()
 num_of_classes = get_num_of_classes()
 model = load_model('cnn_model_keras2.h5')
 hist = get_hand_hist()
+labels = GestureLabels()
 
 cam = cv2.VideoCapture(0)
 x, y, w, h = 300, 100, 300, 300
@@ -49,7 +51,7 @@ while True:
             save_img = cv2.resize(save_img, (image_x, image_y))
             save_img = np.reshape(save_img, (1, image_x, image_y, 1))
             result = model.predict(save_img)
-            prediction = np.argmax(result)
+            prediction = labels.name(np.argmax(result))
             cv2.putText(img, f'Prediction: {prediction}', (30, 60), cv2.FONT_HERSHEY_TRIPLEX, 2, (127, 255, 255))
     cv2.rectangle(img, (x,y), (x+w, y+h), (0,255,0), 2)
     cv2.imshow("Gesture Recognition", img)
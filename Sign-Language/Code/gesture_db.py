@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import time
+import numpy as np
+
+DB_PATH = "gesture_db.db"
+
+def init_db(db_path=DB_PATH):
+    """Create the gesture table if it does not exist yet."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS gesture ( g_id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE, g_name TEXT NOT NULL )")
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_gesture_name(g_id, db_path=DB_PATH):
+    """Return the stored name for a single g_id, or None."""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT g_name FROM gesture WHERE g_id = ?", (int(g_id),)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+def upsert_gestures(rows, db_path=DB_PATH):
+    """Insert or update many (g_id, g_name) pairs in a single transaction.
+
+    The user_version pragma is bumped so that caches in other processes
+    notice the change even when the file mtime resolution is coarse.
+    """
+    rows = [(int(g_id), str(g_name)) for g_id, g_name in rows]
+    if not rows:
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO gesture (g_id, g_name) VALUES (?, ?) "
+                "ON CONFLICT(g_id) DO UPDATE SET g_name = excluded.g_name",
+                rows
+            )
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            conn.execute(f"PRAGMA user_version = {int(version) + 1}")
+    finally:
+        conn.close()
+    return len(rows)
+
+
+class GestureLabels:
+    """In-memory g_id -> g_name cache backed by the gesture table.
+
+    The table is read once into an array indexed by g_id, so mapping a
+    prediction (or a whole batch of them) is a plain array lookup. The
+    file is re-read only when its mtime or user_version changes, and that
+    check is throttled to once every `check_interval` seconds.
+    """
+
+    def __init__(self, db_path=DB_PATH, check_interval=1.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._names = np.empty(0, dtype=object)
+        self._mtime = None
+        self._version = None
+        self._last_check = 0.0
+        self.reload()
+
+    def _read_version(self, conn):
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def reload(self):
+        """Load the whole gesture table into the array cache."""
+        if not os.path.exists(self.db_path):
+            self._names = np.empty(0, dtype=object)
+            self._mtime = None
+            self._version = None
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT g_id, g_name FROM gesture ORDER BY g_id").fetchall()
+            self._version = self._read_version(conn)
+        finally:
+            conn.close()
+        size = rows[-1][0] + 1 if rows else 0
+        names = np.empty(size, dtype=object)
+        for g_id, g_name in rows:
+            if g_id >= 0:
+                names[g_id] = g_name
+        self._names = names
+        self._mtime = os.stat(self.db_path).st_mtime_ns
+        self._last_check = time.monotonic()
+
+    def refresh(self, force=False):
+        """Reload the cache if the database changed on disk."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        if not os.path.exists(self.db_path):
+            if self._mtime is not None:
+                self.reload()
+                return True
+            return False
+        mtime = os.stat(self.db_path).st_mtime_ns
+        if mtime != self._mtime:
+            self.reload()
+            return True
+        conn = sqlite3.connect(self.db_path)
+        try:
+            version = self._read_version(conn)
+        finally:
+            conn.close()
+        if version != self._version:
+            self.reload()
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, g_id, default=None):
+        """Map a single g_id to its name."""
+        self.refresh()
+        g_id = int(g_id)
+        if 0 <= g_id < len(self._names) and self._names[g_id] is not None:
+            return self._names[g_id]
+        return str(g_id) if default is None else default
+
+    def names(self, g_ids, default=None):
+        """Map an array of g_ids (e.g. argmax over a batch) to names."""
+        self.refresh()
+        ids = np.asarray(g_ids, dtype=np.int64).ravel()
+        out = np.empty(ids.shape[0], dtype=object)
+        valid = (ids >= 0) & (ids < len(self._names))
+        out[valid] = self._names[ids[valid]]
+        names = out.tolist()
+        for i, g_name in enumerate(names):
+            if g_name is None:
+                names[i] = str(ids[i]) if default is None else default
+        return names
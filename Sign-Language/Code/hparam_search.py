@@ -0,0 +1,261 @@
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Parallel hyperparameter search for the gesture CNN from cnn_model_train.py.
+# The pickled dataset is converted once into .npy files that every worker
+# memory-maps read-only, so N workers share one copy in the page cache.
+# Trials report validation accuracy after every epoch and are stopped once
+# they fall below the median of other trials at the same epoch. The score
+# trades accuracy against measured single-frame latency.
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'train'))
+
+DATASET_FILES = ('train_images', 'train_labels', 'val_images', 'val_labels')
+
+SEARCH_SPACE = {
+    'filters': [(8, 16, 32), (16, 32, 64), (16, 32, 32), (32, 64, 64), (32, 64, 128)],
+    'dense_units': [32, 64, 128, 256],
+    'dropout': [0.0, 0.2, 0.4],
+    'optimizer': ['sgd', 'adam'],
+    'lr': (1e-4, 1e-1),  # log-uniform
+    'batch_size': [64, 128, 256, 500]
+}
+
+def cache_dataset(cache_dir='dataset_cache'):
+    """Convert the load_images.py pickles to .npy once; redone when a pickle is newer."""
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    for name in DATASET_FILES:
+        target = cache / f'{name}.npy'
+        if target.exists() and target.stat().st_mtime >= os.path.getmtime(name):
+            continue
+        with open(name, 'rb') as f:
+            data = np.array(pickle.load(f))
+        if name.endswith('images'):
+            data = data.reshape(data.shape + (1,)).astype(np.uint8)
+        else:
+            data = data.astype(np.int32)
+        tmp = cache / f'{name}.tmp.npy'
+        np.save(tmp, data)
+        os.replace(tmp, target)
+        print(f"Cached {name} {data.shape} -> {target}")
+    return cache
+
+def open_dataset(cache):
+    """Read-only memory maps over the cached arrays (no copy per process)."""
+    return {name: np.load(Path(cache) / f'{name}.npy', mmap_mode='r') for name in DATASET_FILES}
+
+def sample_trial(rng, trial_id):
+    low, high = SEARCH_SPACE['lr']
+    return {
+        'trial': trial_id,
+        'filters': list(SEARCH_SPACE['filters'][rng.integers(len(SEARCH_SPACE['filters']))]),
+        'dense_units': int(rng.choice(SEARCH_SPACE['dense_units'])),
+        'dropout': float(rng.choice(SEARCH_SPACE['dropout'])),
+        'optimizer': str(rng.choice(SEARCH_SPACE['optimizer'])),
+        'lr': float(math.exp(rng.uniform(math.log(low), math.log(high)))),
+        'batch_size': int(rng.choice(SEARCH_SPACE['batch_size']))
+    }
+
+def objective(accuracy, latency_ms, latency_weight, latency_budget_ms=None):
+    """Accuracy minus `latency_weight` per ms of per-frame latency; None over budget."""
+    if latency_budget_ms is not None and latency_ms > latency_budget_ms:
+        return None
+    return accuracy - latency_weight * latency_ms
+
+def should_prune(reports, lock, epoch, accuracy, min_trials, warmup_epochs):
+    """Record `accuracy` at `epoch` and report whether it is below the median so far."""
+    with lock:
+        previous = list(reports.get(epoch, []))
+        reports[epoch] = previous + [accuracy]
+    if epoch < warmup_epochs or len(previous) < min_trials:
+        return False
+    return accuracy < float(np.median(previous))
+
+class OneHotBatches:
+    """harness.ArrayBatches over the memory maps, scaled and one-hot per batch."""
+
+    def __init__(self, images, labels, num_of_classes, batch_size, shuffle, seed):
+        import harness
+        self._batches = harness.ArrayBatches(images, labels, batch_size, shuffle=shuffle, seed=seed)
+        self._eye = np.eye(num_of_classes, dtype=np.float32)
+
+    def __len__(self):
+        return len(self._batches)
+
+    def __getitem__(self, i):
+        # Fancy indexing copies just this batch out of the memory map
+        x, y = self._batches[i]
+        return x.astype(np.float32), self._eye[y]
+
+    def on_epoch_end(self):
+        self._batches.on_epoch_end()
+
+def run_trial(trial, data, num_of_classes, epochs, reports, lock, min_trials, warmup_epochs, save_dir):
+    import harness
+    from keras import optimizers
+    from keras.layers import Dropout
+    from prune_cnn import build_cnn, frame_latency_ms
+
+    image_x, image_y = data['train_images'].shape[1:3]
+    model = build_cnn(image_x, image_y, num_of_classes, filters=trial['filters'], dense_units=trial['dense_units'])
+    next(layer for layer in model.layers if isinstance(layer, Dropout)).rate = trial['dropout']
+    optimizer = optimizers.SGD(learning_rate=trial['lr']) if trial['optimizer'] == 'sgd' else optimizers.Adam(learning_rate=trial['lr'])
+    model.compile(loss='categorical_crossentropy', optimizer=optimizer, metrics=['accuracy'])
+
+    train = OneHotBatches(data['train_images'], data['train_labels'], num_of_classes,
+                          trial['batch_size'], shuffle=True, seed=trial['trial'])
+    val = OneHotBatches(data['val_images'], data['val_labels'], num_of_classes, 500, shuffle=False, seed=0)
+
+    history, pruned = [], False
+    started = time.perf_counter()
+    for epoch in range(epochs):
+        model.reset_metrics()
+        for x, y in harness.prefetch(train, len(train)):
+            model.train_on_batch(x, y, reset_metrics=False)
+        train.on_epoch_end()
+        accuracy = harness.evaluate(model, val)['accuracy']
+        history.append(accuracy)
+        if should_prune(reports, lock, epoch, accuracy, min_trials, warmup_epochs):
+            pruned = True
+            break
+
+    result = dict(trial, history=history, pruned=pruned, epochs_run=len(history),
+                  accuracy=max(history), params=int(model.count_params()),
+                  train_s=round(time.perf_counter() - started, 1))
+    if not pruned:
+        result['latency_ms'] = frame_latency_ms(model)
+        if save_dir:
+            path = Path(save_dir) / f"trial_{trial['trial']:03d}.h5"
+            model.save(path)
+            result['model_path'] = str(path)
+    return result
+
+def _worker_main(core, cache, num_of_classes, epochs, tasks, results, reports, lock, min_trials, warmup_epochs, save_dir):
+    if core is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {core})
+    # One trial per core: single-threaded TF keeps trials from fighting over
+    # cores and makes the per-frame latency comparable between them
+    from backend.inference_executor import ResourceConfig, apply_thread_budget
+    apply_thread_budget(ResourceConfig(workers=1, intra_op=1, inter_op=1))
+    data = open_dataset(cache)
+    while True:
+        trial = tasks.get()
+        if trial is None:
+            break
+        try:
+            results.put(run_trial(trial, data, num_of_classes, epochs, reports, lock,
+                                  min_trials, warmup_epochs, save_dir))
+        except Exception as e:
+            results.put(dict(trial, error=str(e)))
+
+def search(args):
+    cache = cache_dataset(args.cache_dir)
+    data = open_dataset(cache)
+    num_of_classes = int(max(data['train_labels'].max(), data['val_labels'].max())) + 1
+    del data
+    if args.save_dir:
+        Path(args.save_dir).mkdir(parents=True, exist_ok=True)
+
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    workers = args.workers or len(available)
+    rng = np.random.default_rng(args.seed)
+
+    ctx = mp.get_context('spawn')
+    manager = ctx.Manager()
+    reports, lock = manager.dict(), manager.Lock()
+    tasks, results = ctx.Queue(), ctx.Queue()
+    for i in range(args.trials):
+        tasks.put(sample_trial(rng, i))
+    for _ in range(workers):
+        tasks.put(None)
+    processes = [
+        ctx.Process(target=_worker_main, daemon=True, args=(
+            available[i % len(available)], str(cache), num_of_classes, args.epochs, tasks, results,
+            reports, lock, args.min_trials, args.warmup_epochs, args.save_dir))
+        for i in range(workers)
+    ]
+    for proc in processes:
+        proc.start()
+    print(f"{args.trials} trials on {workers} workers, up to {args.epochs} epochs each")
+
+    trials = []
+    while len(trials) < args.trials:
+        try:
+            result = results.get(timeout=5)
+        except queue.Empty:
+            if not any(proc.is_alive() for proc in processes):
+                print("All workers exited early")
+                break
+            continue
+        if 'error' in result:
+            print(f"  trial {result['trial']} failed: {result['error']}")
+        elif result['pruned']:
+            print(f"  trial {result['trial']} pruned after {result['epochs_run']} epochs (acc {result['accuracy']:.4f})")
+        else:
+            result['score'] = objective(result['accuracy'], result['latency_ms'],
+                                        args.latency_weight, args.latency_budget)
+            print(f"  trial {result['trial']}: acc {result['accuracy']:.4f}  latency {result['latency_ms']:.2f}ms  "
+                  f"score {result['score'] if result['score'] is not None else 'over budget'}  ({result['filters']}, {result['dense_units']}, "
+                  f"{result['optimizer']} lr={result['lr']:.1e}, bs={result['batch_size']})")
+        trials.append(result)
+    for proc in processes:
+        proc.join(timeout=5)
+    manager.shutdown()
+    return trials
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the gesture CNN")
+    parser.add_argument('--trials', type=int, default=32)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per core)")
+    parser.add_argument('--epochs', type=int, default=10, help="Epoch budget per trial")
+    parser.add_argument('--latency-weight', type=float, default=0.01,
+                        help="Accuracy given up per ms of per-frame latency")
+    parser.add_argument('--latency-budget', type=float, help="Discard trials slower than this many ms per frame")
+    parser.add_argument('--min-trials', type=int, default=4, help="Reports needed at an epoch before pruning on it")
+    parser.add_argument('--warmup-epochs', type=int, default=1, help="Never prune during the first N epochs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-dir', default='dataset_cache')
+    parser.add_argument('--save-dir', default='hparam_trials', help="Where completed trial models are saved ('' to skip)")
+    parser.add_argument('--report', default='hparam_report.json')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    trials = search(args)
+    finished = [t for t in trials if t.get('score') is not None]
+    best = max(finished, key=lambda t: t['score']) if finished else None
+    if best:
+        print(f"\nBest trial {best['trial']}: acc {best['accuracy']:.4f}, {best['latency_ms']:.2f}ms/frame")
+        print(f"  filters={best['filters']} dense_units={best['dense_units']} dropout={best['dropout']} "
+              f"{best['optimizer']} lr={best['lr']:.2e} batch_size={best['batch_size']}")
+        if best.get('model_path'):
+            print(f"  model: {best['model_path']}")
+    else:
+        print("\nNo trial completed within the latency budget")
+
+    with open(args.report, 'w') as f:
+        json.dump({
+            'trials': len(trials),
+            'pruned': sum(1 for t in trials if t.get('pruned')),
+            'failed': sum(1 for t in trials if 'error' in t),
+            'latency_weight': args.latency_weight,
+            'latency_budget_ms': args.latency_budget,
+            'elapsed_s': round(time.perf_counter() - started, 1),
+            'best': best,
+            'results': sorted(trials, key=lambda t: t['score'] if t.get('score') is not None else float('-inf'), reverse=True)
+        }, f, indent=2)
+    print(f"Search report written to {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import pickle
+import time
+import numpy as np
+from keras import optimizers
+from keras.models import Sequential, load_model
+from keras.layers import Dense, Dropout, Flatten, Conv2D, MaxPooling2D
+from keras.utils import to_categorical
+
+# Structured pruning for the gesture CNN from cnn_model_train.py.
+# Whole conv filters and dense units are removed (by L1 norm), so the
+# exported model is physically smaller rather than just sparse.
+
+SPARSITIES = [0.0, 0.25, 0.5, 0.625, 0.75, 0.875]
+
+def build_cnn(image_x, image_y, num_of_classes, filters=(16, 32, 64), dense_units=128):
+    """Same topology as cnn_model() in cnn_model_train.py, with configurable widths."""
+    model = Sequential()
+    model.add(Conv2D(filters[0], (2,2), input_shape=(image_x, image_y, 1), activation='relu'))
+    model.add(MaxPooling2D(pool_size=(2, 2), strides=(2, 2), padding='same'))
+    model.add(Conv2D(filters[1], (3,3), activation='relu'))
+    model.add(MaxPooling2D(pool_size=(3, 3), strides=(3, 3), padding='same'))
+    model.add(Conv2D(filters[2], (5,5), activation='relu'))
+    model.add(MaxPooling2D(pool_size=(5, 5), strides=(5, 5), padding='same'))
+    model.add(Flatten())
+    model.add(Dense(dense_units, activation='relu'))
+    model.add(Dropout(0.2))
+    model.add(Dense(num_of_classes, activation='softmax'))
+    return model
+
+def compile_model(model, lr=1e-2):
+    model.compile(loss='categorical_crossentropy', optimizer=optimizers.SGD(learning_rate=lr), metrics=['accuracy'])
+    return model
+
+def load_data():
+    with open("train_images", "rb") as f:
+        train_images = np.array(pickle.load(f))
+    with open("train_labels", "rb") as f:
+        train_labels = np.array(pickle.load(f), dtype=np.int32)
+    with open("val_images", "rb") as f:
+        val_images = np.array(pickle.load(f))
+    with open("val_labels", "rb") as f:
+        val_labels = np.array(pickle.load(f), dtype=np.int32)
+    image_x, image_y = train_images.shape[1:3]
+    train_images = np.reshape(train_images, (train_images.shape[0], image_x, image_y, 1))
+    val_images = np.reshape(val_images, (val_images.shape[0], image_x, image_y, 1))
+    num_of_classes = int(max(train_labels.max(), val_labels.max())) + 1
+    train_labels = to_categorical(train_labels, num_of_classes)
+    val_labels = to_categorical(val_labels, num_of_classes)
+    return (train_images, train_labels), (val_images, val_labels)
+
+def keep_indices(scores, keep):
+    """Indices of the `keep` highest scores, in their original order."""
+    keep = max(1, min(keep, len(scores)))
+    return np.sort(np.argsort(scores)[::-1][:keep])
+
+def prune(model, sparsity):
+    """Return a smaller dense model with `sparsity` of the filters/units removed."""
+    convs = [layer for layer in model.layers if isinstance(layer, Conv2D)]
+    denses = [layer for layer in model.layers if isinstance(layer, Dense)]
+    flatten = next(layer for layer in model.layers if isinstance(layer, Flatten))
+    image_x, image_y = model.input_shape[1:3]
+    num_of_classes = denses[-1].units
+
+    # Choose which filters / units survive, by L1 norm of their weights
+    kept_filters = []
+    for conv in convs:
+        kernel = conv.get_weights()[0]
+        scores = np.abs(kernel).sum(axis=(0, 1, 2))
+        kept_filters.append(keep_indices(scores, int(round(kernel.shape[-1] * (1 - sparsity)))))
+    hidden_kernel = denses[0].get_weights()[0]
+    kept_units = keep_indices(np.abs(hidden_kernel).sum(axis=0), int(round(hidden_kernel.shape[-1] * (1 - sparsity))))
+
+    pruned = build_cnn(image_x, image_y, num_of_classes,
+                       filters=tuple(len(k) for k in kept_filters), dense_units=len(kept_units))
+
+    # Copy the surviving slices into the smaller model
+    pruned_convs = [layer for layer in pruned.layers if isinstance(layer, Conv2D)]
+    in_channels = np.arange(convs[0].get_weights()[0].shape[2])
+    for conv, pruned_conv, kept in zip(convs, pruned_convs, kept_filters):
+        kernel, bias = conv.get_weights()
+        pruned_conv.set_weights([kernel[:, :, in_channels][:, :, :, kept], bias[kept]])
+        in_channels = kept
+
+    # Flatten orders features as (row, col, channel): keep the surviving channels at every position
+    h, w, channels = flatten.input.shape[1:]
+    positions = np.arange(h * w)[:, None] * channels
+    flat_kept = (positions + kept_filters[-1][None, :]).ravel()
+
+    pruned_denses = [layer for layer in pruned.layers if isinstance(layer, Dense)]
+    kernel, bias = denses[0].get_weights()
+    pruned_denses[0].set_weights([kernel[flat_kept][:, kept_units], bias[kept_units]])
+    kernel, bias = denses[1].get_weights()
+    pruned_denses[1].set_weights([kernel[kept_units], bias])
+    return pruned
+
+def share_weights(model, clusters=16, iterations=10):
+    """Cluster each kernel to `clusters` shared values (1-D k-means), in place.
+
+    The shapes are unchanged, but the saved model compresses to roughly
+    log2(clusters) bits per weight.
+    """
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue
+        kernel = weights[0]
+        flat = kernel.ravel()
+        centroids = np.quantile(flat, np.linspace(0, 1, clusters))
+        for _ in range(iterations):
+            assignment = np.abs(flat[:, None] - centroids[None, :]).argmin(axis=1)
+            for c in range(clusters):
+                members = flat[assignment == c]
+                if members.size:
+                    centroids[c] = members.mean()
+        weights[0] = centroids[assignment].reshape(kernel.shape).astype(kernel.dtype)
+        layer.set_weights(weights)
+    return model
+
+def frame_latency_ms(model, runs=200, warmup=10):
+    """Median latency of a single 1-frame forward pass, as final.py runs it."""
+    x = np.random.random((1,) + tuple(model.input_shape[1:])).astype(np.float32)
+    for _ in range(warmup):
+        model(x, training=False)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(x, training=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune the gesture CNN and sweep accuracy vs latency")
+    parser.add_argument('--model', default='cnn_model_keras2.h5')
+    parser.add_argument('--sparsities', type=float, nargs='+', default=SPARSITIES)
+    parser.add_argument('--latency-budget', type=float, help="Per-frame latency budget in ms")
+    parser.add_argument('--finetune-epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--share-weights', type=int, default=0,
+                        help="Cluster kernels of the exported model to this many shared values")
+    parser.add_argument('--output', default='cnn_model_pruned.h5')
+    parser.add_argument('--report', default='prune_report.json')
+    args = parser.parse_args()
+
+    (train_images, train_labels), (val_images, val_labels) = load_data()
+    base = load_model(args.model)
+
+    sweep = []
+    for sparsity in args.sparsities:
+        model = compile_model(prune(base, sparsity) if sparsity > 0 else base)
+        if sparsity > 0 and args.finetune_epochs > 0:
+            model.fit(train_images, train_labels, validation_data=(val_images, val_labels),
+                      epochs=args.finetune_epochs, batch_size=args.batch_size, verbose=2)
+        accuracy = model.evaluate(val_images, val_labels, verbose=0)[1]
+        entry = {
+            'sparsity': sparsity,
+            'filters': [layer.filters for layer in model.layers if isinstance(layer, Conv2D)],
+            'dense_units': next(layer.units for layer in model.layers if isinstance(layer, Dense)),
+            'params': int(model.count_params()),
+            'accuracy': float(accuracy),
+            'latency_ms': frame_latency_ms(model)
+        }
+        print(f"sparsity={sparsity:.3f}  params={entry['params']:,}  acc={entry['accuracy']:.4f}  latency={entry['latency_ms']:.2f}ms")
+        entry['model'] = model
+        sweep.append(entry)
+
+    # Pick the most accurate point within budget, else the fastest one
+    candidates = [e for e in sweep if args.latency_budget is None or e['latency_ms'] <= args.latency_budget]
+    if candidates:
+        chosen = max(candidates, key=lambda e: (e['accuracy'], -e['latency_ms']))
+    else:
+        print(f"No configuration meets {args.latency_budget}ms; exporting the fastest one")
+        chosen = min(sweep, key=lambda e: e['latency_ms'])
+    if args.share_weights:
+        share_weights(chosen['model'], args.share_weights)
+        chosen['shared_accuracy'] = float(chosen['model'].evaluate(val_images, val_labels, verbose=0)[1])
+        print(f"Weight sharing ({args.share_weights} clusters) accuracy: {chosen['shared_accuracy']:.4f}")
+    chosen['model'].save(args.output)
+    print(f"Saved sparsity={chosen['sparsity']} model to {args.output}")
+
+    with open(args.report, 'w') as f:
+        json.dump({
+            'base_model': args.model,
+            'latency_budget_ms': args.latency_budget,
+            'chosen_sparsity': chosen['sparsity'],
+            'sweep': [{k: v for k, v in e.items() if k != 'model'} for e in sweep]
+        }, f, indent=2)
+    print(f"Sweep report written to {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.neural_network import MLPClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from backend.landmark_recognizer import DEFAULT_MODEL_PATH, FEATURE_VERSION, HandLandmarkExtractor
+from gesture_db import GestureLabels
+
+# Trains the landmark gesture classifier served by
+# backend/landmark_recognizer.py. Input is a folder per g_id like gestures/,
+# but with colour images: gestures/ itself only holds thresholded masks,
+# which have no landmarks, so create_gestures.py also saves the colour hand
+# box to gestures_rgb/<g_id>/.
+
+def image_paths(root):
+    for folder in sorted(Path(root).iterdir(), key=lambda p: (len(p.name), p.name)):
+        if folder.is_dir() and folder.name.isdigit():
+            for path in sorted(folder.glob('*.jpg')):
+                yield int(folder.name), path
+
+def extract_features(root, cache_path):
+    """Landmark features for every image, reusing cached ones for unchanged files."""
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('feature_version') == FEATURE_VERSION:
+            cache = cached['features']
+
+    extractor = HandLandmarkExtractor()
+    features, labels, updated, missed = [], [], {}, 0
+    started = time.perf_counter()
+    for g_id, path in image_paths(root):
+        key = (str(path), path.stat().st_mtime_ns)
+        if key in cache:
+            vector = cache[key]
+        else:
+            img = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            vector = extractor.extract(img) if img is not None else None
+        updated[key] = vector
+        if vector is None:
+            missed += 1
+            continue
+        features.append(vector)
+        labels.append(g_id)
+    extractor.close()
+
+    if cache_path:
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'feature_version': FEATURE_VERSION, 'features': updated}, f)
+    print(f"{len(features)} images with a hand, {missed} without, in {time.perf_counter() - started:.1f}s")
+    return np.array(features, np.float32), np.array(labels, np.int32), missed
+
+def build_classifier(kind, seed):
+    if kind == 'gbt':
+        return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1, random_state=seed)
+    return MLPClassifier(hidden_layer_sizes=(128, 64), early_stopping=True, max_iter=500, random_state=seed)
+
+def per_frame_ms(classifier, x, runs=200):
+    """Median single-vector predict_proba time, as the server calls it."""
+    row = x[:1]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        classifier.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hand-landmark gesture classifier")
+    parser.add_argument('--data', default='gestures_rgb', help="Folder with one colour-image folder per g_id")
+    parser.add_argument('--classifier', choices=['mlp', 'gbt'], default='mlp')
+    parser.add_argument('--feature-cache', default='landmark_features.pkl')
+    parser.add_argument('--val-split', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument('--report', default='landmark_report.json')
+    args = parser.parse_args()
+
+    x, y, missed = extract_features(args.data, args.feature_cache)
+    if len(np.unique(y)) < 2:
+        raise SystemExit(f"Need landmarks from at least two gestures in {args.data}; are these colour images?")
+    x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=args.val_split, random_state=args.seed, stratify=y)
+
+    classifier = build_classifier(args.classifier, args.seed)
+    started = time.perf_counter()
+    classifier.fit(x_train, y_train)
+    train_s = time.perf_counter() - started
+    accuracy = float(accuracy_score(y_val, classifier.predict(x_val)))
+    latency = per_frame_ms(classifier, x_val)
+    print(f"{args.classifier}: val accuracy {accuracy:.4f}, {latency:.3f} ms per frame, trained in {train_s:.1f}s")
+
+    names = GestureLabels()
+    labels = {int(g_id): names.name(g_id) for g_id in classifier.classes_}
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'wb') as f:
+        pickle.dump({'classifier': classifier, 'labels': labels, 'feature_version': FEATURE_VERSION}, f)
+    print(f"Saved {args.output}")
+
+    with open(args.report, 'w') as f:
+        json.dump({
+            'classifier': args.classifier,
+            'images': int(len(x) + missed),
+            'no_hand': missed,
+            'train': int(len(x_train)),
+            'val': int(len(x_val)),
+            'gestures': len(labels),
+            'val_accuracy': accuracy,
+            'classify_ms': latency,
+            'train_s': round(train_s, 1)
+        }, f, indent=2)
+    print(f"Report written to {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 import cv2
 import numpy as np
 import io
@@ -17,6 +17,19 @@ logger = logging.getLogger(__name__)
 # Add the project root directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from model.gesture_recognizer import GestureRecognizer
+from backend.sequence_decoder import SessionDecoders, top_gesture
+from backend.frame_processing import (
+    GESTURE_IMAGE_SIZE, HAND_ROI, SessionROIs, crop_to_roi, decode_base64_bytes, decode_upload, extract_gesture_input,
+    parse_roi, segment_hand_lut
+)
+from backend.calibration import HandCalibrations
+from backend.responses import encode_response
+from backend.negotiation import TASK_REQUIREMENTS, LoadTracker
+from backend.worker_pool import SegmentationPool, WorkerCrashed
+from backend.inference_executor import InferenceExecutor
+from backend.landmark_recognizer import DEFAULT_MODEL_PATH as LANDMARK_MODEL_PATH, LandmarkGestureRecognizer
+from backend.hot_swap import FileWatcher, ModelSlot, admin_allowed
+from backend.mask_classifier import load_mask_classifier
 
 app = Flask(__name__)
 
@@ -29,34 +42,118 @@ CORS(app, resources={
     }
 })
 
-# Initialize the gesture recognizer
-gesture_recognizer = GestureRecognizer()
+# Per-task input requirements and live load, advertised on /health. The
+# tracker is built once the recognizer is registered (below), since its
+# capacity is the recognizer's concurrency.
+load_tracker = None
 
-def decode_base64_image(base64_string):
-    """Decode base64 image data to numpy array."""
-    try:
-        # Remove data URL prefix if present
-        if 'base64,' in base64_string:
-            base64_string = base64_string.split('base64,')[1]
-        
-        # Decode base64 string
-        img_bytes = base64.b64decode(base64_string)
-        logger.info(f"Decoded base64 string, length: {len(img_bytes)} bytes")
-        
-        # Convert to numpy array
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        logger.info(f"Converted to numpy array, shape: {nparr.shape}")
-        
-        # Decode image
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img is None:
-            raise ValueError("Failed to decode image")
-            
-        logger.info(f"Successfully decoded image, shape: {img.shape}")
-        return img
-    except Exception as e:
-        logger.error(f"Error decoding base64 image: {str(e)}")
-        raise
+@app.before_request
+def track_frame_start():
+    if request.endpoint == 'process_frame' and request.method == 'POST':
+        g.frame_started = load_tracker.start()
+
+@app.teardown_request
+def track_frame_end(exc):
+    started = g.pop('frame_started', None)
+    if started is not None:
+        load_tracker.finish(started)
+
+# Initialize the gesture recognizer (not in pool workers, which spawn-import
+# this module as __mp_main__ but only run OpenCV stages). Thread budgets are
+# applied first; the recognizer's thread-safety is unknown, so the executor
+# runs it one call at a time. GESTURE_BACKEND=landmarks swaps in the
+# MediaPipe hand-landmark classifier for the mask CNN.
+# The recognizer lives in a ModelSlot: POST /admin/reload (or a changed
+# landmark model file, with MODEL_WATCH_INTERVAL > 0) builds and warms a new
+# one in the background and swaps it in between requests.
+GESTURE_BACKEND = os.environ.get('GESTURE_BACKEND', 'cnn')
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '0'))
+
+def load_gesture_recognizer(version=None):
+    """(recognizer, watched file or None, version label) for the configured backend.
+
+    Neither backend is versioned: the CNN recognizer loads its own model and
+    the landmark classifier is a single file, so only the current file can
+    be (re)loaded.
+    """
+    if version is not None:
+        raise ValueError(f"The gesture model has no versions (asked for {version!r})")
+    if GESTURE_BACKEND == 'landmarks':
+        path = Path(os.environ.get('GESTURE_LANDMARK_MODEL') or LANDMARK_MODEL_PATH).resolve()
+        return LandmarkGestureRecognizer(path), str(path), f"landmarks@{int(path.stat().st_mtime)}"
+    return GestureRecognizer(), None, 'cnn'
+
+def warm_up_recognizer(recognizer):
+    recognizer.detect_gestures(np.zeros((HAND_ROI[3], HAND_ROI[2], 3), np.uint8))
+
+def detect_gestures(img):
+    # Each call holds the recognizer it started on until it returns
+    with gesture_models.use() as recognizer:
+        return recognizer.detect_gestures(img)
+
+# Calibrated users are segmented with their own hand histogram, which yields
+# exactly the 50x50 masks the Sign-Language CNN was trained on, so their
+# frames are classified from the mask instead of going through the raw-frame
+# recognizer. Without the model (e.g. LFS files not pulled) they fall back to
+# the recognizer; /health reports why.
+def warm_up_mask_classifier(classifier):
+    classifier.classify(np.zeros((1,) + GESTURE_IMAGE_SIZE + (1,), np.uint8))
+
+def classify_mask(gesture_input):
+    with mask_models.use() as classifier:
+        return classifier.classify(gesture_input)
+
+executor = None
+gesture_models = None
+mask_models = None
+mask_model_error = None
+model_watcher = None
+if __name__ != '__mp_main__':
+    executor = InferenceExecutor()
+    gesture_models = ModelSlot('gesture', load_gesture_recognizer, warmup=warm_up_recognizer)
+    gesture_models.load()
+    executor.register('gesture', detect_gestures, concurrency=1)
+    if GESTURE_BACKEND == 'cnn':
+        mask_models = ModelSlot('gesture_mask', load_mask_classifier, warmup=warm_up_mask_classifier)
+        try:
+            mask_models.load()
+            executor.register('gesture_mask', classify_mask, concurrency=1)
+        except Exception as e:
+            logger.error(f"Gesture mask CNN unavailable, calibrated users use the recognizer: {str(e)}")
+            mask_model_error = str(e)
+    if MODEL_WATCH_INTERVAL > 0 and gesture_models.source:
+        model_watcher = FileWatcher(lambda: [gesture_models.source], gesture_models.reload,
+                                    interval=MODEL_WATCH_INTERVAL)
+
+# Per-session streaming decoders that build the `sequence` string
+sequence_decoders = SessionDecoders()
+
+# Per-session hand ROIs; frames from these sessions are cropped before detection
+session_rois = SessionROIs()
+
+# Per-user hand histograms with precomputed back-projection lookup tables
+hand_calibrations = HandCalibrations()
+
+# Optional process pool for decode/crop/segmentation (GESTURE_WORKERS > 0),
+# so OpenCV work spreads over cores instead of contending for the GIL.
+# Frames travel through the pool's shared-memory frame ring.
+GESTURE_WORKERS = int(os.environ.get('GESTURE_WORKERS', '0'))
+segmentation_pool = None
+if GESTURE_WORKERS > 0 and __name__ != '__mp_main__':
+    segmentation_pool = SegmentationPool(workers=GESTURE_WORKERS)
+
+# Every frame with a hand goes through the recognizer, so its executor
+# concurrency bounds how many frames are worked on at once (pool workers
+# only decode and segment ahead of it)
+load_tracker = LoadTracker(capacity=executor.concurrency('gesture') if executor is not None else None)
+
+def get_user_id(data):
+    """Calibrations are per user; sessions without a user_id calibrate themselves."""
+    return str(data.get('user_id') or get_session_id(data))
+
+def get_session_id(data):
+    """Identify the client stream; falls back to the remote address."""
+    return str(data.get('session_id') or request.remote_addr or 'default')
 
 @app.route('/process_frame', methods=['POST', 'OPTIONS'])
 def process_frame():
@@ -79,17 +176,64 @@ def process_frame():
         frame_data = data['frame']
         logger.info("Processing frame for gesture detection")
         
+        # ROI mode: either the client already sent just the hand box, or the
+        # session has a configured ROI and only that region is processed
+        session_id = get_session_id(data)
+        roi = None if data.get('roi_only') else session_rois.get(session_id)
+        cropped = bool(data.get('roi_only')) or roi is not None
+        calibration = hand_calibrations.get(get_user_id(data))
+
         # Decode the base64 image
+        pooled = None
+        hand_detected = None
         try:
-            img = decode_base64_image(frame_data)
+            # Both paths reject frames over the same MAX_FRAME_* limits
+            if segmentation_pool is not None:
+                # Decode, crop and LUT segmentation run in a pinned worker process
+                pooled = segmentation_pool.process(
+                    decode_base64_bytes(frame_data), roi=roi,
+                    lut=calibration.lut if calibration is not None else None,
+                    lut_key=calibration.key if calibration is not None else None,
+                    lut_roi=None if cropped else HAND_ROI
+                )
+                img, hand_detected = pooled.frame, pooled.has_hand
+            else:
+                img = decode_upload(frame_data)
+                if roi is not None:
+                    img = crop_to_roi(img, roi)
             logger.info(f"Successfully decoded image for processing, shape: {img.shape}")
+        except TimeoutError as e:
+            logger.error(f"Segmentation pool busy: {str(e)}")
+            return jsonify({'success': False, 'results': {'error': 'Server busy, try again'}}), 503
+        except WorkerCrashed as e:
+            # The pool has already started a replacement worker
+            logger.error(f"Segmentation worker crashed: {str(e)}")
+            return jsonify({'success': False, 'results': {'error': 'Worker restarted, try again'}}), 503
         except Exception as e:
             logger.error(f"Failed to decode image: {str(e)}")
             return jsonify({'success': False, 'results': {'error': f'Invalid image data: {str(e)}'}}), 400
         
         # Process gestures
         try:
-            detected_gestures = gesture_recognizer.detect_gestures(img)
+            # Calibrated users get one LUT segmentation (done by the pool
+            # worker when there is one); frames without a hand-sized blob
+            # skip inference entirely and the rest are classified from
+            # their mask
+            gesture_input = None
+            if calibration is not None:
+                if pooled is not None:
+                    gesture_input = pooled.gesture_input
+                else:
+                    thresh = segment_hand_lut(img, calibration.lut, roi=None if cropped else HAND_ROI)
+                    gesture_input = extract_gesture_input(thresh)
+                    hand_detected = gesture_input is not None
+
+            if hand_detected is False:
+                detected_gestures = []
+            elif gesture_input is not None and 'gesture_mask' in executor:
+                detected_gestures = executor.run('gesture_mask', gesture_input)
+            else:
+                detected_gestures = executor.run('gesture', img)
             logger.info(f"Raw detected gestures: {detected_gestures}")
             
             # Ensure we have a list of gestures
@@ -99,16 +243,27 @@ def process_frame():
                 gesture_list = detected_gestures
             else:
                 gesture_list = []
+
+            # Smooth over recent frames and extend the session's sequence
+            decoder = sequence_decoders.get(session_id)
+            label, confidence = top_gesture(gesture_list)
+            emitted = decoder.update(label, confidence)
+            sequence_state = decoder.state()
             
             response_data = {
                 'success': True,
                 'results': {
                     'gestures': gesture_list,
+                    'letter': emitted,
+                    'sequence': sequence_state['sequence'],
+                    'current_word': sequence_state['current_word'],
+                    'hand_detected': hand_detected,
                     'error': None
-                }
+                },
+                'load': load_tracker.snapshot()
             }
-            logger.info(f"Sending response: {response_data}")
-            return jsonify(response_data)
+            logger.debug("Sending response: %s", response_data)
+            return encode_response(response_data, 200, request.headers.get('Accept'))
             
         except Exception as e:
             logger.error(f"Error during gesture detection: {str(e)}", exc_info=True)
@@ -119,6 +274,9 @@ def process_frame():
                     'error': f"Gesture detection error: {str(e)}"
                 }
             })
+        finally:
+            if pooled is not None:
+                pooled.release()
             
     except Exception as e:
         logger.error(f"Unexpected error in process_frame: {str(e)}", exc_info=True)
@@ -129,9 +287,97 @@ def process_frame():
             }
         }), 500
 
+@app.route('/reset_sequence', methods=['POST', 'OPTIONS'])
+def reset_sequence():
+    if request.method == 'OPTIONS':
+        return '', 204
+    data = request.get_json(silent=True) or {}
+    cleared = sequence_decoders.reset(get_session_id(data))
+    return jsonify({'success': True, 'cleared': cleared})
+
+@app.route('/session_roi', methods=['GET', 'POST', 'DELETE', 'OPTIONS'])
+def session_roi():
+    if request.method == 'OPTIONS':
+        return '', 204
+    if request.method == 'GET':
+        data = {'session_id': request.args.get('session_id')}
+    else:
+        data = request.get_json(silent=True) or {}
+    session_id = get_session_id(data)
+
+    if request.method == 'DELETE':
+        return jsonify({'success': True, 'cleared': session_rois.clear(session_id)})
+    if request.method == 'POST':
+        try:
+            session_rois.set(session_id, parse_roi(data.get('roi')))
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+    roi = session_rois.get(session_id)
+    return jsonify({'success': True, 'session_id': session_id, 'roi': list(roi) if roi else None})
+
+@app.route('/calibrate', methods=['GET', 'POST', 'DELETE', 'OPTIONS'])
+def calibrate():
+    if request.method == 'OPTIONS':
+        return '', 204
+    if request.method == 'GET':
+        data = {'session_id': request.args.get('session_id'), 'user_id': request.args.get('user_id')}
+    else:
+        data = request.get_json(silent=True) or {}
+    user_id = get_user_id(data)
+
+    if request.method == 'GET':
+        return jsonify({'success': True, 'user_id': user_id, 'calibrated': hand_calibrations.is_calibrated(user_id)})
+    if request.method == 'DELETE':
+        cleared = hand_calibrations.clear(user_id)
+        if segmentation_pool is not None:
+            segmentation_pool.retire_lut(hand_calibrations.owner(user_id))
+        return jsonify({'success': True, 'user_id': user_id, 'cleared': cleared})
+
+    frames = data.get('frames') or []
+    if not isinstance(frames, list) or not frames:
+        return jsonify({'success': False, 'error': 'Provide one or more sample frames'}), 400
+    try:
+        images = [decode_upload(frame) for frame in frames]
+        region = parse_roi(data['region']) if data.get('region') else None
+        calibration = hand_calibrations.calibrate(user_id, images, region)
+        if segmentation_pool is not None:
+            # Published now so the first frame after calibrating doesn't pay for it
+            segmentation_pool.publish_lut(calibration.key, calibration.lut)
+    except Exception as e:
+        logger.error(f"Calibration failed: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': f'Calibration failed: {str(e)}'}), 400
+    logger.info(f"Calibrated hand histogram for {user_id} from {len(images)} frames")
+    return jsonify({'success': True, 'user_id': user_id, 'frames': len(images)})
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild the recognizer from its model file in the background and swap it in."""
+    if not admin_allowed(request):
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    if data.get('version') is not None:
+        return jsonify({'success': False, 'error': 'The gesture model has no versions; only its file can be reloaded'}), 400
+    if not gesture_models.reload():
+        return jsonify({'success': False, 'error': 'A reload is already running', 'model': gesture_models.status()}), 409
+    return jsonify({'success': True, 'model': gesture_models.status()}), 202
+
+def mask_status():
+    if mask_models is None:
+        return None
+    return dict(mask_models.status(), load_error=mask_model_error)
+
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'healthy'})
+    return jsonify({
+        'status': 'healthy',
+        'tasks': {'gesture': TASK_REQUIREMENTS['gesture']},
+        'gesture_backend': GESTURE_BACKEND,
+        'model': gesture_models.status() if gesture_models is not None else None,
+        'mask_model': mask_status(),
+        'load': load_tracker.snapshot(),
+        'frame_ring': segmentation_pool.stats() if segmentation_pool is not None else None,
+        'executor': executor.stats() if executor is not None else None
+    })
 
 if __name__ == '__main__':
     logger.info("Starting Flask server...")
@@ -0,0 +1,83 @@
+import io
+import tarfile
+import zipfile
+
+# Images inside a zip or tar upload (server/app.py /predict_batch). Sizes are
+# checked from the archive's own metadata before anything is extracted, and
+# again while reading, so a small upload cannot expand into gigabytes.
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.pgm')
+MAX_ARCHIVE_MEMBERS = 5000  # Entries of any kind, images or not
+MAX_MEMBER_BYTES = 20 << 20  # One uncompressed image
+MAX_ARCHIVE_BYTES = 512 << 20  # All uncompressed images together
+
+class ArchiveTooLarge(ValueError):
+    pass
+
+def is_image_name(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+class _Budget:
+    """Running member and byte counts against the limits; raises ArchiveTooLarge."""
+
+    def __init__(self, max_members, max_member_bytes, max_total_bytes):
+        self.max_members = max_members
+        self.max_member_bytes = max_member_bytes
+        self.max_total_bytes = max_total_bytes
+        self.members = 0
+        self.total_bytes = 0
+
+    def count(self, members=1):
+        self.members += members
+        if self.members > self.max_members:
+            raise ArchiveTooLarge(f"Archive has more than {self.max_members} entries")
+
+    def reserve(self, name, size):
+        if size > self.max_member_bytes:
+            raise ArchiveTooLarge(f"{name} is larger than {self.max_member_bytes} bytes")
+        self.total_bytes += size
+        if self.total_bytes > self.max_total_bytes:
+            raise ArchiveTooLarge(f"Archive expands to more than {self.max_total_bytes} bytes")
+
+    def read(self, name, f):
+        # Declared sizes can lie (zip); never read more than one member may hold
+        data = f.read(self.max_member_bytes + 1)
+        if len(data) > self.max_member_bytes:
+            raise ArchiveTooLarge(f"{name} is larger than {self.max_member_bytes} bytes")
+        return data
+
+def read_archive(data, filename='', max_members=MAX_ARCHIVE_MEMBERS, max_member_bytes=MAX_MEMBER_BYTES,
+                 max_total_bytes=MAX_ARCHIVE_BYTES):
+    """List (name, bytes) for every image inside a zip or tar upload.
+
+    Raises ArchiveTooLarge (a ValueError) as soon as the archive has more
+    than `max_members` entries, an image over `max_member_bytes` or images
+    totalling over `max_total_bytes`; zip limits are checked against the
+    central directory before any member is decompressed. Other ValueErrors,
+    zipfile.BadZipFile and tarfile.TarError mean the upload is not a usable
+    archive.
+    """
+    budget = _Budget(max_members, max_member_bytes, max_total_bytes)
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            infos = zf.infolist()
+            budget.count(len(infos))
+            images = [info for info in infos if not info.is_dir() and is_image_name(info.filename)]
+            for info in images:
+                budget.reserve(info.filename, info.file_size)
+            items = []
+            for info in images:
+                with zf.open(info) as f:
+                    items.append((info.filename, budget.read(info.filename, f)))
+            return items
+    if filename.lower().endswith(('.tar', '.tar.gz', '.tgz')) or tarfile.is_tarfile(io.BytesIO(data)):
+        items = []
+        # Streamed member by member, so an oversized archive stops at the first entry over a limit
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:*') as tf:
+            for member in tf:
+                budget.count()
+                if member.isfile() and is_image_name(member.name):
+                    budget.reserve(member.name, member.size)
+                    items.append((member.name, budget.read(member.name, tf.extractfile(member))))
+        return items
+    raise ValueError(f"Unsupported archive: {filename}")
@@ -0,0 +1,213 @@
+import hashlib
+import itertools
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+
+from backend.frame_processing import LUT_BITS
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_DIR = Path(os.environ.get('CALIBRATION_DIR', Path(__file__).resolve().parent / 'calibrations'))
+CALIBRATION_FRAME_SIZE = (640, 480)
+
+def sample_squares(img):
+    """Crop the 8x12 grid of 20px squares that set_hand_histogram.py samples."""
+    x, y, w, h = 200, 80, 20, 20
+    d = 8
+    rows = []
+    for i in range(8):
+        row = [img[y + i*(h+d):y + i*(h+d) + h, x + j*(w+d):x + j*(w+d) + w] for j in range(12)]
+        rows.append(np.hstack(row))
+    return np.vstack(rows)
+
+def compute_hand_hist(frames, region=None):
+    """Accumulate an H-S histogram over the sample area of several frames.
+
+    `region` is an optional (x, y, w, h) box to sample instead of the
+    set_hand_histogram.py grid. Frames are resized to 640x480 first so the
+    grid lands where the interactive tool draws it; like the tool, the grid
+    is sampled from the mirrored frame.
+    """
+    hist = np.zeros((180, 256), np.float32)
+    for img in frames:
+        if (img.shape[1], img.shape[0]) != CALIBRATION_FRAME_SIZE:
+            img = cv2.resize(img, CALIBRATION_FRAME_SIZE)
+        if region is not None:
+            x, y, w, h = region
+            crop = img[y:y+h, x:x+w]
+        else:
+            crop = sample_squares(cv2.flip(img, 1))
+        hsv_crop = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        hist += cv2.calcHist([hsv_crop], [0, 1], None, [180, 256], [0, 180, 0, 256])
+    cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+    return hist
+
+def build_backprojection_lut(hist, bits=LUT_BITS):
+    """Precompute back-projection values for every quantized BGR colour.
+
+    Entry (b << 2*bits | g << bits | r) holds the mean of what
+    calcBackProject returns over all colours in that cell, so per-frame
+    back-projection becomes a single table lookup (see
+    frame_processing.segment_hand_lut). The colour cube is walked one
+    blue cell at a time to keep memory bounded.
+    """
+    levels = 1 << bits
+    step = 1 << (8 - bits)
+    values = np.clip(hist, 0, 255).astype(np.uint8)
+    channel = np.arange(256, dtype=np.uint8)
+    g, r = np.meshgrid(channel, channel, indexing='ij')
+    lut = np.empty((levels, levels, levels), np.uint8)
+    for cell in range(levels):
+        b = np.broadcast_to(np.arange(cell * step, (cell + 1) * step, dtype=np.uint8)[:, None, None], (step, 256, 256))
+        bgr = np.stack([b, np.broadcast_to(g, b.shape), np.broadcast_to(r, b.shape)], axis=-1)
+        hsv = cv2.cvtColor(bgr.reshape(-1, 256, 3), cv2.COLOR_BGR2HSV).reshape(step, 256, 256, 3)
+        projected = values[hsv[..., 0], hsv[..., 1]].astype(np.float32)
+        projected = projected.reshape(step, levels, step, levels, step).mean(axis=(0, 2, 4))
+        lut[cell] = np.round(projected).astype(np.uint8)
+    return lut.ravel()
+
+# `key` is (user key, version): it changes whenever the user recalibrates,
+# so it can name the LUT wherever it is cached (e.g. SegmentationPool)
+Calibration = namedtuple('Calibration', ['hist', 'lut', 'key'])
+
+class HandCalibrations:
+    """Per-user hand histograms and their LUTs, held in a bounded LRU.
+
+    Calibrations are also written to `directory` so they survive restarts.
+    The directory is listed once at start-up, so get() never touches the
+    disk: users with no saved calibration are known misses, and a saved
+    one that is not in memory is loaded (and its LUT built) on a background
+    thread while get() returns None. With `preload`, the newest `max_users`
+    saved calibrations are loaded at start-up the same way.
+
+    Files are named by a hash of the user id, so distinct ids never share
+    a file, and only the `max_saved` most recently calibrated users are
+    kept on disk; older files are deleted as new users calibrate.
+    """
+
+    def __init__(self, max_users=256, directory=CALIBRATION_DIR, preload=True, max_saved=4096):
+        self.max_users = max_users
+        self.max_saved = max_saved
+        self.directory = Path(directory)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+        self._loading = set()
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='calibration-load')
+        try:
+            saved = sorted(self.directory.glob('*.npy'), key=lambda p: p.stat().st_mtime, reverse=True)
+        except OSError:
+            saved = []
+        for path in saved[max_saved:]:
+            self._unlink(path.stem)
+        saved = saved[:max_saved]
+        # Oldest first, so the cap expires from the front
+        self._saved = OrderedDict((path.stem, None) for path in reversed(saved))
+        if preload:
+            for path in saved[:max_users]:
+                self._schedule_load(path.stem)
+
+    def owner(self, user_id):
+        """The user's key: the first half of Calibration.key and the file name stem."""
+        return hashlib.sha256(str(user_id).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f'{key}.npy'
+
+    def _unlink(self, key):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete calibration {self._path(key)}: {str(e)}")
+
+    def _remember(self, key, hist, lut):
+        entry = Calibration(hist, lut, (key, next(self._versions)))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _schedule_load(self, key):
+        """Queue a disk load unless one is already queued; caller need not hold the lock."""
+        with self._lock:
+            if key in self._loading:
+                return
+            self._loading.add(key)
+        self._loader.submit(self._load, key)
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            hist = np.load(path)
+            lut = build_backprojection_lut(hist)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load calibration {path}: {str(e)}")
+            with self._lock:
+                self._saved.pop(key, None)
+                self._loading.discard(key)
+            return
+        with self._lock:
+            # A calibrate() or clear() that ran meanwhile wins
+            if key in self._loading and key in self._saved and key not in self._entries:
+                self._remember(key, hist, lut)
+            self._loading.discard(key)
+
+    def calibrate(self, user_id, frames, region=None):
+        key = self.owner(user_id)
+        hist = compute_hand_hist(frames, region)
+        lut = build_backprojection_lut(hist)
+        with self._lock:
+            entry = self._remember(key, hist, lut)
+            self._saved[key] = None
+            self._saved.move_to_end(key)
+            self._loading.discard(key)
+            expired = []
+            while len(self._saved) > self.max_saved:
+                expired.append(self._saved.popitem(last=False)[0])
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            np.save(self._path(key), hist)
+        except OSError as e:
+            logger.warning(f"Could not persist calibration for {user_id}: {str(e)}")
+        # Expired users keep their in-memory entry until the LRU drops it
+        for old in expired:
+            self._unlink(old)
+        return entry
+
+    def get(self, user_id):
+        """Return the user's Calibration, or None if there is none in memory yet."""
+        key = self.owner(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            if key not in self._saved:
+                return None
+        # Saved but evicted (or still preloading): load it off the request path
+        self._schedule_load(key)
+        return None
+
+    def is_calibrated(self, user_id):
+        """Whether the user has a calibration, in memory or saved."""
+        key = self.owner(user_id)
+        with self._lock:
+            return key in self._entries or key in self._saved
+
+    def clear(self, user_id):
+        key = self.owner(user_id)
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None or key in self._saved
+            self._saved.pop(key, None)
+            self._loading.discard(key)
+        self._unlink(key)
+        return removed
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Two-stage inference: a cheap model answers every frame, and only frames it
+# is unsure about go on to the full model. The gate (top-1 confidence or
+# top-1/top-2 margin) and its threshold come from train/cascade_threshold.py.
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'model' / 'emotion_cascade.json'
+GATE_METRICS = ('confidence', 'margin')
+STAGES = ('fast', 'full')
+
+def gate_scores(probs, metric='margin'):
+    """Per-row confidence (top-1 probability) or margin (top-1 minus top-2)."""
+    probs = np.asarray(probs, dtype=np.float32)
+    if metric == 'confidence':
+        return probs.max(axis=-1)
+    if metric == 'margin':
+        top2 = np.partition(probs, -2, axis=-1)[..., -2:]
+        return top2[..., 1] - top2[..., 0]
+    raise ValueError(f"Unknown gate metric '{metric}' (expected one of {GATE_METRICS})")
+
+def load_config(path=None):
+    """{'metric', 'threshold', ...} as written by cascade_threshold.py."""
+    path = Path(path or os.environ.get('EMOTION_CASCADE_CONFIG') or DEFAULT_CONFIG_PATH)
+    with open(path) as f:
+        config = json.load(f)
+    if config.get('metric') not in GATE_METRICS:
+        raise ValueError(f"{path}: unknown gate metric {config.get('metric')!r}")
+    return config
+
+class Cascade:
+    """predict() that escalates low-confidence frames from `fast` to `full`.
+
+    `fast` and `full` take a preprocessed batch and return probabilities.
+    Rows whose gate score is below `threshold` are re-run on `full`; the
+    rest keep the fast answer. Per-stage counts and time are kept for
+    /health.
+    """
+
+    def __init__(self, fast, full, metric='margin', threshold=0.5):
+        if metric not in GATE_METRICS:
+            raise ValueError(f"Unknown gate metric '{metric}' (expected one of {GATE_METRICS})")
+        self.fast = fast
+        self.full = full
+        self.metric = metric
+        self.threshold = float(threshold)
+        self._lock = threading.Lock()
+        self._frames = {stage: 0 for stage in STAGES}
+        self._stage_ms = {stage: 0.0 for stage in STAGES}
+        self._calls = {stage: 0 for stage in STAGES}
+
+    @classmethod
+    def from_config(cls, fast, full, config):
+        return cls(fast, full, config['metric'], config['threshold'])
+
+    def _record(self, stage, frames, elapsed_ms):
+        with self._lock:
+            self._frames[stage] += frames
+            self._stage_ms[stage] += elapsed_ms
+            self._calls[stage] += 1
+
+    def predict(self, batch):
+        """(probabilities, stages): stages[i] is 'fast' or 'full' for row i."""
+        started = time.perf_counter()
+        probs = np.array(self.fast(batch), dtype=np.float32)
+        fast_ms = (time.perf_counter() - started) * 1000
+        escalate = gate_scores(probs, self.metric) < self.threshold
+        self._record('fast', int((~escalate).sum()), fast_ms)
+        if escalate.any():
+            started = time.perf_counter()
+            probs[escalate] = self.full(batch[escalate])
+            self._record('full', int(escalate.sum()), (time.perf_counter() - started) * 1000)
+        return probs, np.where(escalate, 'full', 'fast').tolist()
+
+    def stats(self):
+        with self._lock:
+            frames = sum(self._frames.values())
+            calls = dict(self._calls)
+            stage_ms = dict(self._stage_ms)
+            answered = dict(self._frames)
+        return {
+            'metric': self.metric,
+            'threshold': self.threshold,
+            'frames': frames,
+            'answered_by': answered,
+            'escalation_rate': round(answered['full'] / frames, 4) if frames else None,
+            'stage_ms_mean': {s: round(stage_ms[s] / calls[s], 3) if calls[s] else None for s in STAGES},
+            'cost_ms_per_frame': round(sum(stage_ms.values()) / frames, 3) if frames else None
+        }
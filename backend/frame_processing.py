@@ -0,0 +1,275 @@
+import base64
+import logging
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fixed hand region used by the Sign-Language scripts (create_gestures.py,
+# final.py). Those scripts mirror the webcam frame (cv2.flip(img, 1)) before
+# cropping, so the box is in mirrored coordinates; uploads are not mirrored,
+# see mirror_roi and crop_hand.
+HAND_ROI = (300, 100, 300, 300)
+GESTURE_IMAGE_SIZE = (50, 50)
+EMOTION_TARGET_SIZE = (256, 256)
+LUT_BITS = 6  # Bits per BGR channel in hand back-projection LUTs (256K entries)
+# Largest upload accepted, inline or through a worker pool (whose ring slots
+# are sized from these)
+MAX_FRAME_BYTES = 2 << 20
+MAX_FRAME_SHAPE = (720, 1280, 3)
+
+def decode_base64_bytes(base64_string):
+    """Strip an optional data URL prefix and return the encoded image bytes."""
+    if 'base64,' in base64_string:
+        base64_string = base64_string.split('base64,')[1]
+    return base64.b64decode(base64_string)
+
+# imdecode flags per (scale, grayscale); JPEG scales down in the DCT domain
+REDUCED_DECODE_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+# A reduced decode may come out this much smaller than the target before it
+# is resized up (640x480 at 1/2 is 240 rows for a 256-row input)
+DECODE_MIN_COVERAGE = 0.9
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def jpeg_dimensions(data):
+    """(width, height) from a JPEG's frame header without decoding, or None."""
+    data = memoryview(data)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + length
+    return None
+
+def decode_scale(size, target_size, min_coverage=DECODE_MIN_COVERAGE):
+    """Largest of 8, 4, 2 that keeps a (w, h) image covering `target_size`, else 1."""
+    width, height = size
+    target_w, target_h = target_size
+    for scale in (8, 4, 2):
+        if width / scale >= target_w * min_coverage and height / scale >= target_h * min_coverage:
+            return scale
+    return 1
+
+def check_frame_shape(shape, max_shape=MAX_FRAME_SHAPE):
+    """Raise ValueError if a (height, width, ...) frame has more pixels than `max_shape`."""
+    height, width = shape[:2]
+    if height * width > max_shape[0] * max_shape[1]:
+        raise ValueError(f"Frame is {width}x{height}, larger than {max_shape[1]}x{max_shape[0]}")
+
+def check_frame_bytes(img_bytes, max_bytes=MAX_FRAME_BYTES, max_shape=MAX_FRAME_SHAPE):
+    """Reject an encoded upload before decoding it; raises ValueError.
+
+    Checks the byte count and, for JPEGs, the dimensions in the header, so
+    an oversized frame is never decoded.
+    """
+    if len(img_bytes) > max_bytes:
+        raise ValueError(f"Encoded frame is larger than {max_bytes} bytes")
+    size = jpeg_dimensions(img_bytes)
+    if size is not None:
+        check_frame_shape((size[1], size[0]), max_shape)
+
+def decode_image_bytes(img_bytes, target_size=None, grayscale=False):
+    """imdecode an encoded image, at reduced scale when it only feeds `target_size`.
+
+    With a (width, height) target, JPEGs are decoded at 1/2, 1/4 or 1/8
+    scale when that still covers the target, so the IDCT and the resize
+    that follows touch fewer pixels. `grayscale` decodes straight to one
+    channel. Raises ValueError if the data cannot be decoded.
+    """
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    scale = 1
+    if target_size is not None:
+        size = jpeg_dimensions(nparr)
+        if size is not None:
+            scale = decode_scale(size, target_size)
+    img = cv2.imdecode(nparr, REDUCED_DECODE_FLAGS[(scale, bool(grayscale))])
+    if img is None:
+        raise ValueError("Failed to decode image")
+    return img
+
+def decode_base64_image(base64_string, target_size=None, grayscale=False):
+    """Decode base64 image data to numpy array.
+
+    Pass the model input `target_size` (and `grayscale`) when the frame is
+    only going to be shrunk to it; see decode_image_bytes.
+    """
+    try:
+        # Decode base64 string
+        img_bytes = decode_base64_bytes(base64_string)
+        logger.info(f"Decoded base64 string, length: {len(img_bytes)} bytes")
+
+        # Decode image
+        img = decode_image_bytes(img_bytes, target_size, grayscale)
+
+        logger.info(f"Successfully decoded image, shape: {img.shape}")
+        return img
+    except Exception as e:
+        logger.error(f"Error decoding base64 image: {str(e)}")
+        raise
+
+def decode_upload(base64_string):
+    """Decode a client frame within the MAX_FRAME_* limits; raises ValueError.
+
+    The same limits apply to frames that go through a worker pool instead
+    (see SegmentationPool.process).
+    """
+    img_bytes = decode_base64_bytes(base64_string)
+    check_frame_bytes(img_bytes)
+    img = decode_image_bytes(img_bytes)
+    check_frame_shape(img.shape)
+    return img
+
+def clamp_roi(roi, shape):
+    """Clip an (x, y, w, h) box to an image of `shape`; None if nothing is left."""
+    x, y, w, h = (int(v) for v in roi)
+    height, width = shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+def crop_to_roi(img, roi):
+    """View of `img` restricted to `roi` (no copy); the full image if the box is empty."""
+    box = clamp_roi(roi, img.shape)
+    if box is None:
+        return img
+    x, y, w, h = box
+    return img[y:y+h, x:x+w]
+
+def mirror_roi(roi, width):
+    """The box `roi` covers once a `width`-pixel-wide frame is flipped horizontally."""
+    x, y, w, h = (int(v) for v in roi)
+    return width - x - w, y, w, h
+
+def crop_hand(img, roi=HAND_ROI):
+    """Hand box of an unmirrored frame, flipped to match the training masks.
+
+    `roi` is in the mirrored coordinates of final.py, so it is mirrored onto
+    `img` (HAND_ROI starts at x=40 in a 640-pixel frame) and the crop is
+    flipped. roi=None flips the whole image, for uploads already cropped to
+    the hand box.
+    """
+    if roi is not None:
+        img = crop_to_roi(img, mirror_roi(roi, img.shape[1]))
+    return cv2.flip(img, 1)
+
+def parse_roi(value):
+    """Accept [x, y, w, h] or {'x', 'y', 'w', 'h'}; raises ValueError otherwise."""
+    if isinstance(value, dict):
+        value = [value.get(k) for k in ('x', 'y', 'w', 'h')]
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        raise ValueError("ROI must be [x, y, w, h]")
+    x, y, w, h = (int(v) for v in value)
+    if w <= 0 or h <= 0 or x < 0 or y < 0:
+        raise ValueError("ROI must have a non-negative origin and positive size")
+    return x, y, w, h
+
+class SessionROIs:
+    """Bounded per-session map of hand ROIs that the server crops frames to."""
+
+    def __init__(self, max_sessions=1024):
+        self.max_sessions = max_sessions
+        self._rois = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            roi = self._rois.get(session_id)
+            if roi is not None:
+                self._rois.move_to_end(session_id)
+            return roi
+
+    def set(self, session_id, roi):
+        with self._lock:
+            self._rois[session_id] = roi
+            self._rois.move_to_end(session_id)
+            while len(self._rois) > self.max_sessions:
+                self._rois.popitem(last=False)
+
+    def clear(self, session_id):
+        with self._lock:
+            return self._rois.pop(session_id, None) is not None
+
+def preprocess_emotion_frame(img, target_size=EMOTION_TARGET_SIZE):
+    """Resize a BGR frame and turn it into a normalized RGB batch of one."""
+    resized = cv2.resize(img, target_size)
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    normalized = rgb.astype(np.float32) / 255.0
+    return np.expand_dims(normalized, axis=0)
+
+def threshold_backprojection(dst):
+    """Smooth a back-projection and Otsu-threshold it into a binary hand mask."""
+    disc = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (10, 10))
+    cv2.filter2D(dst, -1, disc, dst)
+    blur = cv2.GaussianBlur(dst, (11, 11), 0)
+    blur = cv2.medianBlur(blur, 15)
+    return cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+def segment_hand(img, hist, roi=HAND_ROI):
+    """Histogram back-projection segmentation, as done in final.py.
+
+    The frame is cropped to `roi` first (see crop_hand), so filtering and
+    thresholding only touch the hand box; pass roi=None for an
+    already-cropped upload. Returns the thresholded single-channel mask,
+    mirrored like the masks the gesture CNN was trained on.
+    """
+    img = crop_hand(img, roi)
+    imgHSV = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    dst = cv2.calcBackProject([imgHSV], [0, 1], hist, [0, 180, 0, 256], 1)
+    return threshold_backprojection(dst)
+
+def segment_hand_lut(img, lut, roi=HAND_ROI, bits=LUT_BITS):
+    """Same as segment_hand, but back-projects with a precomputed BGR lookup table.
+
+    See backend.calibration.build_backprojection_lut; the HSV conversion
+    and histogram lookup collapse into one vectorized table index.
+    """
+    img = crop_hand(img, roi)
+    shift = 8 - bits
+    q = img >> shift
+    idx = (q[..., 0].astype(np.int32) << (2 * bits)) | (q[..., 1].astype(np.int32) << bits) | q[..., 2]
+    dst = np.take(lut, idx)
+    return threshold_backprojection(dst)
+
+def extract_gesture_input(thresh, image_size=GESTURE_IMAGE_SIZE, min_area=5000):
+    """Crop the largest contour from a mask into a (1, x, y, 1) CNN input.
+
+    Returns None when no contour is large enough to be a hand.
+    """
+    contours = cv2.findContours(thresh.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2]
+    if len(contours) == 0:
+        return None
+    contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(contour) <= min_area:
+        return None
+    x1, y1, w1, h1 = cv2.boundingRect(contour)
+    save_img = thresh[y1:y1+h1, x1:x1+w1]
+    if w1 > h1:
+        save_img = cv2.copyMakeBorder(save_img, int((w1-h1)/2), int((w1-h1)/2), 0, 0, cv2.BORDER_CONSTANT, (0, 0, 0))
+    elif h1 > w1:
+        save_img = cv2.copyMakeBorder(save_img, 0, 0, int((h1-w1)/2), int((h1-w1)/2), cv2.BORDER_CONSTANT, (0, 0, 0))
+    save_img = cv2.resize(save_img, image_size)
+    return np.reshape(save_img, (1, image_size[0], image_size[1], 1))
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SLOT_ALIGNMENT = 64  # Keep every field cache-line aligned
+
+class SlotLease:
+    """One acquired ring slot; release() (or leaving the with block) recycles it.
+
+    detach() hands the slot to someone else (e.g. a worker still writing to
+    it), after which release() is a no-op and the new owner must call
+    FrameRing.release(slot) itself.
+    """
+
+    def __init__(self, ring, slot):
+        self.ring = ring
+        self.slot = slot
+        self._held = True
+
+    def view(self, field, shape=None):
+        return self.ring.view(self.slot, field, shape)
+
+    def detach(self):
+        self._held = False
+        return self.slot
+
+    def release(self):
+        if self._held:
+            self._held = False
+            self.ring.release(self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class FrameRing:
+    """A fixed ring of preallocated frame slots in one shared-memory block.
+
+    Every slot holds the same `fields` ({name: (shape, dtype)}), so the HTTP
+    process can decode or resize a frame straight into a slot and a worker
+    process that attached by name reads it without a copy. Only the process
+    that created the ring hands slots out: acquire() takes the oldest free
+    slot, release() puts it back, and occupancy is counted along the way.
+    """
+
+    def __init__(self, fields, slots, name=None):
+        self.fields = {key: (tuple(int(d) for d in shape), np.dtype(dtype).str) for key, (shape, dtype) in fields.items()}
+        self.slots = int(slots)
+        self._offsets = {}
+        offset = 0
+        for key, (shape, dtype) in self.fields.items():
+            self._offsets[key] = offset
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            offset += -(-nbytes // SLOT_ALIGNMENT) * SLOT_ALIGNMENT
+        self.slot_size = offset
+
+        self.owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self.slot_size * self.slots if self.owner else 0)
+        self.name = self._shm.name
+
+        self._cond = threading.Condition()
+        self._free = deque(range(self.slots)) if self.owner else deque()
+        self._acquired_at = {}
+        self._peak = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._hold_total = 0.0
+        self._hold_max = 0.0
+
+    @classmethod
+    def attach(cls, spec):
+        """Open a ring created elsewhere from its spec() (worker side)."""
+        return cls(spec['fields'], spec['slots'], name=spec['name'])
+
+    def spec(self):
+        """Picklable description for attach() in another process."""
+        return {'name': self.name, 'fields': self.fields, 'slots': self.slots}
+
+    def view(self, slot, field, shape=None):
+        """Array over `field` of `slot`; `shape` may be any size up to the field's capacity."""
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"Slot {slot} out of range")
+        capacity, dtype = self.fields[field]
+        shape = capacity if shape is None else tuple(int(d) for d in shape)
+        if int(np.prod(shape)) > int(np.prod(capacity)):
+            raise ValueError(f"Shape {shape} does not fit ring field '{field}' {capacity}")
+        offset = slot * self.slot_size + self._offsets[field]
+        return np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)
+
+    def acquire(self, timeout=None):
+        """Take a free slot, waiting up to `timeout` seconds; raises TimeoutError."""
+        if not self.owner:
+            raise RuntimeError("Only the process that created the ring can acquire slots")
+        with self._cond:
+            if not self._free:
+                self._waits += 1
+                if not self._cond.wait_for(lambda: self._free, timeout):
+                    self._timeouts += 1
+                    raise TimeoutError("No free frame slot")
+            slot = self._free.popleft()
+            self._acquired += 1
+            self._acquired_at[slot] = time.perf_counter()
+            self._peak = max(self._peak, self.slots - len(self._free))
+        return SlotLease(self, slot)
+
+    def release(self, slot):
+        with self._cond:
+            started = self._acquired_at.pop(slot, None)
+            if started is None:
+                raise ValueError(f"Slot {slot} released twice")
+            held = time.perf_counter() - started
+            self._hold_total += held
+            self._hold_max = max(self._hold_max, held)
+            self._free.append(slot)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            in_use = self.slots - len(self._free)
+            released = self._acquired - len(self._acquired_at)
+            return {
+                'slots': self.slots,
+                'slot_bytes': self.slot_size,
+                'in_use': in_use,
+                'occupancy': round(in_use / self.slots, 3),
+                'peak_in_use': self._peak,
+                'acquired': self._acquired,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'avg_hold_ms': round(self._hold_total / released * 1000, 2) if released else None,
+                'max_hold_ms': round(self._hold_max * 1000, 2)
+            }
+
+    def close(self):
+        """Drop the mapping (and the block itself, if this process created it)."""
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views are still alive somewhere; the mapping goes when they do
+            logger.warning(f"Frame ring {self.name} closed with live views")
+        if self.owner:
+            self._shm.unlink()
@@ -0,0 +1,214 @@
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+class ModelHandle:
+    """One loaded model version plus the number of requests currently using it."""
+
+    def __init__(self, model, version, source, load_ms, warmup_ms, requested=None):
+        self.model = model
+        self.version = version
+        self.requested = requested
+        self.source = source
+        self.load_ms = load_ms
+        self.warmup_ms = warmup_ms
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.in_flight = 0
+        self.retired = False
+
+    def info(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'load_ms': self.load_ms,
+            'warmup_ms': self.warmup_ms
+        }
+
+class ModelSlot:
+    """The serving model for one name, replaceable without restarting.
+
+    `loader(version)` returns (model, source, resolved_version) for a
+    version (None for the default) and `warmup(model)` runs a dummy prediction. reload() does both
+    on a background thread while requests keep using the current model, then
+    swaps the new one in under a lock, so every request sees exactly one
+    version. Requests already running on the old model finish on it; its
+    memory is dropped when the last one leaves.
+    """
+
+    def __init__(self, name, loader, warmup=None):
+        self.name = name
+        self._loader = loader
+        self._warmup = warmup
+        self._lock = threading.Lock()
+        self._current = None
+        self._draining = []
+        self._loading = None
+        self._last_error = None
+        self._swaps = 0
+
+    @property
+    def ready(self):
+        return self._current is not None
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    @property
+    def requested_version(self):
+        """The version argument the current model was loaded with (None: default)."""
+        current = self._current
+        return current.requested if current is not None else None
+
+    @property
+    def source(self):
+        current = self._current
+        return current.source if current is not None else None
+
+    def _load(self, requested):
+        started = time.perf_counter()
+        model, source, version = self._loader(requested)
+        load_ms = round((time.perf_counter() - started) * 1000, 1)
+        started = time.perf_counter()
+        if self._warmup is not None:
+            self._warmup(model)
+        warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        return ModelHandle(model, version, source, load_ms, warmup_ms, requested)
+
+    def load(self, version=None):
+        """Load synchronously (start-up); raises if the loader fails."""
+        handle = self._load(version)
+        self._swap(handle)
+        return handle.info()
+
+    def _swap(self, handle):
+        with self._lock:
+            old, self._current = self._current, handle
+            if old is not None:
+                old.retired = True
+                self._draining.append(old)
+            self._swaps += 1
+        logger.info(f"{self.name}: serving version {handle.version or 'default'} "
+                    f"(load {handle.load_ms} ms, warm-up {handle.warmup_ms} ms)")
+        if old is not None:
+            self._release_idle()
+
+    def _release_idle(self):
+        with self._lock:
+            idle = [h for h in self._draining if h.in_flight == 0]
+            self._draining = [h for h in self._draining if h.in_flight > 0]
+        for handle in idle:
+            handle.model = None
+            logger.info(f"{self.name}: released version {handle.version or 'default'}")
+        if idle:
+            gc.collect()
+
+    def reload(self, version=None):
+        """Start loading `version` in the background; False if a load is already running."""
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = {'version': version, 'started': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+
+        def run():
+            error = None
+            try:
+                handle = self._load(version)
+            except Exception as e:
+                logger.error(f"{self.name}: loading version {version or 'default'} failed, keeping the current model: {str(e)}")
+                error = {'version': version, 'error': str(e)}
+            else:
+                self._swap(handle)
+            finally:
+                with self._lock:
+                    self._last_error = error
+                    self._loading = None
+
+        threading.Thread(target=run, name=f'{self.name}-reload', daemon=True).start()
+        return True
+
+    @contextmanager
+    def use(self):
+        """The current model, held for the duration of one request."""
+        with self._lock:
+            handle = self._current
+            if handle is None:
+                raise RuntimeError(f"No {self.name} model loaded")
+            handle.in_flight += 1
+        try:
+            yield handle.model
+        finally:
+            with self._lock:
+                handle.in_flight -= 1
+                drained = handle.retired and handle.in_flight == 0
+            if drained:
+                self._release_idle()
+
+    def status(self):
+        with self._lock:
+            current = self._current
+            return {
+                'current': current.info() if current is not None else None,
+                'in_flight': current.in_flight if current is not None else 0,
+                'draining': [{'version': h.version, 'in_flight': h.in_flight} for h in self._draining],
+                'loading': dict(self._loading) if self._loading else None,
+                'last_error': self._last_error,
+                'swaps': self._swaps
+            }
+
+class FileWatcher:
+    """Calls `callback()` once any of `paths()` has a new mtime that held for one poll."""
+
+    def __init__(self, paths, callback, interval=5.0):
+        self._paths = paths
+        self._callback = callback
+        self.interval = interval
+        self._stop = threading.Event()
+        self._mtimes = self._snapshot()
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, name='model-watch', daemon=True)
+        self._thread.start()
+
+    def _snapshot(self):
+        mtimes = {}
+        for path in self._paths():
+            try:
+                mtimes[str(path)] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[str(path)] = None
+        return mtimes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            mtimes = self._snapshot()
+            if set(mtimes) != set(self._mtimes):
+                # A different file is being served now (e.g. another version)
+                self._mtimes, self._pending = mtimes, None
+            elif mtimes == self._mtimes:
+                self._pending = None
+            elif mtimes != self._pending:
+                # Changed since the last poll: wait until it stops changing
+                # so a half-copied file is not loaded
+                self._pending = mtimes
+            else:
+                self._mtimes, self._pending = mtimes, None
+                logger.info(f"Model file changed: {', '.join(mtimes)}")
+                self._callback()
+
+    def stop(self):
+        self._stop.set()
+
+def admin_allowed(request):
+    """ADMIN_TOKEN (X-Admin-Token header) when set, otherwise loopback callers only."""
+    token = os.environ.get('ADMIN_TOKEN')
+    if token:
+        return request.headers.get('X-Admin-Token') == token
+    return request.remote_addr in ('127.0.0.1', '::1')
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by the BLAS/OpenMP runtimes NumPy and TF link against
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+def available_cores():
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+
+class ResourceConfig:
+    """One place for every thread budget in a serving process.
+
+    workers       concurrent model calls (the executor's thread pool)
+    intra_op      TF threads inside one op; workers * intra_op ~= cores
+    inter_op      TF ops run in parallel within one call
+    cv_threads    cv2.setNumThreads; request threads already run in parallel
+    blas_threads  OpenMP/BLAS threads for NumPy
+    """
+
+    FIELDS = ('workers', 'intra_op', 'inter_op', 'cv_threads', 'blas_threads')
+
+    def __init__(self, workers=None, intra_op=None, inter_op=1, cv_threads=1, blas_threads=1):
+        cores = available_cores()
+        self.workers = int(workers or min(2, cores))
+        self.intra_op = int(intra_op or max(1, cores // self.workers))
+        self.inter_op = int(inter_op)
+        self.cv_threads = int(cv_threads)
+        self.blas_threads = int(blas_threads)
+
+    @classmethod
+    def from_env(cls):
+        """INFERENCE_CONFIG (a JSON file) first, then INFERENCE_<FIELD> variables on top."""
+        values = {}
+        path = os.environ.get('INFERENCE_CONFIG')
+        if path:
+            with open(path) as f:
+                values.update({k: v for k, v in json.load(f).items() if k in cls.FIELDS})
+        for field in cls.FIELDS:
+            env = os.environ.get(f'INFERENCE_{field.upper()}')
+            if env:
+                values[field] = int(env)
+        return cls(**values)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"ResourceConfig({', '.join(f'{k}={v}' for k, v in self.to_dict().items())})"
+
+def apply_thread_budget(config):
+    """Apply `config` to TF, OpenCV and BLAS in this process.
+
+    TF only accepts thread counts before its runtime starts, so call this
+    before the first model is loaded. BLAS pools that are already running
+    are resized through threadpoolctl when it is installed; otherwise the
+    environment variables only affect libraries loaded later.
+    """
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(config.blas_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(config.blas_threads)
+    except ImportError:
+        pass
+
+    cv2.setNumThreads(config.cv_threads)
+
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(config.intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(config.inter_op)
+    except ImportError:
+        pass
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow already initialised, thread budget not applied: {str(e)}")
+    logger.info(f"Applied thread budget {config}")
+
+class _Entry:
+    def __init__(self, fn, concurrency):
+        self.fn = fn
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+
+class InferenceExecutor:
+    """Owns the served models and runs every call on a sized thread pool.
+
+    Request threads hand calls to run(), which queues them for one of
+    `config.workers` inference threads, so no more than that many model
+    calls execute at once however many requests are in flight. Each model
+    also has its own `concurrency` limit: 1 serialises objects that are
+    not known to be thread-safe, higher values let several workers share
+    a model whose forward pass is (e.g. a warmed-up Keras model).
+    """
+
+    def __init__(self, config=None, apply_budget=True):
+        self.config = config or ResourceConfig.from_env()
+        if apply_budget:
+            apply_thread_budget(self.config)
+        self._pool = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix='inference')
+        self._models = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def register(self, name, fn, concurrency=1, warmup=None):
+        """Serve `fn(*args)` as `name`; `warmup` args are run once up front.
+
+        Keras builds its predict function lazily on the first call, which
+        races when two threads get there together, so warm up before
+        allowing concurrency > 1.
+        """
+        if warmup is not None:
+            fn(*warmup)
+        self._models[name] = _Entry(fn, max(1, min(int(concurrency), self.config.workers)))
+        logger.info(f"Registered '{name}' for inference (concurrency {self._models[name].concurrency})")
+
+    def __contains__(self, name):
+        return name in self._models
+
+    def concurrency(self, name):
+        """How many calls to `name` can run at once."""
+        return self._models[name].concurrency
+
+    def _invoke(self, entry, queued_at, args):
+        with entry.slots:
+            acquired = time.perf_counter()
+            try:
+                return entry.fn(*args)
+            except Exception:
+                with entry.lock:
+                    entry.errors += 1
+                raise
+            finally:
+                finished = time.perf_counter()
+                with entry.lock:
+                    entry.calls += 1
+                    entry.busy_s += finished - acquired
+                    entry.wait_s += acquired - queued_at
+                with self._lock:
+                    self._pending -= 1
+
+    def submit(self, name, *args):
+        """Queue a call and return its Future."""
+        entry = self._models[name]
+        with self._lock:
+            self._pending += 1
+        return self._pool.submit(self._invoke, entry, time.perf_counter(), args)
+
+    def run(self, name, *args, timeout=None):
+        """Call model `name` on an inference thread and wait for the result."""
+        return self.submit(name, *args).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+        models = {}
+        for name, entry in self._models.items():
+            with entry.lock:
+                models[name] = {
+                    'calls': entry.calls,
+                    'errors': entry.errors,
+                    'concurrency': entry.concurrency,
+                    'avg_run_ms': round(entry.busy_s / entry.calls * 1000, 2) if entry.calls else None,
+                    'avg_wait_ms': round(entry.wait_s / entry.calls * 1000, 2) if entry.calls else None
+                }
+        return {'config': self.config.to_dict(), 'pending': pending, 'models': models}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
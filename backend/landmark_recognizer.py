@@ -0,0 +1,108 @@
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Alternative to the HSV back-projection + 50x50 mask CNN: MediaPipe finds the
+# 21 hand landmarks and a small classifier (trained by
+# Sign-Language/Code/train_landmarks.py) labels the normalised coordinates.
+
+NUM_LANDMARKS = 21
+FEATURE_SIZE = NUM_LANDMARKS * 3
+FEATURE_VERSION = 'landmarks-v1'
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent.parent / 'model' / 'gesture_landmarks.pkl'
+
+def normalize_landmarks(points, image_size, handedness=None):
+    """(21, 3) MediaPipe landmarks -> a 63-value vector independent of position, scale and hand.
+
+    x/y are converted to pixels first so the aspect ratio does not distort
+    the shape, then centred on the wrist and scaled so the furthest landmark
+    is at distance 1. Left hands are mirrored onto right hands, matching the
+    random flips in the mask dataset.
+    """
+    width, height = image_size
+    points = np.asarray(points, dtype=np.float32).reshape(NUM_LANDMARKS, 3) * np.float32([width, height, width])
+    points -= points[0]
+    if handedness == 'Left':
+        points[:, 0] = -points[:, 0]
+    scale = float(np.linalg.norm(points[:, :2], axis=1).max())
+    if scale > 0:
+        points /= scale
+    return points.ravel()
+
+class HandLandmarkExtractor:
+    """MediaPipe Hands over BGR frames, returning normalised feature vectors.
+
+    Runs in static-image mode because the server interleaves frames from
+    many sessions, so there is no single stream to track. The MediaPipe
+    graph is not thread-safe; calls are serialised.
+    """
+
+    def __init__(self, min_detection_confidence=0.5, model_complexity=0):
+        import mediapipe as mp
+        self._hands = mp.solutions.hands.Hands(
+            static_image_mode=True, max_num_hands=1,
+            model_complexity=model_complexity, min_detection_confidence=min_detection_confidence
+        )
+        self._lock = threading.Lock()
+
+    def extract(self, img):
+        """Feature vector for the most confident hand in `img`, or None."""
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            result = self._hands.process(rgb)
+        if not result.multi_hand_landmarks:
+            return None
+        landmarks = result.multi_hand_landmarks[0].landmark
+        handedness = result.multi_handedness[0].classification[0].label if result.multi_handedness else None
+        points = [(p.x, p.y, p.z) for p in landmarks]
+        return normalize_landmarks(points, (img.shape[1], img.shape[0]), handedness)
+
+    def close(self):
+        self._hands.close()
+
+def load_classifier(path=DEFAULT_MODEL_PATH):
+    """The pickled {'classifier', 'labels' (g_id -> name), 'feature_version'} bundle from train_landmarks.py."""
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+    if bundle.get('feature_version') != FEATURE_VERSION:
+        raise ValueError(f"{path} was trained on {bundle.get('feature_version')} features, expected {FEATURE_VERSION}")
+    return bundle
+
+class LandmarkGestureRecognizer:
+    """Drop-in for GestureRecognizer.detect_gestures using hand landmarks.
+
+    Returns up to `top_k` {'gesture', 'confidence'} dicts above
+    `min_confidence`, or an empty list when no hand is found.
+    """
+
+    def __init__(self, model_path=None, top_k=3, min_confidence=0.1, extractor=None):
+        model_path = model_path or os.environ.get('GESTURE_LANDMARK_MODEL') or DEFAULT_MODEL_PATH
+        bundle = load_classifier(model_path)
+        self.classifier = bundle['classifier']
+        self.labels = dict(bundle['labels'])
+        self.top_k = top_k
+        self.min_confidence = min_confidence
+        self.extractor = extractor or HandLandmarkExtractor()
+        logger.info(f"Loaded landmark gesture classifier from {model_path} ({len(self.labels)} gestures)")
+
+    def classify(self, features):
+        """Class probabilities for one feature vector."""
+        return self.classifier.predict_proba(np.asarray(features, np.float32).reshape(1, -1))[0]
+
+    def detect_gestures(self, img):
+        features = self.extractor.extract(img)
+        if features is None:
+            return []
+        probs = self.classify(features)
+        best = np.argsort(probs)[::-1][:self.top_k]
+        return [
+            {'gesture': self.labels.get(int(self.classifier.classes_[i]), str(self.classifier.classes_[i])),
+             'confidence': float(probs[i])}
+            for i in best if probs[i] >= self.min_confidence
+        ]
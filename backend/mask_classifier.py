@@ -0,0 +1,47 @@
+import logging
+import os
+import sys
+from pathlib import Path
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / 'Sign-Language' / 'Code'))
+from gesture_db import GestureLabels
+
+logger = logging.getLogger(__name__)
+
+# The Sign-Language CNN (cnn_model_train.py) classifies the 50x50 binary hand
+# masks that create_gestures.py saved, so it only works on frames segmented
+# with the user's hand histogram -- i.e. calibrated users.
+GESTURE_DB_PATH = PROJECT_ROOT / 'gesture_db.db'
+
+class MaskGestureClassifier:
+    """Labels (1, 50, 50, 1) hand masks from extract_gesture_input, as final.py does.
+
+    The mask goes to the model unscaled (0/255), like the training images.
+    Returns up to `top_k` {'gesture', 'confidence'} dicts above
+    `min_confidence`, named through the gesture table.
+    """
+
+    def __init__(self, model, labels, top_k=3, min_confidence=0.1):
+        self.model = model
+        self.labels = labels
+        self.top_k = top_k
+        self.min_confidence = min_confidence
+
+    def classify(self, gesture_input):
+        probs = self.model.predict(np.asarray(gesture_input, dtype=np.float32), verbose=0)[0]
+        best = [int(i) for i in np.argsort(probs)[::-1][:self.top_k] if probs[i] >= self.min_confidence]
+        return [
+            {'gesture': name, 'confidence': float(probs[i])}
+            for i, name in zip(best, self.labels.names(best))
+        ]
+
+def load_mask_classifier(version=None):
+    """(classifier, source, version label) for a ModelSlot; the CNN comes from the model store."""
+    from backend import model_store
+    source, digest = model_store.get_store().resolve('gesture', version)
+    model = model_store.load_model('gesture', version)
+    labels = GestureLabels(str(os.environ.get('GESTURE_DB') or GESTURE_DB_PATH))
+    logger.info(f"Loaded gesture mask CNN from {source} ({len(labels)} gesture labels)")
+    return MaskGestureClassifier(model, labels), str(source), f"{version or 'latest'}@{digest[:12]}"
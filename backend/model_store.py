@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(os.environ.get('MODEL_CACHE_DIR', Path.home() / '.cache' / 'hci_project' / 'models'))
+
+# name -> version -> candidate source paths (relative to the project root).
+# Several copies of the same weights are listed together; they hash to the
+# same content id and are converted only once. `sha256` pins a version.
+REGISTRY = {
+    'emotion': {
+        'latest': 'v1',
+        'versions': {
+            'v1': {'paths': ['model/emotion_model.h5', 'model/model/emotion_model.h5']},
+            'meghansh': {'paths': ['model/emotion_model-Meghansh.h5']}
+        }
+    },
+    'emotion_student': {
+        'latest': 'v1',
+        'versions': {
+            'v1': {'paths': ['model/emotion_student.h5']}  # train/distill.py --teacher emotion
+        }
+    },
+    'yale': {
+        'latest': 'v1',
+        'versions': {
+            'v1': {'paths': ['model/yale_vgg19_model.h5']}
+        }
+    },
+    'gesture': {
+        'latest': 'v1',
+        'versions': {
+            'v1': {'paths': ['Sign-Language/Code/cnn_model_keras2.h5', 'model/sign_language_model_best.h5']}
+        }
+    }
+}
+
+LFS_POINTER_PREFIX = b'version https://git-lfs.github.com/spec/v1'
+
+# Cached artifact that marks each runtime as converted
+RUNTIME_ARTIFACTS = {
+    'keras': 'architecture.json',
+    'tflite': 'model.tflite',
+    'tflite-quant': 'model.quant.tflite'  # Dynamic-range int8 weights, float I/O
+}
+
+class ModelStoreError(Exception):
+    pass
+
+def sha256_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class TFLiteModel:
+    """Keras-like predict() over a TFLite interpreter.
+
+    The interpreter memory-maps the .tflite file rather than reading it onto
+    the heap, but kernels may still pack the weights into private buffers
+    (XNNPACK does for float models), so processes do not necessarily share
+    them. What it does save over Keras is the graph and variable overhead.
+    """
+
+    def __init__(self, path):
+        import tensorflow as tf
+        self.path = str(path)
+        self._interpreter = tf.lite.Interpreter(model_path=self.path)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._lock = threading.Lock()
+        self.input_shape = (None,) + tuple(int(d) for d in self._input['shape'][1:])
+        self.output_shape = (None,) + tuple(int(d) for d in self._output['shape'][1:])
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x)
+        with self._lock:
+            if tuple(self._input['shape']) != x.shape:
+                self._interpreter.resize_tensor_input(self._input['index'], x.shape)
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+                self._output = self._interpreter.get_output_details()[0]
+            self._interpreter.set_tensor(self._input['index'], self._quantize(x))
+            self._interpreter.invoke()
+            return self._dequantize(self._interpreter.get_tensor(self._output['index']))
+
+    def _quantize(self, x):
+        # Fully integer models take quantized input: q = x / scale + zero_point
+        dtype = np.dtype(self._input['dtype'])
+        scale, zero_point = self._input['quantization']
+        if dtype.kind in 'iu' and scale:
+            info = np.iinfo(dtype)
+            return np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(dtype)
+        return x.astype(dtype, copy=False)
+
+    def _dequantize(self, y):
+        scale, zero_point = self._output['quantization']
+        if np.dtype(self._output['dtype']).kind in 'iu' and scale:
+            return (y.astype(np.float32) - zero_point) * scale
+        return y.copy()
+
+    def __call__(self, x, training=False):
+        return self.predict(x)
+
+class ModelStore:
+    """Resolve model artifacts by name/version and load them from a content-addressed cache.
+
+    On first use an .h5 is verified by SHA-256 and converted into
+    cache_dir/<sha256>/: the architecture as JSON plus one .npy per weight
+    and, when requested, a .tflite flatbuffer. Later loads skip HDF5
+    parsing entirely; the Keras runtime still copies the weights into its
+    own variables, so every process holds its own copy.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, registry=REGISTRY, root=PROJECT_ROOT):
+        self.cache_dir = Path(cache_dir)
+        self.registry = registry
+        self.root = Path(root)
+        self._index_path = self.cache_dir / 'index.json'
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self._index_path)
+
+    def content_id(self, path):
+        """SHA-256 of a file, memoized by (path, size, mtime) so it is hashed once."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                index[key] = sha256_file(path)
+                self._save_index(index)
+            return index[key]
+
+    def resolve(self, name, version=None):
+        """Return (source_path, sha256) for a registered artifact."""
+        if name not in self.registry:
+            raise ModelStoreError(f"Unknown model '{name}'")
+        entry = self.registry[name]
+        version = version or entry['latest']
+        spec = entry['versions'].get(version)
+        if spec is None:
+            raise ModelStoreError(f"Unknown version '{version}' for model '{name}'")
+        for rel_path in spec['paths']:
+            path = self.root / rel_path
+            if not path.exists():
+                continue
+            with open(path, 'rb') as f:
+                if f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX:
+                    logger.warning(f"{path} is a Git LFS pointer; run `git lfs pull`")
+                    continue
+            digest = self.content_id(path)
+            expected = spec.get('sha256')
+            if expected and digest != expected:
+                raise ModelStoreError(f"{path} hash {digest} does not match pinned {expected}")
+            return path, digest
+        raise ModelStoreError(f"No usable file for {name}:{version} (tried {spec['paths']})")
+
+    def _convert(self, source, digest, runtime):
+        import tensorflow as tf
+        target = self.cache_dir / digest
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f'.{digest[:12]}-'))
+        try:
+            if target.exists():
+                for item in target.iterdir():
+                    shutil.copy2(item, staging / item.name)
+            model = tf.keras.models.load_model(source, compile=False)
+            if not (staging / 'architecture.json').exists():
+                (staging / 'architecture.json').write_text(model.to_json())
+                weights_dir = staging / 'weights'
+                weights_dir.mkdir()
+                for i, weight in enumerate(model.get_weights()):
+                    np.save(weights_dir / f'{i:04d}.npy', weight)
+            if runtime in ('tflite', 'tflite-quant') and not (staging / RUNTIME_ARTIFACTS[runtime]).exists():
+                converter = tf.lite.TFLiteConverter.from_keras_model(model)
+                if runtime == 'tflite-quant':
+                    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                (staging / RUNTIME_ARTIFACTS[runtime]).write_bytes(converter.convert())
+            (staging / 'source.txt').write_text(f"{source}\n{digest}\n")
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return target
+
+    def _is_converted(self, target, runtime):
+        return (target / RUNTIME_ARTIFACTS[runtime]).exists()
+
+    def load(self, name, version=None, runtime='keras'):
+        """Load a model by name; runtime is 'keras' (JSON + .npy weights), 'tflite' or 'tflite-quant'."""
+        if runtime not in RUNTIME_ARTIFACTS:
+            raise ModelStoreError(f"Unknown runtime '{runtime}' (expected one of {sorted(RUNTIME_ARTIFACTS)})")
+        source, digest = self.resolve(name, version)
+        target = self.cache_dir / digest
+        if not self._is_converted(target, runtime):
+            logger.info(f"Converting {source} into model cache ({digest[:12]})")
+            target = self._convert(source, digest, runtime)
+        if runtime != 'keras':
+            return TFLiteModel(target / RUNTIME_ARTIFACTS[runtime])
+
+        import tensorflow as tf
+        model = tf.keras.models.model_from_json((target / 'architecture.json').read_text())
+        weight_files = sorted((target / 'weights').glob('*.npy'))
+        # Mapped so set_weights reads straight from the file; the variables
+        # it fills are still private copies
+        model.set_weights([np.load(path, mmap_mode='r') for path in weight_files])
+        return model
+
+_default_store = None
+
+def get_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = ModelStore()
+    return _default_store
+
+def load_model(name, version=None, runtime=None):
+    """Load a registered model through the shared store (runtime from MODEL_RUNTIME)."""
+    runtime = runtime or os.environ.get('MODEL_RUNTIME', 'keras')
+    return get_store().load(name, version, runtime)
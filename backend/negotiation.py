@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+from backend.frame_processing import HAND_ROI, mirror_roi
+
+# Clients upload unmirrored camera frames, so the hand box they crop is
+# HAND_ROI mirrored onto the reference frame
+ROI_REFERENCE = (640, 480)
+
+# What each task needs from the client. `capture` is the smallest frame
+# worth uploading: the client crops/scales to it before JPEG encoding.
+TASK_REQUIREMENTS = {
+    'emotion': {
+        'model_input': [256, 256, 3],
+        'capture': {'width': 256, 'height': 256, 'crop': 'center-square'},
+        'jpeg_quality': 0.8
+    },
+    'gesture': {
+        'model_input': [50, 50, 1],
+        # Full frames by default. Only the hand box is used, so clients may
+        # opt in to uploading just `roi` (in the coordinates of a
+        # `reference`-sized frame) at `roi_capture` size, with `roi_only: true`
+        'capture': {'width': ROI_REFERENCE[0], 'height': ROI_REFERENCE[1], 'crop': 'none'},
+        'roi': dict(zip('xywh', mirror_roi(HAND_ROI, ROI_REFERENCE[0])), reference=list(ROI_REFERENCE)),
+        'roi_capture': {'width': HAND_ROI[2], 'height': HAND_ROI[3], 'crop': 'roi'},
+        'jpeg_quality': 0.6
+    }
+}
+
+MIN_FPS = 1.0
+MAX_FPS = 15.0
+
+class LoadTracker:
+    """Tracks in-flight requests and latency to tell clients how fast to send.
+
+    `capacity` is how many frames the server can work on at once before
+    requests start queueing: the concurrency of the inference executor or
+    worker pool that serves them. It defaults to the CPU count.
+    """
+
+    def __init__(self, capacity=None, smoothing=0.2):
+        self.capacity = capacity or os.cpu_count() or 1
+        self.smoothing = smoothing
+        self._in_flight = 0
+        self._latency = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._in_flight += 1
+        return time.perf_counter()
+
+    def finish(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            if self._latency is None:
+                self._latency = elapsed
+            else:
+                self._latency += self.smoothing * (elapsed - self._latency)
+
+    def snapshot(self):
+        with self._lock:
+            in_flight = self._in_flight
+            latency = self._latency
+        queue_depth = max(0, in_flight - self.capacity)
+        if latency:
+            # Spread the server's capacity over the active streams; back off
+            # further in proportion to how many requests are already queued
+            streams = max(1, in_flight)
+            fps = self.capacity / (latency * streams) / (1 + queue_depth)
+            recommended_fps = round(min(MAX_FPS, max(MIN_FPS, fps)), 1)
+        else:
+            recommended_fps = MAX_FPS
+        return {
+            'in_flight': in_flight,
+            'queue_depth': queue_depth,
+            'capacity': self.capacity,
+            'avg_latency_ms': round(latency * 1000, 1) if latency else None,
+            'recommended_fps': recommended_fps
+        }
@@ -0,0 +1,73 @@
+import json
+import numpy as np
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
+# Bump whenever EMOTIONS changes so compact clients refetch the labels
+LABELS_VERSION = 1
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+def top_k(predictions, k=3):
+    """Indices of the k largest scores, best first, without a full sort."""
+    k = min(k, len(predictions))
+    idx = np.argpartition(predictions, -k)[-k:]
+    return idx[np.argsort(predictions[idx])[::-1]]
+
+def build_emotion_results(predictions, emotions=EMOTIONS):
+    """Build the emotion `results` payload from one row of model output."""
+    top_emotion_idx = int(np.argmax(predictions))
+    top3_indices = top_k(predictions, 3)
+    return {
+        "emotion": emotions[top_emotion_idx],
+        "confidence": float(predictions[top_emotion_idx]),
+        "all_predictions": {
+            emotion: float(pred)
+            for emotion, pred in zip(emotions, predictions)
+        },
+        "top3_emotions": [
+            (emotions[idx], float(predictions[idx]))
+            for idx in top3_indices
+        ]
+    }
+
+def build_compact_emotion_results(predictions, labels_version=None, k=3):
+    """Compact `results` payload for high-FPS clients.
+
+    Probabilities are a plain array in EMOTIONS order and top-k are label
+    indices; the label list is only included when the client's cached
+    `labels_version` is missing or stale.
+    """
+    predictions = np.asarray(predictions, dtype=np.float32)
+    top = top_k(predictions, k)
+    results = {
+        "v": LABELS_VERSION,
+        "p": np.round(predictions, 4).tolist(),
+        "top": top.tolist()
+    }
+    if labels_version != LABELS_VERSION:
+        results["labels"] = EMOTIONS
+    return results
+
+def wants_msgpack(accept_header):
+    return msgpack is not None and MSGPACK_MIMETYPE in (accept_header or '')
+
+def encode_response(payload, status=200, accept=None):
+    """Serialize with MessagePack if negotiated, else the fastest JSON encoder."""
+    if wants_msgpack(accept):
+        body = msgpack.packb(payload, use_bin_type=True)
+        return Response(body, status=status, mimetype=MSGPACK_MIMETYPE)
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(payload, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
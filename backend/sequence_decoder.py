@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class StreamingSignDecoder:
+    """Turn noisy per-frame gesture predictions into a stable letter sequence.
+
+    Predictions are kept in a fixed-size sliding window together with a
+    running per-label confidence sum, so every update is O(1). A letter is
+    emitted once it dominates the window (by confidence-weighted vote) and
+    differs from the letter emitted last. A run of `word_gap_frames` empty
+    frames inserts a word break and a run of `sentence_gap_frames` closes
+    the sentence (when the two are equal, the sentence wins). Because a
+    letter is only emitted again after a word gap, the same letter twice
+    in a row ("LL") takes a full word gap of blank frames between the two
+    signs, and so lands in the next word. Multi-character labels are
+    treated as whole words.
+    """
+
+    def __init__(self, window_size=8, min_share=0.6, min_confidence=0.5,
+                 word_gap_frames=6, sentence_gap_frames=20):
+        self.window_size = window_size
+        self.min_share = min_share
+        self.min_confidence = min_confidence
+        self.word_gap_frames = word_gap_frames
+        self.sentence_gap_frames = sentence_gap_frames
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._window = deque()
+        self._scores = {}
+        self._last_emitted = None
+        self._blank_frames = 0
+        self.words = []
+        self.current_word = ''
+        self.sentences = []
+
+    def _push(self, label, confidence):
+        self._window.append((label, confidence))
+        if label is not None:
+            self._scores[label] = self._scores.get(label, 0.0) + confidence
+        if len(self._window) > self.window_size:
+            old_label, old_confidence = self._window.popleft()
+            if old_label is not None:
+                remaining = self._scores[old_label] - old_confidence
+                if remaining <= 1e-9:
+                    del self._scores[old_label]
+                else:
+                    self._scores[old_label] = remaining
+
+    def _stable_label(self):
+        if not self._scores or len(self._window) < self.window_size:
+            return None
+        # At most one entry per distinct label in the window, so this is
+        # bounded by window_size rather than by the stream length.
+        label, score = max(self._scores.items(), key=lambda item: item[1])
+        if score / self.window_size >= self.min_share:
+            return label
+        return None
+
+    def _close_word(self):
+        if self.current_word:
+            self.words.append(self.current_word)
+            self.current_word = ''
+
+    def _close_sentence(self):
+        self._close_word()
+        if self.words:
+            self.sentences.append(' '.join(self.words))
+            self.words = []
+
+    def update(self, label, confidence=1.0):
+        """Feed one frame's top prediction; returns the letter emitted, if any."""
+        with self._lock:
+            return self._update(label, confidence)
+
+    def _update(self, label, confidence):
+        if label is None or confidence < self.min_confidence:
+            label, confidence = None, 0.0
+        self._push(label, confidence)
+
+        if label is None:
+            self._blank_frames += 1
+            # Sentence first: with equal gaps the word check would shadow it
+            if self._blank_frames == self.sentence_gap_frames:
+                self._close_sentence()
+                self._last_emitted = None
+            elif self._blank_frames == self.word_gap_frames:
+                self._close_word()
+                self._last_emitted = None
+            return None
+        self._blank_frames = 0
+
+        stable = self._stable_label()
+        if stable is None or stable == self._last_emitted:
+            return None
+        self._last_emitted = stable
+        token = str(stable)
+        if len(token) == 1:
+            self.current_word += token
+        else:
+            # Whole-word gestures (e.g. "goodluck") are words on their own
+            self._close_word()
+            self.words.append(token)
+        return stable
+
+    @property
+    def sequence(self):
+        parts = list(self.sentences)
+        pending = ' '.join(self.words + ([self.current_word] if self.current_word else []))
+        if pending:
+            parts.append(pending)
+        return '. '.join(parts)
+
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        return {
+            'sequence': self.sequence,
+            'current_word': self.current_word,
+            'last_letter': self._last_emitted
+        }
+
+
+class SessionDecoders:
+    """Bounded, thread-safe map of session id -> StreamingSignDecoder."""
+
+    def __init__(self, max_sessions=256, idle_timeout=300.0, **decoder_kwargs):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.decoder_kwargs = decoder_kwargs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None or now - entry[1] > self.idle_timeout:
+                decoder = StreamingSignDecoder(**self.decoder_kwargs)
+            else:
+                decoder = entry[0]
+            self._sessions[session_id] = (decoder, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return decoder
+
+    def reset(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+
+def top_gesture(gesture_list):
+    """Pick the (label, confidence) pair with the highest confidence."""
+    best_label, best_confidence = None, 0.0
+    for item in gesture_list:
+        if isinstance(item, dict):
+            label = item.get('gesture')
+            confidence = float(item.get('confidence', 1.0) or 0.0)
+        else:
+            label, confidence = item, 1.0
+        if label is not None and confidence > best_confidence:
+            best_label, best_confidence = label, confidence
+    return best_label, best_confidence
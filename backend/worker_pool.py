@@ -0,0 +1,484 @@
+import atexit
+import functools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from pathlib import Path
+import cv2
+import numpy as np
+
+from backend.frame_processing import (
+    EMOTION_TARGET_SIZE, GESTURE_IMAGE_SIZE, MAX_FRAME_BYTES, MAX_FRAME_SHAPE, check_frame_bytes, check_frame_shape,
+    crop_to_roi, extract_gesture_input, segment_hand_lut
+)
+from backend.frame_ring import FrameRing
+from backend.inference_executor import ResourceConfig, apply_thread_budget
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARED_LUTS = 64
+
+def _worker_main(core, ring_spec, handler, init, init_args, tasks, results):
+    if core is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {core})
+    # One process per core already: keep OpenCV from spawning its own threads
+    cv2.setNumThreads(1)
+    ring = FrameRing.attach(ring_spec)
+    state, init_error = None, None
+    try:
+        state = init(*init_args) if init is not None else None
+    except Exception as e:
+        logger.error(f"Worker initialisation failed: {str(e)}", exc_info=True)
+        init_error = f"Worker initialisation failed: {str(e)}"
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot, payload = task
+        if init_error is not None:
+            results.put((seq, slot, None, init_error))
+            continue
+        try:
+            results.put((seq, slot, handler(ring, slot, payload, state), None))
+        except Exception as e:
+            results.put((seq, slot, None, str(e)))
+    ring.close()
+
+class WorkerCrashed(RuntimeError):
+    """The worker process running a task died before returning its result."""
+
+class _Worker:
+    """One worker process, its own task queue, and the tasks sent to it (seq -> slot)."""
+
+    def __init__(self, process, tasks):
+        self.process = process
+        self.tasks = tasks
+        self.pending = {}
+
+class WorkerPool:
+    """Worker processes that exchange frames with the caller through a FrameRing.
+
+    Each worker is pinned to one core. The caller acquires a slot, writes its
+    input into it, and call() sends only the slot number and a small payload
+    to the worker with the fewest outstanding tasks; `handler(ring, slot,
+    payload, state)` runs there and its (small) return value comes back.
+    `init(*init_args)` builds the per-worker `state` once, e.g. loading a
+    model. Both must be module-level functions so spawned workers can
+    import them.
+
+    The collector thread checks every `poll_interval` seconds that the
+    workers are alive. When one dies (crash, OOM kill) its outstanding
+    calls fail with WorkerCrashed, the slots they held are reclaimed, and
+    a new worker takes its place.
+    """
+
+    def __init__(self, fields, handler, init=None, init_args=(), workers=None, slots=None, cores=None,
+                 poll_interval=0.5):
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+        self.workers = workers or len(available)
+        self.cores = cores if cores is not None else available
+        self.ring = FrameRing(fields, slots or self.workers * 2)
+        self.poll_interval = poll_interval
+
+        self._waiters = {}
+        self._on_done = {}
+        self._assigned = {}  # seq -> _Worker, until its result is in
+        self._waiters_lock = threading.Lock()
+        self._seq = 0
+        self._restarts = 0
+
+        self._ctx = mp.get_context('spawn')
+        self._worker_args = (handler, init, init_args)
+        self._results = self._ctx.Queue()
+        self._procs = [self._start_worker(i) for i in range(self.workers)]
+
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+        logger.info(f"Started {type(self).__name__}: {self.workers} workers, {self.ring.slots} slots")
+
+    def _start_worker(self, index):
+        core = self.cores[index % len(self.cores)] if self.cores else None
+        tasks = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(core, self.ring.spec()) + self._worker_args + (tasks, self._results),
+            daemon=True
+        )
+        proc.start()
+        return _Worker(proc, tasks)
+
+    def _collect(self):
+        while True:
+            try:
+                message = self._results.get(timeout=self.poll_interval)
+            except queue.Empty:
+                message = False
+            if message is None or (message is False and self._closed):
+                break
+            if message:
+                self._finish(message)
+            self._check_workers()
+
+    def _finish(self, message):
+        seq, slot = message[0], message[1]
+        with self._waiters_lock:
+            worker = self._assigned.pop(seq, None)
+            if worker is None:
+                # Already failed when its worker was found dead; the slot went back then
+                return
+            del worker.pending[seq]
+            waiter = self._waiters.pop(seq, None)
+            on_done = self._on_done.pop(seq, None)
+        self._complete(slot, waiter, on_done, message)
+
+    def _complete(self, slot, waiter, on_done, message):
+        if on_done is not None:
+            on_done()
+        if waiter is None:
+            # The caller timed out; the slot was held back until now
+            self.ring.release(slot)
+            return
+        waiter[1].append(message)
+        waiter[0].set()
+
+    def _check_workers(self):
+        if self._closed:
+            return
+        for index, worker in enumerate(self._procs):
+            if worker.process.is_alive():
+                continue
+            # Results it sent before dying are still queued; take those first
+            while True:
+                try:
+                    message = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    return
+                self._finish(message)
+            with self._waiters_lock:
+                if self._closed:
+                    return
+                lost = []
+                for seq, slot in worker.pending.items():
+                    del self._assigned[seq]
+                    lost.append((seq, slot, self._waiters.pop(seq, None), self._on_done.pop(seq, None)))
+                worker.pending.clear()
+                # Replaced under the lock, so call() never picks the dead worker
+                self._procs[index] = self._start_worker(index)
+                self._restarts += 1
+            worker.tasks.cancel_join_thread()
+            worker.tasks.close()
+            logger.error(f"{type(self).__name__} worker {index} (pid {worker.process.pid}) exited with code "
+                         f"{worker.process.exitcode}; failed {len(lost)} tasks and started a replacement")
+            error = WorkerCrashed(f"{type(self).__name__} worker exited with code {worker.process.exitcode}")
+            for seq, slot, waiter, on_done in lost:
+                self._complete(slot, waiter, on_done, (seq, slot, None, error))
+
+    def acquire(self, timeout=5.0):
+        if self._closed:
+            raise RuntimeError(f"{type(self).__name__} is closed")
+        return self.ring.acquire(timeout)
+
+    def call(self, lease, payload, timeout=5.0, on_done=None):
+        """Run the handler on a filled slot and return its result.
+
+        Raises ValueError with the worker's message if the handler failed,
+        or WorkerCrashed if the worker died first. On timeout the lease is
+        detached: the slot stays with the worker and is recycled when it
+        finishes (or dies). `on_done()` runs once the worker is done with
+        the task, even if the caller timed out.
+        """
+        event, box = threading.Event(), []
+        with self._waiters_lock:
+            self._seq += 1
+            seq = self._seq
+            self._waiters[seq] = (event, box)
+            if on_done is not None:
+                self._on_done[seq] = on_done
+            worker = min(self._procs, key=lambda w: len(w.pending))
+            worker.pending[seq] = lease.slot
+            self._assigned[seq] = worker
+            worker.tasks.put((seq, lease.slot, payload))
+        if not event.wait(timeout):
+            with self._waiters_lock:
+                abandoned = self._waiters.pop(seq, None) is not None
+            if abandoned:
+                lease.detach()
+                raise TimeoutError(f"{type(self).__name__} worker timed out")
+            event.wait()
+        _, _, result, error = box[0]
+        if isinstance(error, WorkerCrashed):
+            raise error
+        if error is not None:
+            raise ValueError(error)
+        return result
+
+    def stats(self):
+        """Ring occupancy plus worker count and restarts, for /health."""
+        return dict(self.ring.stats(), workers=self.workers, restarts=self._restarts)
+
+    def close(self):
+        if self._closed:
+            return
+        with self._waiters_lock:
+            self._closed = True
+        for worker in self._procs:
+            worker.tasks.put(None)
+        for worker in self._procs:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._results.put(None)
+        self.ring.close()
+
+def _segmentation_init():
+    # Worker-side LUT mappings: block name -> (SharedMemory, view), LRU
+    return OrderedDict()
+
+def _attach_lut(luts, name):
+    entry = luts.get(name)
+    if entry is not None:
+        luts.move_to_end(name)
+        return entry[1]
+    block = shared_memory.SharedMemory(name=name)
+    luts[name] = (block, np.ndarray((block.size,), np.uint8, buffer=block.buf))
+    while len(luts) > MAX_SHARED_LUTS:
+        old_block, old_view = luts.popitem(last=False)[1]
+        del old_view  # The view must go before the mapping can close
+        old_block.close()
+    return luts[name][1]
+
+def _segment(ring, slot, payload, luts):
+    """Decode, crop and (with a LUT) segment the encoded frame in `slot`."""
+    nbytes, roi, lut_name, lut_roi = payload
+    img = cv2.imdecode(ring.view(slot, 'encoded', (nbytes,)), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Failed to decode image")
+    check_frame_shape(img.shape)
+    if roi is not None:
+        img = crop_to_roi(img, roi)
+    ring.view(slot, 'frame', img.shape)[...] = img
+
+    has_hand = None
+    if lut_name is not None:
+        thresh = segment_hand_lut(img, _attach_lut(luts, lut_name), roi=lut_roi)
+        gesture_input = extract_gesture_input(thresh)
+        has_hand = gesture_input is not None
+        if has_hand:
+            ring.view(slot, 'mask')[...] = gesture_input[0, :, :, 0]
+    return img.shape, has_hand
+
+class FrameResult:
+    """A processed frame living in a ring slot; release() hands the slot back.
+
+    `frame` and `gesture_input` are views onto shared memory, so they are
+    only valid until the result is released.
+    """
+
+    def __init__(self, lease, shape, has_hand):
+        self._lease = lease
+        self.slot = lease.slot
+        self.has_hand = has_hand
+        self.frame = lease.view('frame', shape)
+        self.gesture_input = None
+        if has_hand:
+            self.gesture_input = lease.view('mask', (1,) + GESTURE_IMAGE_SIZE + (1,))
+
+    def release(self):
+        self.frame = self.gesture_input = None
+        self._lease.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class _SharedLut:
+    """A LUT published in shared memory, with the number of tasks using it."""
+
+    def __init__(self, version, lut):
+        lut = np.ascontiguousarray(lut, dtype=np.uint8)
+        self.version = version
+        self.block = shared_memory.SharedMemory(create=True, size=lut.nbytes)
+        np.ndarray(lut.shape, np.uint8, buffer=self.block.buf)[...] = lut
+        self.refs = 0
+        self.retired = False
+
+    def destroy(self):
+        self.block.close()
+        self.block.unlink()
+
+class SegmentationPool(WorkerPool):
+    """Runs JPEG decode, ROI crop and LUT hand segmentation in worker processes.
+
+    Encoded bytes go into a slot; the decoded frame and 50x50 gesture mask
+    come back in the same slot. LUTs are published to shared memory once
+    per `lut_key` = (owner, version), e.g. Calibration.key: a new version
+    for the same owner replaces the old block. A block is only unlinked
+    once no queued or running task refers to it.
+    """
+
+    def __init__(self, workers=None, slots=None, cores=None):
+        super().__init__(
+            {
+                'encoded': ((MAX_FRAME_BYTES,), np.uint8),
+                'frame': (MAX_FRAME_SHAPE, np.uint8),
+                'mask': (GESTURE_IMAGE_SIZE, np.uint8)
+            },
+            _segment, init=_segmentation_init, workers=workers, slots=slots, cores=cores
+        )
+        self._luts = OrderedDict()  # owner -> _SharedLut, LRU
+        self._lut_lock = threading.Lock()
+
+    def _retire(self, shared):
+        # Called with _lut_lock held
+        shared.retired = True
+        if shared.refs == 0:
+            shared.destroy()
+
+    def publish_lut(self, lut_key, lut):
+        """Put the LUT for `lut_key` in shared memory now (e.g. when a user calibrates)."""
+        self._release_lut(self._acquire_lut(lut_key, lut))
+
+    def retire_lut(self, owner):
+        """Drop the owner's LUT once tasks using it are done (e.g. calibration cleared)."""
+        with self._lut_lock:
+            shared = self._luts.pop(owner, None)
+            if shared is not None:
+                self._retire(shared)
+
+    def _acquire_lut(self, lut_key, lut):
+        owner, version = lut_key
+        with self._lut_lock:
+            shared = self._luts.get(owner)
+            if shared is None or shared.version != version:
+                if shared is not None:
+                    self._retire(shared)
+                shared = self._luts[owner] = _SharedLut(version, lut)
+                while len(self._luts) > MAX_SHARED_LUTS:
+                    self._retire(self._luts.popitem(last=False)[1])
+            else:
+                self._luts.move_to_end(owner)
+            shared.refs += 1
+            return shared
+
+    def _release_lut(self, shared):
+        with self._lut_lock:
+            shared.refs -= 1
+            if shared.retired and shared.refs == 0:
+                shared.destroy()
+
+    def process(self, encoded, roi=None, lut=None, lut_key=None, lut_roi=None, timeout=5.0):
+        """Decode (and optionally segment) one encoded frame in a worker.
+
+        The frame is cropped to `roi`; segmentation with `lut` (identified
+        by `lut_key`, see the class docstring) additionally restricts
+        itself to `lut_roi` within that frame. Returns a FrameResult that
+        must be released (use it as a context manager). Raises ValueError
+        if the frame is over the MAX_FRAME_* limits or the worker could
+        not decode it.
+        """
+        check_frame_bytes(encoded)
+        if lut is not None and lut_key is None:
+            raise ValueError("lut_key is required with lut")
+        lease = self.acquire(timeout)
+        shared = None
+        try:
+            lease.view('encoded', (len(encoded),))[...] = np.frombuffer(encoded, np.uint8)
+            if lut is not None:
+                shared = self._acquire_lut(lut_key, lut)
+            payload = (
+                len(encoded),
+                tuple(roi) if roi is not None else None,
+                shared.block.name if shared is not None else None,
+                tuple(lut_roi) if lut_roi is not None else None
+            )
+            # Once queued, the LUT reference is dropped when the worker is
+            # done with the task, which may be after this call has timed out
+            on_done = functools.partial(self._release_lut, shared) if shared is not None else None
+            shared = None
+            shape, has_hand = self.call(lease, payload, timeout, on_done=on_done)
+        except BaseException:
+            if shared is not None:
+                self._release_lut(shared)
+            lease.release()
+            raise
+        return FrameResult(lease, shape, has_hand)
+
+    def close(self):
+        super().close()
+        with self._lut_lock:
+            for shared in self._luts.values():
+                shared.destroy()
+            self._luts.clear()
+
+def _emotion_init(model_path, version, fallback_path, target_size, runtime=None):
+    # Pinned to one core: one TF thread, before the runtime starts
+    apply_thread_budget(ResourceConfig(workers=1, intra_op=1, inter_op=1))
+    import tensorflow as tf
+    from backend import model_store
+    model = None
+    if model_path is None:
+        try:
+            model = model_store.load_model('emotion', version, runtime)
+        except Exception as e:
+            logger.warning(f"Model store unavailable ({e}); loading {fallback_path} directly",
+                           exc_info=not isinstance(e, model_store.ModelStoreError))
+    if model is None:
+        model = tf.keras.models.load_model(model_path or fallback_path)
+    width, height = target_size
+    return {
+        'model': model,
+        'rgb': np.empty((height, width, 3), np.uint8),
+        'batch': np.empty((1, height, width, 3), np.float32)
+    }
+
+def _emotion_predict(ring, slot, payload, state):
+    """BGR->RGB and [0, 1] scaling into preallocated buffers, then predict."""
+    rgb = cv2.cvtColor(ring.view(slot, 'frame'), cv2.COLOR_BGR2RGB, dst=state['rgb'])
+    np.multiply(rgb, 1.0 / 255.0, out=state['batch'][0], casting='unsafe')
+    return state['model'].predict(state['batch'], verbose=0)[0]
+
+class EmotionPool(WorkerPool):
+    """Emotion model inference in worker processes, fed through a frame ring.
+
+    The caller resizes the decoded frame straight into a slot; workers load
+    their own copy of the model (from the model store unless `model_path`
+    is forced). Nothing is shared between workers, so the store `runtime`
+    defaults to 'tflite' (MODEL_RUNTIME overrides it), which keeps each
+    copy smaller and quicker to start than a Keras model.
+    """
+
+    def __init__(self, workers=None, slots=None, cores=None, model_path=None, version=None,
+                 fallback_path=None, target_size=EMOTION_TARGET_SIZE, runtime=None):
+        self.target_size = tuple(target_size)
+        self.runtime = runtime or os.environ.get('MODEL_RUNTIME') or 'tflite'
+        width, height = self.target_size
+        super().__init__(
+            {'frame': ((height, width, 3), np.uint8)},
+            _emotion_predict, init=_emotion_init,
+            init_args=(
+                str(Path(model_path).resolve()) if model_path else None, version,
+                str(Path(fallback_path).resolve()) if fallback_path else None, self.target_size,
+                self.runtime
+            ),
+            workers=workers, slots=slots, cores=cores
+        )
+
+    def predict(self, img, timeout=10.0):
+        """Class probabilities for one decoded BGR frame."""
+        lease = self.acquire(timeout)
+        try:
+            cv2.resize(img, self.target_size, dst=lease.view('frame'))
+            return self.call(lease, None, timeout)
+        finally:
+            lease.release()
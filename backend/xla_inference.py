@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = (1,)
+
+def xla_requested():
+    return os.environ.get('INFERENCE_XLA', '0') == '1'
+
+def batch_sizes_from_env(default=DEFAULT_BATCH_SIZES):
+    value = os.environ.get('XLA_BATCH_SIZES')
+    if not value:
+        return tuple(default)
+    return tuple(int(v) for v in value.split(',') if v.strip())
+
+class XLAModel:
+    """Keras-like predict() over XLA-compiled forward passes, one per batch size.
+
+    Every size in `batch_sizes` is traced and compiled up front, and the
+    executables are kept for the life of the process. A batch is padded up
+    to the nearest compiled size (batches larger than the biggest size are
+    split), so requests never trigger a recompile. Inputs whose shape does
+    not match, or any failure inside a compiled call, go to the wrapped
+    model's own predict() instead.
+    """
+
+    def __init__(self, model, batch_sizes=DEFAULT_BATCH_SIZES):
+        import tensorflow as tf
+        self._tf = tf
+        self.model = model
+        self.input_shape = model.input_shape
+        self.output_shape = model.output_shape
+        if any(d is None for d in self.input_shape[1:]):
+            raise ValueError(f"XLA mode needs a fixed input shape, got {self.input_shape}")
+        self.batch_sizes = tuple(sorted(set(int(b) for b in batch_sizes)))
+        self._forward = tf.function(lambda x: model(x, training=False), jit_compile=True)
+        self._compiled = {}
+        self.compile_ms = {}
+        self.enabled = True
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        for batch in self.batch_sizes:
+            self._compile(batch)
+
+    def _compile(self, batch):
+        tf = self._tf
+        spec = tf.TensorSpec((batch,) + tuple(self.input_shape[1:]), tf.float32)
+        started = time.perf_counter()
+        concrete = self._forward.get_concrete_function(spec)
+        # XLA compiles on the first execution, not at trace time
+        concrete(tf.zeros(spec.shape, tf.float32))
+        self.compile_ms[batch] = round((time.perf_counter() - started) * 1000, 1)
+        self._compiled[batch] = concrete
+        logger.info(f"XLA-compiled {self.model.name} for batch size {batch} in {self.compile_ms[batch]} ms")
+
+    def _fallback(self, x, batch_size):
+        with self._lock:
+            self.fallbacks += 1
+        return self.model.predict(x, batch_size=batch_size, verbose=0)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if not self.enabled or x.shape[1:] != tuple(self.input_shape[1:]):
+            return self._fallback(x, batch_size)
+        largest = self.batch_sizes[-1]
+        outputs = []
+        try:
+            for start in range(0, len(x), largest):
+                chunk = x[start:start + largest]
+                size = next(b for b in self.batch_sizes if b >= len(chunk))
+                if size != len(chunk):
+                    chunk = np.concatenate([chunk, np.zeros((size - len(chunk),) + chunk.shape[1:], np.float32)])
+                out = self._compiled[size](self._tf.constant(chunk)).numpy()
+                outputs.append(out[:min(largest, len(x) - start)])
+        except Exception as e:
+            logger.error(f"XLA inference failed, falling back to the default path: {str(e)}")
+            self.enabled = False
+            return self._fallback(x, batch_size)
+        return np.concatenate(outputs) if outputs else self._fallback(x, batch_size)
+
+    def __call__(self, x, training=False):
+        return self.predict(x)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'batch_sizes': list(self.batch_sizes),
+            'compile_ms': self.compile_ms,
+            'fallbacks': self.fallbacks
+        }
+
+def compile_model(model, batch_sizes=DEFAULT_BATCH_SIZES):
+    """XLAModel around a Keras model, or the model unchanged if compilation fails."""
+    try:
+        import tensorflow as tf
+        if not isinstance(model, tf.keras.Model):
+            logger.warning(f"XLA mode skipped: {type(model).__name__} is not a Keras model")
+            return model
+        return XLAModel(model, batch_sizes)
+    except Exception as e:
+        logger.warning(f"XLA compilation failed, serving the uncompiled model: {str(e)}")
+        return model
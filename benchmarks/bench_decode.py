@@ -0,0 +1,179 @@
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+from backend.calibration import compute_hand_hist
+from backend.frame_processing import (
+    EMOTION_TARGET_SIZE, GESTURE_IMAGE_SIZE, HAND_ROI, decode_base64_bytes, decode_image_bytes, decode_scale,
+    extract_gesture_input, jpeg_dimensions, mirror_roi, preprocess_emotion_frame, segment_hand
+)
+from load_test import git_commit, synthetic_frames, video_frames
+
+YALE_INPUT_SIZE = (224, 224)
+
+def timed_ms(fn, items, repeat):
+    """Median per-item time of fn over `items`, plus the last outputs."""
+    timings, outputs = [], []
+    for r in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            out = fn(item)
+            timings.append((time.perf_counter() - start) * 1000)
+            if r == 0:
+                outputs.append(out)
+    return float(np.median(timings)), outputs
+
+def compare_paths(name, items, full_fn, reduced_fn, repeat, agreement=None):
+    full_ms, full_out = timed_ms(full_fn, items, repeat)
+    reduced_ms, reduced_out = timed_ms(reduced_fn, items, repeat)
+    result = {
+        'task': name,
+        'full_ms': round(full_ms, 3),
+        'reduced_ms': round(reduced_ms, 3),
+        'speedup': round(full_ms / reduced_ms, 2) if reduced_ms else None
+    }
+    if agreement is not None:
+        result.update(agreement(full_out, reduced_out))
+    print(f"{name:>16}: full {full_ms:7.3f} ms  reduced {reduced_ms:7.3f} ms  x{result['speedup']}  "
+          + '  '.join(f"{k} {v}" for k, v in result.items() if k not in ('task', 'full_ms', 'reduced_ms', 'speedup')))
+    return result
+
+def input_difference(full, reduced):
+    """How far the reduced-decode model inputs are from the full-decode ones."""
+    diffs = [np.abs(a.astype(np.float32) - b.astype(np.float32)) for a, b in zip(full, reduced)]
+    return {
+        'input_mean_abs_diff': round(float(np.mean([d.mean() for d in diffs])), 5),
+        'input_max_abs_diff': round(float(max(d.max() for d in diffs)), 5)
+    }
+
+def prediction_agreement(model, full, reduced):
+    """Top-1 agreement and probability drift between the two decodes."""
+    a = np.asarray(model(np.concatenate(full), training=False))
+    b = np.asarray(model(np.concatenate(reduced), training=False))
+    return {
+        'top1_agreement': round(float((a.argmax(axis=1) == b.argmax(axis=1)).mean()), 4),
+        'max_prob_diff': round(float(np.abs(a - b).max()), 5)
+    }
+
+def pil_decode(data, size, draft):
+    """server/app.py decode_to_array, with and without the JPEG draft mode."""
+    with Image.open(io.BytesIO(data)) as img:
+        if draft:
+            img.draft('RGB', size)
+        img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+def gesture_mask(img, hist, roi, upscale=1):
+    """Segmentation and 50x50 mask; `upscale` brings a reduced ROI back to full size first."""
+    x, y, w, h = mirror_roi(roi, img.shape[1])
+    crop = img[y:y+h, x:x+w]
+    if upscale != 1:
+        crop = cv2.resize(crop, (w * upscale, h * upscale), interpolation=cv2.INTER_LINEAR)
+    return extract_gesture_input(segment_hand(crop, hist, roi=None))
+
+def mask_agreement(full, reduced):
+    both = [(a, b) for a, b in zip(full, reduced) if a is not None and b is not None]
+    ious = [np.logical_and(a > 0, b > 0).sum() / max(1, np.logical_or(a > 0, b > 0).sum()) for a, b in both]
+    return {
+        'hand_found_agreement': round(float(np.mean([(a is None) == (b is None) for a, b in zip(full, reduced)])), 4),
+        'mask_iou': round(float(np.mean(ious)), 4) if ious else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs reduced-scale JPEG decode per task")
+    parser.add_argument('--video', help="Recorded video instead of synthetic frames")
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--gesture-dir', help="gestures/<id>/ folder of 50x50 masks for the grayscale decode case")
+    parser.add_argument('--emotion-model', help="Emotion .h5 to measure prediction agreement (default: stand-in)")
+    parser.add_argument('--no-model', action='store_true', help="Skip the model prediction comparison")
+    parser.add_argument('--output', default='benchmarks/results/decode.json')
+    args = parser.parse_args()
+
+    frames = video_frames(args.video) if args.video else synthetic_frames(count=args.frames)
+    encoded = [decode_base64_bytes(f) for f in frames]
+    size = jpeg_dimensions(encoded[0])
+    print(f"{len(encoded)} frames of {size[0]}x{size[1]}; emotion decodes at 1/{decode_scale(size, EMOTION_TARGET_SIZE)}, "
+          f"yale at 1/{decode_scale(size, YALE_INPUT_SIZE)}")
+    results = []
+
+    # Emotion: decode + resize + normalise into the model input
+    emotion_full = lambda b: preprocess_emotion_frame(decode_image_bytes(b), EMOTION_TARGET_SIZE)
+    emotion_reduced = lambda b: preprocess_emotion_frame(decode_image_bytes(b, EMOTION_TARGET_SIZE), EMOTION_TARGET_SIZE)
+    model = None
+    if not args.no_model:
+        import tensorflow as tf
+        if args.emotion_model:
+            model = tf.keras.models.load_model(args.emotion_model, compile=False)
+        else:
+            from standin_models import MODEL_BUILDERS
+            model = MODEL_BUILDERS['emotion'][0]()
+
+    def emotion_agreement(full, reduced):
+        stats = input_difference(full, reduced)
+        if model is not None:
+            stats.update(prediction_agreement(model, full, reduced))
+        return stats
+    results.append(compare_paths('emotion', encoded, emotion_full, emotion_reduced, args.repeat, emotion_agreement))
+
+    # Decode alone, and the decoded buffer size, for the emotion target
+    full_img, reduced_img = decode_image_bytes(encoded[0]), decode_image_bytes(encoded[0], EMOTION_TARGET_SIZE)
+    decode_only = compare_paths('emotion decode', encoded, decode_image_bytes,
+                                lambda b: decode_image_bytes(b, EMOTION_TARGET_SIZE), args.repeat)
+    decode_only.update({'full_bytes': int(full_img.nbytes), 'reduced_bytes': int(reduced_img.nbytes)})
+    results.append(decode_only)
+
+    # Yale batch path: PIL decode with the JPEG draft mode
+    results.append(compare_paths(
+        'yale', encoded, lambda b: pil_decode(b, YALE_INPUT_SIZE, False), lambda b: pil_decode(b, YALE_INPUT_SIZE, True),
+        args.repeat, input_difference
+    ))
+
+    # Gesture ROI: not switched to reduced decode, since segmentation filters
+    # are sized for full resolution; this measures what it would cost
+    first = decode_image_bytes(encoded[0])
+    hist = compute_hand_hist([first], region=(160, 200, 60, 100))
+    half_roi = tuple(v // 2 for v in HAND_ROI)
+    results.append(compare_paths(
+        'gesture roi 1/2', encoded,
+        lambda b: gesture_mask(decode_image_bytes(b), hist, HAND_ROI),
+        lambda b: gesture_mask(cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_REDUCED_COLOR_2), hist, half_roi, 2),
+        args.repeat, mask_agreement
+    ))
+    results[-1]['enabled'] = False
+
+    # Gesture dataset masks: colour decode + cvtColor vs grayscale decode
+    if args.gesture_dir:
+        paths = sorted(Path(args.gesture_dir).rglob('*.jpg'))[:500]
+        masks = [p.read_bytes() for p in paths]
+        results.append(compare_paths(
+            'gesture gray', masks,
+            lambda b: cv2.cvtColor(decode_image_bytes(b, GESTURE_IMAGE_SIZE), cv2.COLOR_BGR2GRAY),
+            lambda b: decode_image_bytes(b, GESTURE_IMAGE_SIZE, grayscale=True),
+            args.repeat, input_difference
+        ))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': git_commit(),
+        'source': args.video or 'synthetic',
+        'frame_size': list(size),
+        'emotion_model': args.emotion_model or (None if args.no_model else 'stand-in'),
+        'results': results
+    }, indent=2))
+    print(f"Wrote {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import json
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+from backend.calibration import compute_hand_hist
+from backend.frame_processing import crop_hand, decode_base64_image, extract_gesture_input, segment_hand
+from backend.landmark_recognizer import FEATURE_SIZE, HandLandmarkExtractor
+from load_test import git_commit, synthetic_frames, video_frames
+from standin_models import MODEL_BUILDERS, NUM_GESTURES
+
+def standin_classifier(seed=0):
+    """MLP with the trained model's shape, fit on random vectors (timing only)."""
+    from sklearn.neural_network import MLPClassifier
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((NUM_GESTURES * 20, FEATURE_SIZE)).astype(np.float32)
+    y = np.repeat(np.arange(NUM_GESTURES), 20)
+    return MLPClassifier(hidden_layer_sizes=(128, 64), max_iter=20, random_state=seed).fit(x, y)
+
+def summarize(stages, hands, frames):
+    total = np.sum([v for v in stages.values()], axis=0)
+    return {
+        'p50_ms': round(float(np.percentile(total, 50)), 3),
+        'p95_ms': round(float(np.percentile(total, 95)), 3),
+        'stages_p50_ms': {k: round(float(np.percentile(v, 50)), 3) for k, v in stages.items()},
+        'hand_rate': round(hands / frames, 3)
+    }
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - start) * 1000
+
+def bench_mask_cnn(images, hist, model, runs):
+    """Current path: HSV back-projection, filters and Otsu, 50x50 mask, CNN."""
+    stages = {'segment': [], 'extract': [], 'classify': []}
+    hands = 0
+    for i in range(runs):
+        img = images[i % len(images)]
+        thresh, segment_ms = timed(segment_hand, img, hist)
+        gesture_input, extract_ms = timed(extract_gesture_input, thresh)
+        classify_ms = 0.0
+        if gesture_input is not None:
+            hands += 1
+            _, classify_ms = timed(model, gesture_input.astype(np.float32))
+        stages['segment'].append(segment_ms)
+        stages['extract'].append(extract_ms)
+        stages['classify'].append(classify_ms)
+    return summarize(stages, hands, runs)
+
+def bench_landmarks(images, extractor, classifier, runs):
+    """Landmark path: MediaPipe hand landmarks on the hand box, then the small classifier."""
+    stages = {'landmarks': [], 'classify': []}
+    hands = 0
+    for i in range(runs):
+        crop = crop_hand(images[i % len(images)])
+        features, landmark_ms = timed(extractor.extract, crop)
+        classify_ms = 0.0
+        if features is not None:
+            hands += 1
+            _, classify_ms = timed(classifier.predict_proba, features.reshape(1, -1))
+        stages['landmarks'].append(landmark_ms)
+        stages['classify'].append(classify_ms)
+    return summarize(stages, hands, runs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the mask CNN and hand-landmark gesture paths on CPU")
+    parser.add_argument('--video', help="Recorded video with a hand in the box (synthetic frames have no real hand)")
+    parser.add_argument('--frames', type=int, default=30, help="Distinct synthetic frames")
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--landmark-model', help="Trained train_landmarks.py bundle (default: a stand-in MLP)")
+    parser.add_argument('--output', default='benchmarks/results/landmarks.json')
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    encoded = video_frames(args.video) if args.video else synthetic_frames(count=args.frames)
+    images = [decode_base64_image(frame) for frame in encoded]
+    hist = compute_hand_hist([images[0]], region=(160, 200, 60, 100))
+
+    if args.landmark_model:
+        with open(args.landmark_model, 'rb') as f:
+            classifier = pickle.load(f)['classifier']
+    else:
+        classifier = standin_classifier()
+    extractor = HandLandmarkExtractor()
+
+    builder, input_shape = MODEL_BUILDERS['gesture']
+    with tf.device('/CPU:0'):
+        model = builder()
+        forward = lambda x: model(x, training=False)
+        forward(np.zeros((1,) + input_shape, np.float32))
+        cv2.setNumThreads(1)
+        extractor.extract(crop_hand(images[0]))  # Load the MediaPipe graph
+        results = {
+            'mask_cnn': bench_mask_cnn(images, hist, forward, args.runs),
+            'landmarks': bench_landmarks(images, extractor, classifier, args.runs)
+        }
+    extractor.close()
+
+    for name, result in results.items():
+        stages = '  '.join(f"{k} {v:.2f}" for k, v in result['stages_p50_ms'].items())
+        print(f"{name:>10}: p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+              f"hand found {result['hand_rate']:.0%}  ({stages})")
+    if not args.video:
+        print("Synthetic frames contain no real hand, so the landmark path stops after palm detection; use --video")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': git_commit(),
+        'source': args.video or 'synthetic',
+        'runs': args.runs,
+        'landmark_model': args.landmark_model or 'stand-in',
+        'results': results
+    }, indent=2))
+    print(f"Wrote {output}")
+
+if __name__ == '__main__':
+    main()
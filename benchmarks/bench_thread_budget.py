@@ -0,0 +1,152 @@
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+def candidate_configs(cores, workers=None):
+    """Grid of thread budgets worth trying on a host with `cores` cores."""
+    worker_counts = workers or sorted({w for w in (1, 2, 4, 8) if w <= cores} | {cores})
+    configs = []
+    for w in worker_counts:
+        intra_options = sorted({1, max(1, cores // w), cores})
+        for intra, inter, cv_threads in itertools.product(intra_options, (1, 2), (1, cores)):
+            configs.append({
+                'workers': w, 'intra_op': intra, 'inter_op': inter,
+                'cv_threads': cv_threads, 'blas_threads': 1
+            })
+    # Drop duplicates that only differ in unused settings on a 1-core host
+    unique = {json.dumps(c, sort_keys=True): c for c in configs}
+    return list(unique.values())
+
+def run_config(config, model_name, clients, requests_per_client):
+    """Measure one thread budget in this (fresh) process; returns a result dict."""
+    from backend.frame_processing import decode_base64_image, preprocess_emotion_frame
+    from backend.inference_executor import InferenceExecutor, ResourceConfig
+    from load_test import synthetic_frames
+    from standin_models import MODEL_BUILDERS
+
+    executor = InferenceExecutor(ResourceConfig(**config))
+    builder, input_shape = MODEL_BUILDERS[model_name]
+    model = builder()
+    executor.register(
+        model_name, lambda batch: model.predict(batch, verbose=0),
+        concurrency=executor.config.workers, warmup=(np.zeros((1,) + input_shape, np.float32),)
+    )
+    frames = synthetic_frames(count=16)
+    size = input_shape[:2][::-1]
+
+    def preprocess(img):
+        if input_shape[-1] == 1:
+            import cv2
+            gray = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), size)
+            return gray.reshape((1,) + input_shape).astype(np.float32)
+        return preprocess_emotion_frame(img, size)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        local = []
+        for i in range(requests_per_client):
+            t0 = time.perf_counter()
+            img = decode_base64_image(frames[(offset + i) % len(frames)])
+            executor.run(model_name, preprocess(img))
+            local.append((time.perf_counter() - t0) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return {
+        'config': config,
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2)
+    }
+
+def main():
+    from backend.inference_executor import available_cores
+    from load_test import git_commit
+
+    parser = argparse.ArgumentParser(description="Sweep TF/OpenCV/BLAS thread budgets for the inference executor")
+    parser.add_argument('--model', choices=['emotion', 'gesture', 'yale'], default='emotion')
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent request threads")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per client thread")
+    parser.add_argument('--workers', type=int, nargs='+', help="Executor sizes to try (default: 1, 2, 4.. up to cores)")
+    parser.add_argument('--p95-budget-ms', type=float, help="Pick the fastest config whose p95 stays under this")
+    parser.add_argument('--write-config', help="Save the chosen config as JSON for INFERENCE_CONFIG")
+    parser.add_argument('--output', default='benchmarks/results/thread_budget.json')
+    parser.add_argument('--run', help=argparse.SUPPRESS)  # Internal: measure one config in this process
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_config(json.loads(args.run), args.model, args.clients, args.requests)))
+        return
+
+    cores = available_cores()
+    configs = candidate_configs(cores, args.workers)
+    print(f"{len(configs)} configurations on {cores} cores, {args.clients} clients x {args.requests} requests")
+    results = []
+    for config in configs:
+        # TF fixes its thread pools at start-up, so every config gets a fresh interpreter
+        cmd = [sys.executable, __file__, '--run', json.dumps(config), '--model', args.model,
+               '--clients', str(args.clients), '--requests', str(args.requests)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+        if proc.returncode != 0:
+            print(f"  {config} failed:\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"  workers={config['workers']} intra={config['intra_op']} inter={config['inter_op']} "
+              f"cv={config['cv_threads']}: {result['throughput_rps']:7.2f} req/s  "
+              f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms")
+    if not results:
+        raise SystemExit("No configuration completed")
+
+    best_throughput = max(results, key=lambda r: r['throughput_rps'])
+    best_latency = min(results, key=lambda r: r['p95_ms'])
+    eligible = [r for r in results if args.p95_budget_ms is None or r['p95_ms'] <= args.p95_budget_ms]
+    chosen = max(eligible, key=lambda r: r['throughput_rps']) if eligible else best_latency
+    print(f"\nBest throughput: {best_throughput['config']} ({best_throughput['throughput_rps']} req/s)")
+    print(f"Best p95 latency: {best_latency['config']} ({best_latency['p95_ms']} ms)")
+    print(f"Recommended: {chosen['config']}")
+    for key, value in chosen['config'].items():
+        print(f"  INFERENCE_{key.upper()}={value}")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': git_commit(),
+        'cores': cores,
+        'model': args.model,
+        'clients': args.clients,
+        'requests_per_client': args.requests,
+        'p95_budget_ms': args.p95_budget_ms,
+        'results': results,
+        'best_throughput': best_throughput,
+        'best_latency': best_latency,
+        'recommended': chosen
+    }, indent=2))
+    print(f"Wrote {output}")
+    if args.write_config:
+        Path(args.write_config).write_text(json.dumps(chosen['config'], indent=2))
+        print(f"Wrote {args.write_config} (use with INFERENCE_CONFIG={args.write_config})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from backend.calibration import build_backprojection_lut, compute_hand_hist
+from backend.frame_processing import HAND_ROI, decode_base64_bytes, extract_gesture_input, segment_hand_lut
+from backend.worker_pool import SegmentationPool
+from benchmarks.load_test import FRAME_SIZE, git_commit, synthetic_frames, video_frames
+
+def encoded_frames(args):
+    """JPEG bytes (not data URLs) for the frames under test."""
+    frames = video_frames(args.video, size=FRAME_SIZE) if args.video else synthetic_frames(count=args.frames)
+    return [np.frombuffer(decode_base64_bytes(f), np.uint8) for f in frames]
+
+def fixture_lut(encoded):
+    """Calibrate on the skin-toned blob in the first frame."""
+    img = cv2.imdecode(encoded[0], cv2.IMREAD_COLOR)
+    return build_backprojection_lut(compute_hand_hist([img], region=(160, 200, 60, 100)))
+
+def inline_worker(encoded, lut, count, latencies):
+    for i in range(count):
+        t0 = time.perf_counter()
+        img = cv2.imdecode(encoded[i % len(encoded)], cv2.IMREAD_COLOR)
+        extract_gesture_input(segment_hand_lut(img, lut, roi=HAND_ROI))
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+def pool_worker(pool, encoded, lut, count, latencies):
+    for i in range(count):
+        t0 = time.perf_counter()
+        with pool.process(encoded[i % len(encoded)].tobytes(), lut=lut, lut_key=('bench', 0), lut_roi=HAND_ROI):
+            pass
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+def run(label, target, threads, count):
+    """Drive `target` from `threads` request threads, like Flask's threaded server."""
+    latencies = []
+    workers = [threading.Thread(target=target, args=(count, latencies)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    result = {
+        'mode': label,
+        'frames': len(latencies),
+        'throughput_fps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2)
+    }
+    print(f"{label:>12}: {result['throughput_fps']:8.1f} frames/s  "
+          f"p50 {result['p50_ms']:6.2f} ms  p95 {result['p95_ms']:6.2f} ms")
+    return result
+
+def main():
+    available = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    default_workers = sorted({n for n in (1, 2, 4, 8, 16) if n <= available} | {available})
+
+    parser = argparse.ArgumentParser(description="Compare in-process vs pooled gesture decode + segmentation")
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers)
+    parser.add_argument('--threads', type=int, default=max(4, available), help="Concurrent request threads")
+    parser.add_argument('--per-thread', type=int, default=100, help="Frames each request thread submits")
+    parser.add_argument('--frames', type=int, default=30, help="Distinct synthetic frames")
+    parser.add_argument('--video', help="Recorded video to use instead of synthetic frames")
+    parser.add_argument('--output', default='benchmarks/results/worker_pool.json')
+    args = parser.parse_args()
+
+    encoded = encoded_frames(args)
+    lut = fixture_lut(encoded)
+    print(f"{len(encoded)} frames, {args.threads} request threads, {available} cores available")
+
+    results = [run('inline', lambda n, lat: inline_worker(encoded, lut, n, lat), args.threads, args.per_thread)]
+    baseline = results[0]['throughput_fps']
+    for workers in args.workers:
+        pool = SegmentationPool(workers=workers, slots=max(args.threads, workers * 2))
+        try:
+            # Warm up: first task per worker attaches the shared LUT
+            for _ in range(workers * 2):
+                with pool.process(encoded[0].tobytes(), lut=lut, lut_key=('bench', 0), lut_roi=HAND_ROI):
+                    pass
+            result = run(f'pool x{workers}', lambda n, lat: pool_worker(pool, encoded, lut, n, lat),
+                         args.threads, args.per_thread)
+        finally:
+            pool.close()
+        result['workers'] = workers
+        result['speedup'] = round(result['throughput_fps'] / baseline, 2)
+        print(f"{'':>12}  speedup vs inline: {result['speedup']}x")
+        results.append(result)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'commit': git_commit(),
+        'cores': available,
+        'threads': args.threads,
+        'results': results
+    }, indent=2))
+    print(f"Wrote {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+from backend.xla_inference import XLAModel
+from load_test import git_commit
+from standin_models import MODEL_BUILDERS
+
+def measure(fn, batch, runs, warmup=3):
+    for _ in range(warmup):
+        fn(batch)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    p50 = float(np.percentile(timings, 50))
+    return {
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'throughput_ips': round(len(batch) / (p50 / 1000), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare default Keras inference with the XLA-compiled path on CPU")
+    parser.add_argument('--models', nargs='+', choices=['emotion', 'yale'], default=['emotion', 'yale'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--output', default='benchmarks/results/xla.json')
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    results = []
+    with tf.device('/CPU:0'):
+        for name in args.models:
+            builder, input_shape = MODEL_BUILDERS[name]
+            model = builder()
+            xla = XLAModel(model, args.batch_sizes)
+            print(f"\n{name} ({model.name}): compile ms per batch size {xla.compile_ms}")
+            print(f"{'batch':>6}{'keras p50':>12}{'XLA p50':>10}{'keras img/s':>13}{'XLA img/s':>11}{'speedup':>9}")
+            rng = np.random.default_rng(0)
+            for batch_size in args.batch_sizes:
+                batch = rng.random((batch_size,) + input_shape, dtype=np.float32)
+                default = measure(lambda x: model.predict(x, verbose=0), batch, args.runs)
+                compiled = measure(xla.predict, batch, args.runs)
+                expected = model.predict(batch, verbose=0)
+                max_diff = float(np.abs(xla.predict(batch) - expected).max())
+                speedup = round(default['p50_ms'] / compiled['p50_ms'], 2)
+                print(f"{batch_size:>6}{default['p50_ms']:>12.2f}{compiled['p50_ms']:>10.2f}"
+                      f"{default['throughput_ips']:>13.1f}{compiled['throughput_ips']:>11.1f}{speedup:>8.2f}x")
+                results.append({
+                    'model': name,
+                    'batch_size': batch_size,
+                    'keras': default,
+                    'xla': compiled,
+                    'speedup': speedup,
+                    'max_abs_diff': max_diff,
+                    'compile_ms': xla.compile_ms[batch_size]
+                })
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'commit': git_commit(), 'results': results}, indent=2))
+    print(f"\nWrote {output}")
+
+if __name__ == '__main__':
+    main()
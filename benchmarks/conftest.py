@@ -0,0 +1,137 @@
+import base64
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / 'baselines' / 'baseline.json'
+
+def pytest_addoption(parser):
+    group = parser.getgroup('hot path regressions')
+    group.addoption('--baseline', default=str(DEFAULT_BASELINE),
+                    help="JSON file holding the per-stage baseline timings")
+    group.addoption('--save-baseline', action='store_true',
+                    help="Overwrite the baseline with this run's timings")
+    group.addoption('--require-baseline', action='store_true',
+                    help="Fail stages that have no baseline timing instead of leaving them ungated")
+    group.addoption('--max-regression', type=float,
+                    default=float(os.environ.get('BENCH_MAX_REGRESSION', 25)),
+                    help="Fail a stage whose median is slower than baseline by more than this percentage")
+
+class StageBaselines:
+    """Per-stage median timings compared against (and saved to) a JSON baseline.
+
+    Timings are machine-specific, so no baseline is committed: save one on
+    the machine that runs the gate. Stages without one are not gated; they
+    are listed in the summary, or fail with --require-baseline.
+    """
+
+    def __init__(self, path, max_regression, save, require=False):
+        self.path = Path(path)
+        self.max_regression = max_regression
+        self.save = save
+        self.require = require
+        self.current = {}
+        self.baseline = {}
+        self.ungated = []
+        if self.path.exists():
+            with open(self.path) as f:
+                self.baseline = json.load(f).get('stages', {})
+
+    def check(self, stage, median):
+        self.current[stage] = median
+        reference = self.baseline.get(stage)
+        if self.save:
+            return None
+        if reference is None:
+            self.ungated.append(stage)
+            if self.require:
+                return f"No baseline for {stage} in {self.path}; run with --save-baseline first"
+            return None
+        slowdown = (median / reference - 1.0) * 100
+        if slowdown > self.max_regression:
+            return (f"{stage} regressed by {slowdown:.1f}% "
+                    f"({reference * 1000:.3f}ms -> {median * 1000:.3f}ms, "
+                    f"limit {self.max_regression:.0f}%)")
+        return None
+
+    def write(self):
+        if not self.save or not self.current:
+            return
+        stages = dict(self.baseline)
+        stages.update(self.current)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({
+                'machine': platform.node(),
+                'python': platform.python_version(),
+                'stages': stages
+            }, f, indent=2, sort_keys=True)
+
+def pytest_configure(config):
+    config._stage_baselines = StageBaselines(
+        config.getoption('--baseline'),
+        config.getoption('--max-regression'),
+        config.getoption('--save-baseline'),
+        config.getoption('--require-baseline')
+    )
+
+def pytest_sessionfinish(session, exitstatus):
+    session.config._stage_baselines.write()
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    baselines = config._stage_baselines
+    if baselines.save and baselines.current:
+        terminalreporter.write_line(f"Saved {len(baselines.current)} stage baselines to {baselines.path}")
+    elif baselines.ungated:
+        terminalreporter.section('hot path regressions')
+        terminalreporter.write_line(f"{len(baselines.ungated)} stages not gated, no baseline in {baselines.path}: "
+                                    + ', '.join(baselines.ungated), yellow=True)
+        terminalreporter.write_line("Run with --save-baseline to record one (or --require-baseline to fail instead)")
+
+@pytest.fixture
+def stage_benchmark(request, benchmark):
+    """Benchmark `fn(*args)` and fail if it regressed against the baseline."""
+    baselines = request.config._stage_baselines
+
+    def run(fn, *args, **kwargs):
+        result = benchmark(fn, *args, **kwargs)
+        if benchmark.disabled:  # --benchmark-disable: run once, nothing to compare
+            return result
+        failure = baselines.check(request.node.name, benchmark.stats['median'])
+        if failure:
+            pytest.fail(failure)
+        return result
+    return run
+
+@pytest.fixture(scope='session')
+def fixture_frame():
+    """Deterministic 640x480 webcam-like BGR frame with a skin-toned hand blob."""
+    rng = np.random.default_rng(0)
+    img = rng.integers(40, 90, size=(480, 640, 3), dtype=np.uint8)
+    cv2.ellipse(img, (190, 250), (80, 120), 0, 0, 360, (120, 160, 220), -1)
+    return img
+
+@pytest.fixture(scope='session')
+def fixture_frame_b64(fixture_frame):
+    ok, buf = cv2.imencode('.jpg', fixture_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    assert ok
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode('ascii')
+
+@pytest.fixture(scope='session')
+def hand_hist(fixture_frame):
+    """HSV histogram of the hand blob, built like set_hand_histogram.py does."""
+    crop = fixture_frame[200:300, 420:480]
+    hsv_crop = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv_crop], [0, 1], None, [180, 256], [0, 180, 0, 256])
+    cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+    return hist
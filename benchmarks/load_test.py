@@ -0,0 +1,221 @@
+import argparse
+import base64
+import json
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+import requests
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Endpoints under test; both servers accept a JSON body with a `frame` data URL
+TARGETS = {
+    'backend': 'http://localhost:5000/process_frame',
+    'server': 'http://localhost:5000/process_frame'
+}
+FRAME_SIZE = (640, 480)
+JPEG_QUALITY = 70
+
+def encode_frame(img, quality=JPEG_QUALITY):
+    """Encode a BGR frame the same way the web client does (JPEG data URL)."""
+    ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Failed to encode frame")
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode('ascii')
+
+def synthetic_frames(count=30, size=FRAME_SIZE, seed=0):
+    """Generate webcam-like frames: noisy background with a moving skin-toned blob."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    frames = []
+    for i in range(count):
+        img = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+        cx = 190 + int(100 * np.sin(i / count * 2 * np.pi))
+        cv2.ellipse(img, (cx, 250), (70, 110), 0, 0, 360, (120, 160, 220), -1)
+        frames.append(encode_frame(img))
+    return frames
+
+def video_frames(path, limit=300, size=FRAME_SIZE):
+    """Read and encode up to `limit` frames from a recorded video."""
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while len(frames) < limit:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(encode_frame(cv2.resize(img, size)))
+    cap.release()
+    if not frames:
+        raise ValueError(f"No frames could be read from {path}")
+    return frames
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+class Client(threading.Thread):
+    """One simulated webcam stream sending frames at a fixed rate."""
+
+    def __init__(self, client_id, url, frames, fps, duration, timeout, mode):
+        super().__init__(daemon=True)
+        self.client_id = client_id
+        self.url = url
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.duration = duration
+        self.timeout = timeout
+        self.mode = mode
+        self.latencies = []
+        self.sent = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def run(self):
+        session = requests.Session()
+        start = time.perf_counter()
+        next_send = start
+        i = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= self.duration:
+                break
+            if now < next_send:
+                time.sleep(next_send - now)
+            elif now - next_send > self.interval:
+                # The previous request overran its slot: skip the frames a
+                # real client would have had to drop to stay on schedule
+                skipped = int((now - next_send) / self.interval)
+                self.dropped += skipped
+                next_send += skipped * self.interval
+            payload = {
+                'frame': self.frames[i % len(self.frames)],
+                'mode': self.mode,
+                'session_id': f'load-{self.client_id}'
+            }
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                response = session.post(self.url, json=payload, timeout=self.timeout)
+                ok = response.status_code == 200 and response.json().get('success', False)
+            except (requests.RequestException, ValueError):
+                ok = False
+            self.latencies.append((time.perf_counter() - t0) * 1000)
+            self.sent += 1
+            if not ok:
+                self.errors += 1
+            next_send += self.interval
+        session.close()
+
+def sample_rss(pid, interval, stop_event, samples):
+    """Record the server's resident set size over time."""
+    if psutil is None or pid is None:
+        return
+    try:
+        proc = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    start = time.perf_counter()
+    while not stop_event.is_set():
+        try:
+            rss = proc.memory_info().rss
+            rss += sum(child.memory_info().rss for child in proc.children(recursive=True))
+        except psutil.NoSuchProcess:
+            break
+        samples.append({'t': round(time.perf_counter() - start, 3), 'rss_mb': round(rss / 2**20, 1)})
+        stop_event.wait(interval)
+
+def run_level(url, frames, clients, fps, duration, timeout, mode, server_pid):
+    """Run one concurrency level and summarise it."""
+    workers = [Client(i, url, frames, fps, duration, timeout, mode) for i in range(clients)]
+    rss_samples = []
+    stop_event = threading.Event()
+    sampler = threading.Thread(target=sample_rss, args=(server_pid, 0.5, stop_event, rss_samples), daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    sampler.join()
+
+    latencies = [lat for worker in workers for lat in worker.latencies]
+    sent = sum(worker.sent for worker in workers)
+    errors = sum(worker.errors for worker in workers)
+    dropped = sum(worker.dropped for worker in workers)
+    return {
+        'clients': clients,
+        'target_fps': fps,
+        'duration_s': round(elapsed, 3),
+        'requests': sent,
+        'throughput_rps': round((sent - errors) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(float(np.mean(latencies)), 2) if latencies else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99)
+        },
+        'error_rate': round(errors / sent, 4) if sent else 0.0,
+        'drop_rate': round(dropped / (sent + dropped), 4) if sent + dropped else 0.0,
+        'rss': rss_samples
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /process_frame with simulated webcam clients")
+    parser.add_argument('--target', choices=sorted(TARGETS), default='backend')
+    parser.add_argument('--url', help="Override the endpoint URL for the target")
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--fps', type=float, default=5.0, help="Frames per second per client")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--video', help="Recorded video to replay instead of synthetic frames")
+    parser.add_argument('--mode', default='gesture')
+    parser.add_argument('--server-pid', type=int, help="PID of the server process for RSS sampling")
+    parser.add_argument('--output', default='benchmarks/results/load_test.json')
+    args = parser.parse_args()
+
+    url = args.url or TARGETS[args.target]
+    frames = video_frames(args.video) if args.video else synthetic_frames()
+    print(f"Load testing {url} with {len(frames)} distinct frames")
+
+    levels = []
+    for clients in args.clients:
+        print(f"Running {clients} clients at {args.fps} FPS for {args.duration}s...")
+        result = run_level(url, frames, clients, args.fps, args.duration, args.timeout, args.mode, args.server_pid)
+        latency = result['latency_ms']
+        print(f"  throughput={result['throughput_rps']} req/s  p50={latency['p50']}ms  "
+              f"p95={latency['p95']}ms  p99={latency['p99']}ms  "
+              f"errors={result['error_rate']:.2%}  drops={result['drop_rate']:.2%}")
+        levels.append(result)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'target': args.target,
+        'url': url,
+        'source': args.video or 'synthetic',
+        'levels': levels
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Randomly initialized stand-ins for the served models.
+
+The real weights live in Git LFS, so benchmarks build models with the same
+input and output shapes instead. Set BENCH_FULL_MODELS=1 to build the real
+architectures (still without pretrained weights) rather than the small
+stand-ins.
+"""
+import os
+
+EMOTION_INPUT_SHAPE = (256, 256, 3)
+GESTURE_INPUT_SHAPE = (50, 50, 1)
+YALE_INPUT_SHAPE = (224, 224, 3)
+NUM_EMOTIONS = 7
+NUM_GESTURES = 44
+NUM_YALE_CLASSES = 11
+
+def full_models_requested():
+    return os.environ.get('BENCH_FULL_MODELS', '0') == '1'
+
+def _small_convnet(input_shape, num_classes, width=16):
+    from tensorflow.keras import layers, models
+    return models.Sequential([
+        layers.Input(shape=input_shape),
+        layers.Conv2D(width, 3, strides=2, activation='relu'),
+        layers.Conv2D(width * 2, 3, strides=2, activation='relu'),
+        layers.Conv2D(width * 4, 3, strides=2, activation='relu'),
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(num_classes, activation='softmax')
+    ])
+
+def gesture_cnn(input_shape=GESTURE_INPUT_SHAPE, num_classes=NUM_GESTURES):
+    """Same layers as `cnn_model` in Sign-Language/Code/cnn_model_train.py."""
+    from tensorflow.keras import layers, models
+    return models.Sequential([
+        layers.Input(shape=input_shape),
+        layers.Conv2D(16, (2, 2), activation='relu'),
+        layers.MaxPooling2D(pool_size=(2, 2), strides=(2, 2), padding='same'),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D(pool_size=(3, 3), strides=(3, 3), padding='same'),
+        layers.Conv2D(64, (5, 5), activation='relu'),
+        layers.MaxPooling2D(pool_size=(5, 5), strides=(5, 5), padding='same'),
+        layers.Flatten(),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.2),
+        layers.Dense(num_classes, activation='softmax')
+    ])
+
+def emotion_model(full=None):
+    """EfficientNetV2B0 emotion classifier (train/quick_train.py head)."""
+    if not (full_models_requested() if full is None else full):
+        return _small_convnet(EMOTION_INPUT_SHAPE, NUM_EMOTIONS)
+    from tensorflow.keras.applications.efficientnet_v2 import EfficientNetV2B0
+    from tensorflow.keras.layers import Dense, GlobalAveragePooling2D
+    from tensorflow.keras.models import Model
+    base_model = EfficientNetV2B0(weights=None, include_top=False, input_shape=EMOTION_INPUT_SHAPE)
+    x = GlobalAveragePooling2D()(base_model.output)
+    x = Dense(512, activation='relu')(x)
+    return Model(inputs=base_model.input, outputs=Dense(NUM_EMOTIONS, activation='softmax')(x))
+
+def yale_model(full=None):
+    """VGG19 classifier for the 11 Yale classes served by server/app.py."""
+    if not (full_models_requested() if full is None else full):
+        return _small_convnet(YALE_INPUT_SHAPE, NUM_YALE_CLASSES)
+    from tensorflow.keras.applications.vgg19 import VGG19
+    return VGG19(weights=None, input_shape=YALE_INPUT_SHAPE, classes=NUM_YALE_CLASSES)
+
+MODEL_BUILDERS = {
+    'emotion': (emotion_model, EMOTION_INPUT_SHAPE),
+    'gesture': (gesture_cnn, GESTURE_INPUT_SHAPE),
+    'yale': (yale_model, YALE_INPUT_SHAPE)
+}
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from backend.frame_processing import (
+    decode_base64_image, extract_gesture_input, preprocess_emotion_frame, segment_hand, segment_hand_lut
+)
+from backend.calibration import build_backprojection_lut
+from backend.responses import build_compact_emotion_results, build_emotion_results, encode_response
+from standin_models import MODEL_BUILDERS
+
+def test_decode_base64_image(stage_benchmark, fixture_frame_b64):
+    img = stage_benchmark(decode_base64_image, fixture_frame_b64)
+    assert img.shape == (480, 640, 3)
+
+def test_preprocess_emotion_frame(stage_benchmark, fixture_frame):
+    batch = stage_benchmark(preprocess_emotion_frame, fixture_frame)
+    assert batch.shape == (1, 256, 256, 3)
+
+def test_segment_hand(stage_benchmark, fixture_frame, hand_hist):
+    thresh = stage_benchmark(segment_hand, fixture_frame, hand_hist)
+    assert thresh.shape == (300, 300)
+
+def test_segment_hand_lut(stage_benchmark, fixture_frame, hand_hist):
+    lut = build_backprojection_lut(hand_hist)
+    thresh = stage_benchmark(segment_hand_lut, fixture_frame, lut)
+    assert thresh.shape == (300, 300)
+
+def test_extract_gesture_input(stage_benchmark, fixture_frame, hand_hist):
+    thresh = segment_hand(fixture_frame, hand_hist)
+    stage_benchmark(extract_gesture_input, thresh)
+
+def test_build_emotion_results(stage_benchmark):
+    predictions = np.random.default_rng(0).dirichlet(np.ones(7)).astype(np.float32)
+    results = stage_benchmark(build_emotion_results, predictions)
+    assert len(results['all_predictions']) == 7
+
+def test_build_compact_emotion_results(stage_benchmark):
+    predictions = np.random.default_rng(0).dirichlet(np.ones(7)).astype(np.float32)
+    results = stage_benchmark(build_compact_emotion_results, predictions, 1)
+    assert len(results['p']) == 7 and 'labels' not in results
+
+def test_encode_response(stage_benchmark):
+    predictions = np.random.default_rng(0).dirichlet(np.ones(7)).astype(np.float32)
+    payload = {'success': True, 'results': build_emotion_results(predictions)}
+    stage_benchmark(encode_response, payload)
+
+@pytest.fixture(scope='module', params=sorted(MODEL_BUILDERS))
+def standin_model(request):
+    pytest.importorskip('tensorflow')
+    builder, input_shape = MODEL_BUILDERS[request.param]
+    model = builder()
+    batch = np.random.default_rng(0).random((1,) + input_shape, dtype=np.float32)
+    # Warm up so graph tracing is not part of the measurement
+    model.predict(batch, verbose=0)
+    return model, batch
+
+def test_model_predict(stage_benchmark, standin_model):
+    model, batch = standin_model
+    output = stage_benchmark(model.predict, batch, verbose=0)
+    assert output.shape[0] == 1
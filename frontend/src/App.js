@@ -52,6 +52,70 @@ const shouldProcessFrame = (lastProcessingTime, currentTime) => {
   return (currentTime - lastProcessingTime) >= FRAME_DROP_THRESHOLD;
 };
 
+// Capture negotiation: the backend advertises per-task input needs on /health
+const MODE_TASKS = {
+  emotion: 'emotion',
+  gesture: 'gesture',
+  sign: 'gesture'
+};
+
+// Uploading only the gesture hand box is opt-in (REACT_APP_ROI_UPLOAD=true)
+const ROI_UPLOAD = process.env.REACT_APP_ROI_UPLOAD === 'true';
+
+const getCaptureSettings = (tasks, mode) => {
+  const task = tasks && tasks[MODE_TASKS[mode]];
+  if (!task || !task.capture) {
+    return { width: TARGET_WIDTH, height: TARGET_HEIGHT, crop: 'none', quality: JPEG_QUALITY };
+  }
+  const capture = ROI_UPLOAD && task.roi && task.roi_capture ? task.roi_capture : task.capture;
+  return {
+    width: capture.width,
+    height: capture.height,
+    crop: capture.crop === 'roi' && !task.roi ? 'none' : capture.crop || 'none',
+    roi: task.roi || null,
+    quality: task.jpeg_quality || JPEG_QUALITY
+  };
+};
+
+// Crop and scale the current video frame down to the negotiated capture size
+const drawCaptureFrame = (video, capture) => {
+  const videoWidth = video.videoWidth;
+  const videoHeight = video.videoHeight;
+  let sx = 0, sy = 0, sw = videoWidth, sh = videoHeight;
+  if (capture.crop === 'center-square') {
+    const side = Math.min(videoWidth, videoHeight);
+    sx = (videoWidth - side) / 2;
+    sy = (videoHeight - side) / 2;
+    sw = side;
+    sh = side;
+  } else if (capture.crop === 'roi' && capture.roi) {
+    // ROI is given in the coordinates of a reference-sized, unmirrored
+    // frame (what drawImage copies from the video); the server mirrors the
+    // crop itself to match the training masks
+    const [refWidth, refHeight] = capture.roi.reference || [videoWidth, videoHeight];
+    const scaleX = videoWidth / refWidth;
+    const scaleY = videoHeight / refHeight;
+    sx = capture.roi.x * scaleX;
+    sy = capture.roi.y * scaleY;
+    sw = Math.min(capture.roi.w * scaleX, videoWidth - sx);
+    sh = Math.min(capture.roi.h * scaleY, videoHeight - sy);
+  }
+  const canvas = document.createElement('canvas');
+  canvas.width = Math.min(capture.width, sw);
+  canvas.height = Math.min(capture.height, sh);
+  canvas.getContext('2d').drawImage(video, sx, sy, sw, sh, 0, 0, canvas.width, canvas.height);
+  return canvas;
+};
+
+// Pick the polling interval from the server's advertised load and our own latency
+const getLoadAdjustedInterval = (load, processingTime) => {
+  let interval = adjustProcessingInterval(processingTime);
+  if (load && load.recommended_fps) {
+    interval = Math.max(interval * (load.queue_depth > 0 ? 1.5 : 1), 1000 / load.recommended_fps);
+  }
+  return Math.max(MIN_PROCESSING_INTERVAL, Math.min(MAX_PROCESSING_INTERVAL, interval));
+};
+
 function App() {
   const { isDarkMode, toggleTheme } = useTheme();
   const [mode, setMode] = useState('gesture');
@@ -88,6 +152,9 @@ function App() {
   // Add new state for tracking processing attempts
   const processingAttemptsRef = useRef(0);
   const lastProcessingTimeRef = useRef(Date.now());
+  const serverTasksRef = useRef({});
+  const sessionIdRef = useRef(`web-${Math.random().toString(36).slice(2)}`);
+  const currentIntervalRef = useRef(INITIAL_PROCESSING_INTERVAL);
 
   // Initialize and cleanup
   useEffect(() => {
@@ -155,6 +222,10 @@ function App() {
       
       if (healthResponse.ok) {
         console.log('Backend health check successful');
+        const health = await healthResponse.json().catch(() => ({}));
+        if (health.tasks) {
+          serverTasksRef.current = { ...serverTasksRef.current, ...health.tasks };
+        }
         const connectionQuality = updateConnectionQuality(connectionStatus.lastProcessingTime || 0);
         setConnectionStatus(prev => ({
           ...prev,
@@ -286,11 +357,20 @@ function App() {
     }
   };
 
-  const startProcessing = () => {
+  const startProcessing = (interval = INITIAL_PROCESSING_INTERVAL) => {
     if (processingIntervalRef.current) {
       clearInterval(processingIntervalRef.current);
     }
-    processingIntervalRef.current = setInterval(processFrame, INITIAL_PROCESSING_INTERVAL);
+    currentIntervalRef.current = interval;
+    processingIntervalRef.current = setInterval(processFrame, interval);
+  };
+
+  const rescheduleProcessing = (interval) => {
+    // Only restart the timer on meaningful changes to avoid jitter
+    if (Math.abs(interval - currentIntervalRef.current) > currentIntervalRef.current * 0.1) {
+      console.log(`Adjusting frame interval to ${Math.round(interval)}ms`);
+      startProcessing(interval);
+    }
   };
 
   const handleModeChange = (newMode) => {
@@ -317,17 +397,16 @@ function App() {
     const now = Date.now();
 
     try {
-      const canvas = document.createElement('canvas');
-      canvas.width = videoRef.current.videoWidth;
-      canvas.height = videoRef.current.videoHeight;
-      const ctx = canvas.getContext('2d');
-      ctx.drawImage(videoRef.current, 0, 0);
+      const capture = getCaptureSettings(serverTasksRef.current, mode);
+      const canvas = drawCaptureFrame(videoRef.current, capture);
 
       // Convert the frame to base64
-      const base64Frame = canvas.toDataURL('image/jpeg', JPEG_QUALITY);
+      const base64Frame = canvas.toDataURL('image/jpeg', capture.quality);
       const payload = {
         frame: base64Frame.split(',')[1],
-        mode: mode  // Include the current mode in the request
+        mode: mode,  // Include the current mode in the request
+        session_id: sessionIdRef.current,
+        roi_only: capture.crop === 'roi'  // Only the hand box was uploaded
       };
 
       console.log('Processing frame with mode:', mode);
@@ -369,6 +448,7 @@ function App() {
       });
 
       const data = await Promise.race([processPromise, timeoutPromise]);
+      rescheduleProcessing(getLoadAdjustedInterval(data.load, Date.now() - now));
       
       // Update results based on the current mode
       setResult(prev => {
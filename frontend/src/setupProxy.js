@@ -2,7 +2,7 @@ const { createProxyMiddleware } = require('http-proxy-middleware');
 
 module.exports = function(app) {
   app.use(
-    ['/process_frame', '/health'],
+    ['/process_frame', '/health', '/calibrate', '/session_roi', '/reset_sequence'],
     createProxyMiddleware({
       target: 'http://localhost:5000',
       changeOrigin: true,
@@ -3,18 +3,41 @@ from tensorflow.keras.models import load_model
 from tensorflow.keras.preprocessing.image import load_img, img_to_array
 from tensorflow.keras.applications.vgg19 import preprocess_input
 import os
+import sys
+import io
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from PIL import Image
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import model_store
+from backend.archive_upload import ArchiveTooLarge, read_archive
+from backend.inference_executor import InferenceExecutor
+from backend import xla_inference
 
 app = Flask(__name__)
 
-# Load the model at startup
-model_path = 'model/yale_vgg19_model.h5'
-if os.path.exists(model_path):
-    model = load_model(model_path)
-    print("Model loaded successfully!")
-else:
-    print(f"Error: Model file not found at {model_path}")
-    model = None
+# Thread budgets (TF, OpenCV, BLAS) must be set before the model loads
+executor = InferenceExecutor()
+
+# Load the model at startup, preferring the content-addressed model store
+model_path = os.environ.get('YALE_MODEL_PATH', 'model/yale_vgg19_model.h5')
+model = None
+if 'YALE_MODEL_PATH' not in os.environ:
+    try:
+        model = model_store.load_model('yale', os.environ.get('YALE_MODEL_VERSION'))
+        print("Model loaded from model store!")
+    except Exception as e:
+        print(f"Model store unavailable ({type(e).__name__}: {e}); loading {model_path} directly")
+if model is None:
+    if os.path.exists(model_path):
+        model = load_model(model_path)
+        print("Model loaded successfully!")
+    else:
+        print(f"Error: Model file not found at {model_path}")
 
 # Define emotion classes
 emotion_classes = [
@@ -41,7 +64,7 @@ def predict():
         img_array = preprocess_input(img_array)
         
         # Make prediction
-        prediction = model.predict(img_array)
+        prediction = executor.run('yale', img_array)
         predicted_class_idx = np.argmax(prediction[0])
         confidence = float(prediction[0][predicted_class_idx])
         
@@ -64,6 +87,118 @@ def predict():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Batch prediction settings
+DEFAULT_INPUT_SIZE = (224, 224)  # VGG19 default when the model has no fixed input
+MAX_BATCH_SIZE = 32
+MAX_BATCH_IMAGES = 5000
+# Whole request, multipart images and archive together; larger uploads get a 413
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('YALE_MAX_UPLOAD_BYTES', 256 << 20))
+decode_pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 4))
+
+def get_input_size():
+    """(width, height) the batch is resized to, taken from the model when fixed."""
+    if model is not None:
+        shape = model.input_shape
+        if shape[1] is not None and shape[2] is not None:
+            return (shape[2], shape[1])
+    return DEFAULT_INPUT_SIZE
+
+def predict_yale(batch):
+    return model.predict(batch, batch_size=MAX_BATCH_SIZE, verbose=0)
+
+# All model calls go through the executor's sized inference pool
+if model is not None:
+    if xla_inference.xla_requested():
+        # /predict sends single images, /predict_batch chunks of up to MAX_BATCH_SIZE
+        model = xla_inference.compile_model(model, xla_inference.batch_sizes_from_env((1, 8, MAX_BATCH_SIZE)))
+    width, height = get_input_size()
+    executor.register('yale', predict_yale, concurrency=executor.config.workers,
+                      warmup=(np.zeros((1, height, width, 3), np.float32),))
+
+def decode_to_array(image_bytes, size):
+    """Decode and resize one image to a float32 RGB array of `size`."""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        # JPEGs decode at the smallest DCT scale (1/2 .. 1/8) still >= size
+        img.draft('RGB', size)
+        img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+def decode_batch(items, size):
+    """Decode images in parallel; returns the batch and per-image errors."""
+    def decode(item):
+        name, image_bytes = item
+        try:
+            return name, decode_to_array(image_bytes, size), None
+        except Exception as e:
+            return name, None, str(e)
+
+    names, arrays, errors = [], [], {}
+    for name, array, error in decode_pool.map(decode, items):
+        if error is not None:
+            errors[name] = error
+        else:
+            names.append(name)
+            arrays.append(array)
+    batch = np.stack(arrays) if arrays else np.empty((0, size[1], size[0], 3), np.float32)
+    return names, batch, errors
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    if model is None:
+        return jsonify({"error": "Model not loaded"}), 500
+
+    try:
+        top_k = max(1, min(int(request.form.get('top_k', 3)), len(emotion_classes)))
+    except ValueError:
+        return jsonify({"error": "top_k must be an integer"}), 400
+
+    try:
+        # Collect raw bytes from multipart `images` fields and/or an `archive`
+        items = [(f.filename or f"image_{i}", f.read()) for i, f in enumerate(request.files.getlist('images'))]
+        if 'archive' in request.files:
+            archive = request.files['archive']
+            items.extend(read_archive(archive.read(), archive.filename or '',
+                                      max_members=max(0, MAX_BATCH_IMAGES - len(items))))
+    except ArchiveTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not items:
+        return jsonify({"error": "No images provided"}), 400
+    if len(items) > MAX_BATCH_IMAGES:
+        return jsonify({"error": f"Too many images (max {MAX_BATCH_IMAGES})"}), 400
+
+    try:
+        names, batch, errors = decode_batch(items, get_input_size())
+
+        results = []
+        if len(names):
+            # One batched forward pass over the whole upload
+            predictions = executor.run('yale', preprocess_input(batch))
+            top_indices = np.argsort(predictions, axis=1)[:, ::-1][:, :top_k]
+            for name, probs, indices in zip(names, predictions, top_indices):
+                results.append({
+                    "image": name,
+                    "emotion": emotion_classes[indices[0]],
+                    "confidence": float(probs[indices[0]]),
+                    "top_predictions": [
+                        {"label": emotion_classes[idx], "confidence": float(probs[idx])}
+                        for idx in indices
+                    ]
+                })
+
+        return jsonify({
+            "count": len(results),
+            "results": results,
+            "errors": errors
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # This route receives emotion from the frontend (OpenCV script)
 @app.route('/update_emotion', methods=['POST'])
 def update_emotion():
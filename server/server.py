@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 import numpy as np
 import cv2
@@ -10,6 +10,20 @@ import logging
 import tensorflow as tf
 import traceback
 
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import model_store
+from backend.frame_processing import decode_image_bytes, preprocess_emotion_frame
+from backend.negotiation import TASK_REQUIREMENTS, LoadTracker
+from backend.inference_executor import InferenceExecutor
+from backend import xla_inference
+from backend.cascade import Cascade, load_config as load_cascade_config
+from backend.hot_swap import FileWatcher, ModelSlot, admin_allowed
+from backend.worker_pool import EmotionPool, WorkerCrashed
+from backend.responses import (
+    EMOTIONS, LABELS_VERSION, build_compact_emotion_results, build_emotion_results, encode_response
+)
+
 # Configure logging with more detail
 logging.basicConfig(
     level=logging.INFO,
@@ -20,31 +34,163 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Per-task input requirements and live load, advertised on /health; built
+# once the model is served (below), with the pool's or executor's concurrency
+load_tracker = None
+
+@app.before_request
+def track_frame_start():
+    if request.endpoint == 'process_frame' and request.method == 'POST':
+        g.frame_started = load_tracker.start()
+
+@app.teardown_request
+def track_frame_end(exc):
+    started = g.pop('frame_started', None)
+    if started is not None:
+        load_tracker.finish(started)
+
 # Constants
-MODEL_PATH = Path('../model/emotion_model.h5')
+MODEL_PATH = Path(os.environ.get('EMOTION_MODEL_PATH', '../model/emotion_model.h5'))
 TARGET_SIZE = (256, 256)  # EfficientNetV2B0 input size
-EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
-
-# Load the model
-model = None
-try:
-    if not MODEL_PATH.exists():
-        logger.error(f"Model file not found at {MODEL_PATH}")
-        logger.info("Please run the training script first: python train/quick_train.py")
-    else:
+
+# EMOTION_CASCADE=1: a distilled student answers first and only frames below
+# the calibrated gate (model/emotion_cascade.json) reach the full model
+EMOTION_CASCADE = os.environ.get('EMOTION_CASCADE', '0') == '1'
+
+def load_cascade():
+    """Cascade over the 'emotion' executor model, or None if the student or its config is missing."""
+    try:
+        config = load_cascade_config()
+        fast_path = os.environ.get('EMOTION_FAST_MODEL_PATH')
+        if fast_path:
+            fast_model = tf.keras.models.load_model(fast_path)
+        else:
+            fast_model = model_store.load_model('emotion_student', os.environ.get('EMOTION_FAST_MODEL_VERSION'))
+    except (OSError, ValueError, model_store.ModelStoreError) as e:
+        logger.warning(f"Cascade disabled, serving the full model only: {str(e)}")
+        return None
+    executor.register(
+        'emotion_fast', lambda batch: fast_model.predict(batch, verbose=0),
+        concurrency=executor.config.workers,
+        warmup=(np.zeros((1,) + TARGET_SIZE + (3,), np.float32),)
+    )
+    logger.info(f"Emotion cascade enabled: {config['metric']} < {config['threshold']:.4f} escalates")
+    return Cascade.from_config(
+        lambda batch: executor.run('emotion_fast', batch),
+        lambda batch: executor.run('emotion', batch),
+        config
+    )
+
+def load_emotion_model(version=None):
+    """(model, source path, version): the model store unless a path is forced, else MODEL_PATH."""
+    model, source = None, None
+    if 'EMOTION_MODEL_PATH' not in os.environ:
+        try:
+            source, digest = model_store.get_store().resolve('emotion', version)
+            model = model_store.load_model('emotion', version)
+            version = f"{version or model_store.REGISTRY['emotion']['latest']}@{digest[:12]}"
+            logger.info("Emotion detection model loaded from model store")
+        except Exception as e:
+            # Not only ModelStoreError: conversion or loading the cached
+            # artifact can fail too (TF version, disk, TFLite support)
+            logger.warning(f"Model store unavailable ({e}); loading {MODEL_PATH} directly",
+                           exc_info=not isinstance(e, model_store.ModelStoreError))
+
+    if model is None:
+        if not MODEL_PATH.exists():
+            logger.info("Please run the training script first: python train/quick_train.py")
+            raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
+        model = tf.keras.models.load_model(MODEL_PATH)
+        source, version = MODEL_PATH, f"file@{int(MODEL_PATH.stat().st_mtime)}"
+        logger.info("Emotion detection model loaded successfully")
+
+    logger.info(f"Model input shape: {model.input_shape}")
+    logger.info(f"Model output shape: {model.output_shape}")
+    if xla_inference.xla_requested():
+        # Frames are predicted one at a time
+        model = xla_inference.compile_model(model, xla_inference.batch_sizes_from_env((1,)))
+    return model, str(Path(source).resolve()), version
+
+def warm_up_emotion_model(model):
+    model.predict(np.zeros((1,) + TARGET_SIZE + (3,), np.float32), verbose=0)
+
+def predict_emotion(batch):
+    # Each call holds the model version it started on until it returns
+    with emotion_models.use() as model:
+        return model.predict(batch, verbose=0)
+
+# Load the model. With EMOTION_WORKERS > 0 inference runs in a process pool
+# fed through a shared-memory frame ring, and each worker loads its own copy
+# (TFLite unless MODEL_RUNTIME says otherwise); the workers spawn-import this module as __mp_main__ and skip all of this.
+# Otherwise the model lives in a ModelSlot: POST /admin/reload (or a changed
+# model file, with MODEL_WATCH_INTERVAL > 0) loads and warms the new version
+# in the background and swaps it in without dropping requests.
+EMOTION_WORKERS = int(os.environ.get('EMOTION_WORKERS', '0'))
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '0'))
+emotion_models = None
+emotion_pool = None
+executor = None
+cascade = None
+model_watcher = None
+if __name__ == '__mp_main__':
+    pass
+elif EMOTION_WORKERS > 0:
+    if EMOTION_CASCADE:
+        logger.warning("EMOTION_CASCADE is ignored with EMOTION_WORKERS > 0")
+    emotion_pool = EmotionPool(
+        workers=EMOTION_WORKERS,
+        model_path=MODEL_PATH if 'EMOTION_MODEL_PATH' in os.environ else None,
+        version=os.environ.get('EMOTION_MODEL_VERSION'),
+        fallback_path=MODEL_PATH,
+        target_size=TARGET_SIZE
+    )
+else:
+    # Thread budgets (TF, OpenCV, BLAS) must be set before the model loads
+    executor = InferenceExecutor()
+    emotion_models = ModelSlot('emotion', load_emotion_model, warmup=warm_up_emotion_model)
+    try:
         # Configure GPU memory growth
         gpus = tf.config.experimental.list_physical_devices('GPU')
         if gpus:
             for gpu in gpus:
                 tf.config.experimental.set_memory_growth(gpu, True)
-        
-        model = tf.keras.models.load_model(MODEL_PATH)
-        logger.info("Emotion detection model loaded successfully")
-        logger.info(f"Model input shape: {model.input_shape}")
-        logger.info(f"Model output shape: {model.output_shape}")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    logger.error(traceback.format_exc())
+
+        emotion_models.load(os.environ.get('EMOTION_MODEL_VERSION'))
+    except Exception as e:
+        logger.error(f"Error loading model: {str(e)}")
+        logger.error(traceback.format_exc())
+    # Registered even if loading failed, so a later reload can bring it up;
+    # the slot has already warmed the model
+    executor.register('emotion', predict_emotion, concurrency=executor.config.workers)
+    if EMOTION_CASCADE and emotion_models.ready:
+        cascade = load_cascade()
+    if MODEL_WATCH_INTERVAL > 0:
+        model_watcher = FileWatcher(
+            lambda: [emotion_models.source] if emotion_models.source else [],
+            lambda: emotion_models.reload(emotion_models.requested_version),
+            interval=MODEL_WATCH_INTERVAL
+        )
+
+if emotion_pool is not None:
+    load_tracker = LoadTracker(capacity=emotion_pool.workers)
+else:
+    load_tracker = LoadTracker(capacity=executor.concurrency('emotion') if executor is not None else None)
+
+def decode_frame(image_data):
+    """Turn a data URL (or an already decoded array) into a BGR frame.
+
+    The frame is only ever shrunk to TARGET_SIZE, so large JPEGs are decoded
+    at a reduced scale that still covers it.
+    """
+    if isinstance(image_data, str) and image_data.startswith('data:image'):
+        encoded_data = image_data.split(',')[1]
+        img = decode_image_bytes(base64.b64decode(encoded_data), TARGET_SIZE)
+    else:
+        img = image_data
+    if img is None:
+        raise ValueError("Failed to decode image")
+    logger.info(f"Decoded image shape: {img.shape}")
+    return img
 
 def preprocess_image(image_data):
     """Preprocess image for emotion detection."""
@@ -52,29 +198,10 @@ def preprocess_image(image_data):
         logger.info("Starting image preprocessing")
         
         # Convert base64 to image
-        if isinstance(image_data, str) and image_data.startswith('data:image'):
-            encoded_data = image_data.split(',')[1]
-            nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        else:
-            img = image_data
-            
-        logger.info(f"Decoded image shape: {img.shape if img is not None else 'None'}")
-        
-        # Resize to target size (maintaining RGB)
-        resized = cv2.resize(img, TARGET_SIZE)
-        logger.info(f"Resized image shape: {resized.shape}")
-        
-        # Convert BGR to RGB (OpenCV uses BGR by default)
-        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-        logger.info(f"RGB image shape: {rgb.shape}")
-        
-        # Normalize pixel values to [0, 1]
-        normalized = rgb.astype(np.float32) / 255.0
-        logger.info(f"Normalized value range: [{normalized.min():.2f}, {normalized.max():.2f}]")
+        img = decode_frame(image_data)
         
-        # Reshape for model input
-        processed = np.expand_dims(normalized, axis=0)
+        # Resize, convert BGR to RGB, normalize to [0, 1] and add batch axis
+        processed = preprocess_emotion_frame(img, TARGET_SIZE)
         logger.info(f"Final processed shape: {processed.shape}")
         
         return processed, None
@@ -89,7 +216,7 @@ def process_frame():
     try:
         logger.info("Received frame processing request")
         
-        if model is None:
+        if emotion_pool is None and not (emotion_models is not None and emotion_models.ready):
             logger.error("Model not loaded")
             return jsonify({
                 "success": False,
@@ -107,50 +234,60 @@ def process_frame():
                 "error": "No frame data provided"
             }), 400
             
-        # Process image
-        processed_image, error = preprocess_image(frame_data)
-        if error:
-            logger.error(f"Image preprocessing failed: {error}")
-            return jsonify({
-                "success": False,
-                "error": f"Image preprocessing failed: {error}"
-            }), 500
-            
-        # Get predictions
-        logger.info("Running model prediction")
-        predictions = model.predict(processed_image, verbose=0)[0]
-        logger.info(f"Raw predictions: {predictions}")
-        
-        # Get top emotion and confidence
-        top_emotion_idx = np.argmax(predictions)
-        top_emotion = EMOTIONS[top_emotion_idx]
-        confidence = float(predictions[top_emotion_idx])
-        logger.info(f"Top emotion: {top_emotion}, confidence: {confidence:.2f}")
-        
-        # Get top 3 emotions with confidences
-        top3_indices = np.argsort(predictions)[-3:][::-1]
-        top3_emotions = [
-            (EMOTIONS[idx], float(predictions[idx]))
-            for idx in top3_indices
-        ]
-        logger.info(f"Top 3 emotions: {top3_emotions}")
+        stage = 'full'  # Which cascade stage answered
+        if emotion_pool is not None:
+            # Decode here, resize straight into a ring slot; a worker reads it in place
+            try:
+                img = decode_frame(frame_data)
+            except Exception as e:
+                logger.error(f"Image decoding failed: {str(e)}")
+                return jsonify({
+                    "success": False,
+                    "error": f"Image preprocessing failed: {str(e)}"
+                }), 500
+            logger.info("Running model prediction in worker pool")
+            try:
+                predictions = emotion_pool.predict(img)
+            except TimeoutError as e:
+                logger.error(f"Emotion pool busy: {str(e)}")
+                return jsonify({"success": False, "error": "Server busy, try again"}), 503
+            except WorkerCrashed as e:
+                # The pool has already started a replacement worker
+                logger.error(f"Emotion worker crashed: {str(e)}")
+                return jsonify({"success": False, "error": "Worker restarted, try again"}), 503
+        else:
+            # Process image
+            processed_image, error = preprocess_image(frame_data)
+            if error:
+                logger.error(f"Image preprocessing failed: {error}")
+                return jsonify({
+                    "success": False,
+                    "error": f"Image preprocessing failed: {error}"
+                }), 500
+                
+            # Get predictions
+            logger.info("Running model prediction")
+            if cascade is not None:
+                probs, stages = cascade.predict(processed_image)
+                predictions, stage = probs[0], stages[0]
+            else:
+                predictions = executor.run('emotion', processed_image)[0]
+        logger.debug("Raw predictions: %s", predictions)
         
-        # Prepare response
-        results = {
-            "emotion": top_emotion,
-            "confidence": confidence,
-            "all_predictions": {
-                emotion: float(pred)
-                for emotion, pred in zip(EMOTIONS, predictions)
-            },
-            "top3_emotions": top3_emotions
-        }
+        # Prepare response; compact clients get a fixed-order probability array
+        if data.get('format') == 'compact':
+            results = build_compact_emotion_results(predictions, data.get('labels_version'))
+        else:
+            results = build_emotion_results(predictions)
+            logger.info(f"Top emotion: {results['emotion']}, confidence: {results['confidence']:.2f}")
         
         logger.info("Successfully processed frame")
-        return jsonify({
+        return encode_response({
             "success": True,
-            "results": results
-        }), 200
+            "results": results,
+            "stage": stage,
+            "load": load_tracker.snapshot()
+        }, 200, request.headers.get('Accept'))
         
     except Exception as e:
         logger.error(f"Error processing frame: {str(e)}")
@@ -160,14 +297,44 @@ def process_frame():
             "error": str(e)
         }), 500
 
+def xla_stats():
+    if emotion_models is None or not emotion_models.ready:
+        return None
+    with emotion_models.use() as model:
+        return model.stats() if isinstance(model, xla_inference.XLAModel) else None
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Load a model version in the background and swap it in once warmed up."""
+    if not admin_allowed(request):
+        return jsonify({"success": False, "error": "Forbidden"}), 403
+    if emotion_models is None:
+        return jsonify({"success": False, "error": "Hot reload is not available with EMOTION_WORKERS > 0"}), 409
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if version is not None and 'EMOTION_MODEL_PATH' in os.environ:
+        return jsonify({"success": False, "error": "EMOTION_MODEL_PATH is forced; only the file can be reloaded"}), 400
+    if not emotion_models.reload(version):
+        return jsonify({"success": False, "error": "A reload is already running", "model": emotion_models.status()}), 409
+    return jsonify({"success": True, "model": emotion_models.status()}), 202
+
 @app.route('/health', methods=['GET'])
 def health_check():
     status = {
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": (emotion_models is not None and emotion_models.ready) or emotion_pool is not None,
+        "model": emotion_models.status() if emotion_models is not None else None,
         "model_path": str(MODEL_PATH),
         "emotions": EMOTIONS,
-        "input_shape": TARGET_SIZE + (3,)
+        "labels_version": LABELS_VERSION,
+        "response_formats": ["full", "compact"],
+        "input_shape": TARGET_SIZE + (3,),
+        "tasks": {"emotion": TASK_REQUIREMENTS['emotion']},
+        "load": load_tracker.snapshot(),
+        "frame_ring": emotion_pool.stats() if emotion_pool is not None else None,
+        "executor": executor.stats() if executor is not None else None,
+        "xla": xla_stats(),
+        "cascade": cascade.stats() if cascade is not None else None
     }
     logger.info(f"Health check: {status}")
     return jsonify(status), 200
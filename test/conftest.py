@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test_simple.py is a standalone EfficientNet smoke script, not a pytest module
+collect_ignore = ['test_simple.py']
@@ -0,0 +1,61 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from backend.archive_upload import ArchiveTooLarge, read_archive
+
+def zip_archive(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def tar_archive(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+@pytest.mark.parametrize('archive', [zip_archive, tar_archive])
+def test_reads_only_images(archive):
+    data = archive({'s1/a.jpg': b'jpeg', 's1/b.PNG': b'png', 'README.txt': b'notes'})
+    assert sorted(read_archive(data, 'faces')) == [('s1/a.jpg', b'jpeg'), ('s1/b.PNG', b'png')]
+
+@pytest.mark.parametrize('archive', [zip_archive, tar_archive])
+def test_member_count_is_capped(archive):
+    data = archive({f'{i}.txt': b'' for i in range(10)})
+    with pytest.raises(ArchiveTooLarge, match='entries'):
+        read_archive(data, 'faces', max_members=5)
+
+@pytest.mark.parametrize('archive', [zip_archive, tar_archive])
+def test_highly_compressed_members_are_rejected(archive):
+    # 4 MB of zeros compresses to a few KB
+    data = archive({'bomb.png': bytes(4 << 20)})
+    assert len(data) < 64 << 10
+    with pytest.raises(ArchiveTooLarge, match='bomb.png'):
+        read_archive(data, 'faces', max_member_bytes=1 << 20)
+
+@pytest.mark.parametrize('archive', [zip_archive, tar_archive])
+def test_total_size_is_capped(archive):
+    data = archive({f'{i}.png': bytes(1 << 20) for i in range(4)})
+    with pytest.raises(ArchiveTooLarge, match='expands'):
+        read_archive(data, 'faces', max_total_bytes=3 << 20)
+
+def test_zip_limits_are_checked_before_extracting(monkeypatch):
+    data = zip_archive({'a.png': bytes(1 << 20), 'b.png': bytes(8 << 20)})
+    opened = []
+    monkeypatch.setattr(zipfile.ZipFile, 'open', lambda self, *args, **kwargs: opened.append(args))
+    with pytest.raises(ArchiveTooLarge):
+        read_archive(data, 'faces', max_member_bytes=4 << 20)
+    assert opened == []
+
+def test_unsupported_archive():
+    with pytest.raises(ValueError) as info:
+        read_archive(b'plain text', 'faces.rar')
+    assert not isinstance(info.value, ArchiveTooLarge)
@@ -0,0 +1,131 @@
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.calibration import HandCalibrations, build_backprojection_lut, compute_hand_hist
+from backend.frame_processing import LUT_BITS, segment_hand, segment_hand_lut
+
+SKIN = (120, 160, 220)
+
+@pytest.fixture(scope='module')
+def frame():
+    """640x480 webcam-like BGR frame with a skin-toned hand blob in the hand box."""
+    rng = np.random.default_rng(0)
+    img = rng.integers(40, 90, size=(480, 640, 3), dtype=np.uint8)
+    cv2.ellipse(img, (190, 250), (80, 120), 0, 0, 360, SKIN, -1)
+    return img
+
+@pytest.fixture(scope='module')
+def hand_hist(frame):
+    return compute_hand_hist([frame], region=(160, 200, 60, 100))
+
+@pytest.fixture(scope='module')
+def calibration_frames():
+    """Frames with the hand over the set_hand_histogram.py sampling grid."""
+    rng = np.random.default_rng(1)
+    frames = []
+    for _ in range(2):
+        img = rng.integers(40, 90, size=(480, 640, 3), dtype=np.uint8)
+        img[70:310, 90:450] = SKIN
+        frames.append(img)
+    return frames
+
+def lut_backproject(img, lut, bits=LUT_BITS):
+    q = (img >> (8 - bits)).astype(np.int32)
+    return lut[(q[..., 0] << (2 * bits)) | (q[..., 1] << bits) | q[..., 2]]
+
+def test_lut_matches_calcbackproject_for_smooth_histogram():
+    # A calibration-like histogram: a blurred skin-tone blob in H-S
+    hist = np.zeros((180, 256), np.float32)
+    hist[5:25, 60:200] = 1
+    hist = cv2.GaussianBlur(hist, (0, 0), 6)
+    cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+    lut = build_backprojection_lut(hist)
+    assert lut.shape == (1 << (3 * LUT_BITS),) and lut.dtype == np.uint8
+
+    img = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8), (0, 0), 3)
+    expected = cv2.calcBackProject([cv2.cvtColor(img, cv2.COLOR_BGR2HSV)], [0, 1], hist, [0, 180, 0, 256], 1)
+    diff = np.abs(expected.astype(np.int16) - lut_backproject(img, lut))
+    assert diff.mean() < 1.0
+    assert np.percentile(diff, 99) <= 2
+
+def test_constant_histogram_is_exact():
+    lut = build_backprojection_lut(np.full((180, 256), 100, np.float32))
+    assert (lut == 100).all()
+
+def test_lut_segmentation_matches_calcbackproject(frame, hand_hist):
+    expected = segment_hand(frame, hand_hist) > 0
+    actual = segment_hand_lut(frame, build_backprojection_lut(hand_hist)) > 0
+    iou = np.logical_and(expected, actual).sum() / np.logical_or(expected, actual).sum()
+    assert iou > 0.95
+
+def test_hand_hist_peaks_at_skin_tone(calibration_frames):
+    hist = compute_hand_hist(calibration_frames)
+    h, s = np.unravel_index(np.argmax(hist), hist.shape)
+    skin_h, skin_s, _ = cv2.cvtColor(np.uint8([[SKIN]]), cv2.COLOR_BGR2HSV)[0, 0]
+    assert (h, s) == (skin_h, skin_s)
+    assert hist.max() == 255
+
+def wait_for(calibrations, user_id, timeout=10.0):
+    """get() loads saved calibrations in the background; poll until it lands."""
+    deadline = time.monotonic() + timeout
+    while (entry := calibrations.get(user_id)) is None:
+        assert time.monotonic() < deadline, f"{user_id} was never loaded"
+        time.sleep(0.01)
+    return entry
+
+def test_calibrations_persist_and_reload(tmp_path, calibration_frames):
+    calibrations = HandCalibrations(max_users=1, directory=tmp_path)
+    first = calibrations.calibrate('user/1', calibration_frames)
+    assert (tmp_path / f"{calibrations.owner('user/1')}.npy").exists()
+    assert calibrations.get('user/1') is first
+
+    calibrations.calibrate('user/2', calibration_frames)  # Evicts user/1 from memory
+    assert calibrations.is_calibrated('user/1')
+    reloaded = wait_for(calibrations, 'user/1')
+    np.testing.assert_array_equal(reloaded.hist, first.hist)
+    np.testing.assert_array_equal(reloaded.lut, first.lut)
+    assert reloaded.key[0] == first.key[0] and reloaded.key != first.key
+
+    restarted = HandCalibrations(directory=tmp_path, preload=False)
+    np.testing.assert_array_equal(wait_for(restarted, 'user/2').hist, first.hist)
+    assert restarted.get('user/3') is None and not restarted.is_calibrated('user/3')
+
+def test_recalibrating_changes_the_key(tmp_path, calibration_frames):
+    calibrations = HandCalibrations(directory=tmp_path)
+    first = calibrations.calibrate('u', calibration_frames)
+    second = calibrations.calibrate('u', calibration_frames[:1])
+    assert first.key[0] == second.key[0] and first.key[1] < second.key[1]
+    assert calibrations.get('u') is second
+
+def test_clear(tmp_path, calibration_frames):
+    calibrations = HandCalibrations(directory=tmp_path)
+    calibrations.calibrate('u', calibration_frames)
+    assert calibrations.clear('u') is True
+    assert not list(tmp_path.glob('*.npy'))
+    assert calibrations.get('u') is None and not calibrations.is_calibrated('u')
+    assert calibrations.clear('u') is False
+
+def test_owner_keys_do_not_collide(tmp_path):
+    calibrations = HandCalibrations(directory=tmp_path, preload=False)
+    # Both would sanitize to "user_1"
+    assert calibrations.owner('user/1') != calibrations.owner('user?1')
+    assert calibrations.owner('../x') == calibrations.owner('../x')
+    assert '/' not in calibrations.owner('../x')
+
+def test_saved_calibrations_are_capped(tmp_path, calibration_frames):
+    calibrations = HandCalibrations(directory=tmp_path, max_saved=2)
+    for user_id in ('a', 'b', 'c'):
+        calibrations.calibrate(user_id, calibration_frames[:1])
+    saved = {path.stem for path in tmp_path.glob('*.npy')}
+    assert saved == {calibrations.owner('b'), calibrations.owner('c')}
+    for age, user_id in enumerate(('c', 'b')):  # Start-up orders by mtime
+        os.utime(tmp_path / f"{calibrations.owner(user_id)}.npy", (1000 - age, 1000 - age))
+
+    restarted = HandCalibrations(directory=tmp_path, preload=False, max_saved=1)
+    assert not restarted.is_calibrated('a') and not restarted.is_calibrated('b')
+    assert restarted.is_calibrated('c')
+    assert len(list(tmp_path.glob('*.npy'))) == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from backend.cascade import Cascade, gate_scores
+
+PROBS = np.array([
+    [0.9, 0.05, 0.05],  # Margin 0.85
+    [0.4, 0.35, 0.25],  # Margin 0.05
+    [0.5, 0.3, 0.2]     # Margin 0.2
+], dtype=np.float32)
+
+def test_gate_scores():
+    np.testing.assert_allclose(gate_scores(PROBS, 'confidence'), [0.9, 0.4, 0.5])
+    np.testing.assert_allclose(gate_scores(PROBS, 'margin'), [0.85, 0.05, 0.2], atol=1e-6)
+    with pytest.raises(ValueError):
+        gate_scores(PROBS, 'entropy')
+
+def test_only_uncertain_rows_escalate():
+    seen = []
+
+    def full(batch):
+        seen.append(batch.copy())
+        return np.tile([0.0, 0.0, 1.0], (len(batch), 1))
+
+    cascade = Cascade(lambda batch: PROBS, full, metric='margin', threshold=0.3)
+    batch = np.arange(3, dtype=np.float32)[:, None]
+    probs, stages = cascade.predict(batch)
+    assert stages == ['fast', 'full', 'full']
+    np.testing.assert_array_equal(seen[0].ravel(), [1, 2])
+    np.testing.assert_allclose(probs[0], PROBS[0])
+    assert probs[1:].argmax(axis=1).tolist() == [2, 2]
+    stats = cascade.stats()
+    assert stats['answered_by'] == {'fast': 1, 'full': 2}
+    assert stats['escalation_rate'] == round(2 / 3, 4)
+
+def test_confident_batch_skips_full_model():
+    def full(batch):
+        raise AssertionError("full model called")
+
+    cascade = Cascade(lambda batch: PROBS[:1], full, metric='confidence', threshold=0.8)
+    probs, stages = cascade.predict(np.zeros((1, 1), np.float32))
+    assert stages == ['fast']
+    assert cascade.stats()['stage_ms_mean']['full'] is None
+
+def test_unknown_metric():
+    with pytest.raises(ValueError):
+        Cascade(None, None, metric='entropy')
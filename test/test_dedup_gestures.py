@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'Sign-Language' / 'Code'))
+import dedup_gestures
+from dedup_gestures import HammingIndex, dedup_gesture, move_duplicates, perceptual_hash, restore_duplicates
+
+def pattern(seed):
+    """Smooth, asymmetric 50x50 grayscale image, like a captured hand mask."""
+    noise = np.random.default_rng(seed).integers(0, 256, (50, 50)).astype(np.float32)
+    return cv2.GaussianBlur(noise, (0, 0), 4).clip(0, 255).astype(np.uint8)
+
+def distance(a, b):
+    return bin(a ^ b).count('1')
+
+def test_hash_is_stable_under_noise():
+    img = cv2.normalize(pattern(0), None, 0, 255, cv2.NORM_MINMAX)
+    noisy = cv2.add(img, np.random.default_rng(1).integers(0, 3, img.shape, dtype=np.uint8))
+    assert perceptual_hash(img) == perceptual_hash(img.copy())
+    assert distance(perceptual_hash(img), perceptual_hash(noisy)) <= 4
+    assert distance(perceptual_hash(img), perceptual_hash(pattern(2))) > 10
+
+def test_popcount():
+    values = np.array([0, 1, 0xFF, (1 << 64) - 1], dtype=np.uint64)
+    assert dedup_gestures.popcount(values).tolist() == [0, 1, 8, 64]
+
+@pytest.mark.parametrize('radius', [2, 4, 8])
+def test_hamming_index_matches_brute_force(radius):
+    rng = np.random.default_rng(radius)
+    stored = [int(h) for h in rng.integers(0, 1 << 63, 300, dtype=np.int64)]
+    index = HammingIndex(radius)
+    for i, h in enumerate(stored):
+        index.add(h, i)
+    for h in stored[:50]:
+        # Flip up to radius + 2 random bits of a stored hash
+        query = h
+        for bit in rng.choice(64, rng.integers(0, radius + 3), replace=False):
+            query ^= 1 << int(bit)
+        best = min(distance(query, s) for s in stored)
+        found = index.nearest(query)
+        if best > radius:
+            assert found is None
+        else:
+            assert found is not None and found[1] == best
+
+@pytest.fixture
+def gesture_folder(tmp_path):
+    folder = tmp_path / 'gestures' / '3'
+    folder.mkdir(parents=True)
+    a, b = pattern(0), pattern(2)
+    images = {
+        '1.png': a,
+        '2.png': cv2.add(a, np.ones_like(a)),  # Next frame of the same run
+        '3.png': b,
+        '10.png': cv2.flip(a, 1),  # create_gestures.py mirrors half the frames
+        'flip_1.png': cv2.flip(a, 1),
+        'flip_2.png': cv2.flip(a, 1)
+    }
+    for name, img in images.items():
+        cv2.imwrite(str(folder / name), img)
+    return folder
+
+def test_dedup_gesture(tmp_path, gesture_folder):
+    index_path = tmp_path / 'index' / '3.json'
+    kept, duplicates, stats = dedup_gesture(gesture_folder, index_path, radius=4, keep_per_cluster=1)
+    assert sorted(kept) == ['1.png', '3.png', 'flip_1.png']
+    assert duplicates == {'2.png': '1.png', '10.png': '1.png', 'flip_2.png': 'flip_1.png'}
+    assert stats['images'] == 6 and stats['duplicates'] == 3 and stats['hashed'] == 4
+
+    # Hashes are cached, and the result does not change
+    again = dedup_gesture(gesture_folder, index_path, radius=4, keep_per_cluster=1)
+    assert again[1] == duplicates and again[2]['hashed'] == 0
+
+def test_keep_per_cluster_thins_runs(tmp_path, gesture_folder):
+    kept, duplicates, _ = dedup_gesture(gesture_folder, tmp_path / 'index.json', radius=4, keep_per_cluster=2)
+    assert list(duplicates) == ['10.png']  # Third member of the run
+    assert '2.png' in kept
+
+def test_move_and_restore(tmp_path, gesture_folder):
+    _, duplicates, _ = dedup_gesture(gesture_folder, tmp_path / 'index.json', radius=4, keep_per_cluster=1)
+    move_duplicates(gesture_folder, duplicates, tmp_path / 'dups')
+    assert sorted(p.name for p in (tmp_path / 'dups' / '3').iterdir()) == sorted(duplicates)
+    assert restore_duplicates(gesture_folder.parent, tmp_path / 'dups') == 3
+    assert len(list(gesture_folder.iterdir())) == 6
+
+def test_unreadable_images_are_not_kept(tmp_path, gesture_folder):
+    (gesture_folder / '4.png').write_bytes(b'truncated')
+    cv2.imwrite(str(gesture_folder / 'flip_4.png'), pattern(5))
+    kept, duplicates, stats = dedup_gesture(gesture_folder, tmp_path / 'index.json', radius=4, keep_per_cluster=1)
+    assert stats['unreadable'] == 2  # flip_4.png goes with its original
+    assert '4.png' not in kept and 'flip_4.png' not in kept and '4.png' not in duplicates
+    assert stats['kept'] == len(kept) == 3
+    assert stats['images'] == stats['kept'] + stats['duplicates'] + stats['unreadable']
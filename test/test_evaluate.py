@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'train'))
+import evaluate
+
+class BrightnessModel:
+    """Predicts 'bright' (1) for images brighter than mid-grey, else 'dark' (0)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, x, batch_size=None, verbose=0):
+        self.calls += 1
+        bright = x.reshape(len(x), -1).mean(axis=1) >= 128
+        return np.stack([~bright, bright], axis=1).astype(np.float32)
+
+CONFIG = {'img_size': (16, 16), 'color': 'grayscale', 'preprocess': evaluate.raw_pixels}
+
+@pytest.fixture
+def test_dir(tmp_path):
+    for folder, values in {'dark': [10, 20, 200], 'bright': [220, 230, 240]}.items():
+        (tmp_path / folder).mkdir()
+        for i, value in enumerate(values):
+            cv2.imwrite(str(tmp_path / folder / f'{i}.png'), np.full((32, 32), value, np.uint8))
+    (tmp_path / 'dark' / 'notes.txt').write_text('not an image')
+    return tmp_path
+
+def test_list_images_follows_label_order(test_dir):
+    paths, targets, names = evaluate.list_images(test_dir, labels=['Dark', 'Bright', 'Other'])
+    assert names == ['Dark', 'Bright', 'Other']
+    assert len(paths) == 6
+    assert sorted(targets.tolist()) == [0, 0, 0, 1, 1, 1]
+    assert all(targets[i] == (0 if p.parent.name == 'dark' else 1) for i, p in enumerate(paths))
+
+def test_list_images_orders_numeric_folders(tmp_path):
+    for name in ('10', '2', '1'):
+        (tmp_path / name).mkdir()
+        cv2.imwrite(str(tmp_path / name / 'a.png'), np.zeros((4, 4), np.uint8))
+    paths, targets, names = evaluate.list_images(tmp_path)
+    assert names == ['1', '2', '10']
+    assert [p.parent.name for p in paths] == names and targets.tolist() == [0, 1, 2]
+    with pytest.raises(ValueError):
+        evaluate.list_images(tmp_path / '1')
+
+def test_metrics():
+    targets = np.array([0, 0, 0, 1, 1, 2])
+    predictions = np.array([0, 0, 1, 1, 1, 1])
+    matrix = evaluate.confusion_matrix(targets, predictions, 3)
+    assert matrix.tolist() == [[2, 1, 0], [0, 2, 0], [0, 1, 0]]
+    per_class, summary = evaluate.per_class_metrics(matrix, ['a', 'b', 'c'])
+    assert per_class['a'] == {'precision': 1.0, 'recall': 0.6667, 'f1': 0.8, 'support': 3}
+    assert per_class['b'] == {'precision': 0.5, 'recall': 1.0, 'f1': 0.6667, 'support': 2}
+    assert per_class['c'] == {'precision': 0.0, 'recall': 0.0, 'f1': 0.0, 'support': 1}
+    assert summary['macro_f1'] == pytest.approx((0.8 + 2 / 3) / 3, abs=1e-4)
+    assert summary['weighted_f1'] == pytest.approx((0.8 * 3 + 2 / 3 * 2) / 6, abs=1e-4)
+
+def test_evaluate_report(test_dir):
+    paths, targets, names = evaluate.list_images(test_dir, labels=['dark', 'bright'])
+    model = BrightnessModel()
+    report = evaluate.evaluate(model, CONFIG, paths, targets, names, batch_size=4, top_k=1, single_runs=3)
+    assert report['images'] == 6
+    assert report['accuracy'] == round(5 / 6, 4)  # The 200 image in dark/ looks bright
+    assert report['top_1_accuracy'] == report['accuracy']
+    assert report['confusion_matrix'] == [[2, 1], [0, 3]]
+    timing = report['timing']
+    assert timing['batches'] == 2 and timing['single_image_latency_ms']['p50'] >= 0
+    assert model.calls == 1 + 2 + 5 + 3  # Warm-up, batches, single-image warm-up and runs
+
+def test_evaluate_rejects_class_count_mismatch(test_dir):
+    paths, targets, _ = evaluate.list_images(test_dir)
+    with pytest.raises(ValueError, match='classes'):
+        evaluate.evaluate(BrightnessModel(), CONFIG, paths, targets, ['a', 'b', 'c'], single_runs=0)
+
+def test_gesture_needs_an_explicit_test_dir(tmp_path, monkeypatch):
+    with pytest.raises(ValueError, match='--test-dir'):
+        evaluate.test_dir_for('gesture')
+    assert evaluate.test_dir_for('gesture', str(tmp_path)) == tmp_path
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match='No held-out emotion test set'):
+        evaluate.test_dir_for('emotion')
@@ -0,0 +1,65 @@
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'train'))
+import fer2013
+
+USAGE_NAMES = dict(enumerate(fer2013.USAGES))
+
+def csv_lines(labels, pixels, usage):
+    return b''.join(
+        f"{label},\"{' '.join(map(str, row))}\",{USAGE_NAMES[u]}\n".encode()
+        for label, row, u in zip(labels, pixels, usage)
+    )
+
+@pytest.fixture(scope='module')
+def rows():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, fer2013.NUM_CLASSES, 5).astype(np.int8)
+    pixels = rng.integers(0, 256, (5, fer2013.PIXELS)).astype(np.uint8)
+    pixels[0, :3] = [0, 9, 255]  # One-, two- and three-digit edges
+    usage = np.array([0, 1, 2, 0, 1], dtype=np.int8)
+    return labels, pixels, usage
+
+def test_parse_block_round_trip(rows):
+    labels, pixels, usage = fer2013.parse_block(csv_lines(*rows))
+    np.testing.assert_array_equal(labels, rows[0])
+    np.testing.assert_array_equal(pixels, rows[1])
+    np.testing.assert_array_equal(usage, rows[2])
+    assert labels.dtype == np.int8 and pixels.dtype == np.uint8 and usage.dtype == np.int8
+
+def test_iter_blocks_skips_header_and_splits_on_lines(rows):
+    data = b'emotion,pixels,Usage\n' + csv_lines(*rows)
+    blocks = list(fer2013.iter_blocks(io.BytesIO(data), block_size=7000))
+    assert len(blocks) > 1 and all(b.endswith(b'\n') for b in blocks)
+    labels = np.concatenate([fer2013.parse_block(b)[0] for b in blocks])
+    np.testing.assert_array_equal(labels, rows[0])
+
+def test_iter_blocks_without_trailing_newline(rows):
+    data = csv_lines(*rows)[:-1]
+    blocks = list(fer2013.iter_blocks(io.BytesIO(data), block_size=1 << 20))
+    assert len(fer2013.parse_block(b''.join(blocks))[0]) == 5
+
+@pytest.mark.parametrize('line, message', [
+    (b'0,"1 2 3",Training\n', 'Line 5: expected 2305 numbers, found 4'),
+    (b'0,"' + b' '.join([b'256'] * fer2013.PIXELS) + b'",Training\n', 'out of range'),
+    (b'0,"' + b' '.join([b'1000'] * fer2013.PIXELS) + b'",Training\n', 'Line 5: value out of range'),
+    (b'7,"' + b' '.join([b'1'] * fer2013.PIXELS) + b'",Training\n', 'out of range'),
+    (b'0,"' + b' '.join([b'1'] * fer2013.PIXELS) + b'",Unknown\n', 'Line 5: unknown Usage'),
+])
+def test_parse_block_rejects_bad_lines(rows, line, message):
+    block = csv_lines(*(r[:2] for r in rows)) + line
+    with pytest.raises(ValueError, match=message):
+        fer2013.parse_block(block, first_line=3)
+
+def test_missing_zip_uses_existing_cache(tmp_path):
+    assert not fer2013.is_current(tmp_path / 'missing.zip', tmp_path)
+    (tmp_path / 'meta.json').write_text('{"source": {}}')
+    assert fer2013.is_current(tmp_path / 'missing.zip', tmp_path)
+    other = tmp_path / 'other.zip'
+    other.write_bytes(b'PK')
+    assert not fer2013.is_current(other, tmp_path)  # Built from a different zip
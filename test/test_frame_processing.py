@@ -0,0 +1,132 @@
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.frame_processing import (
+    HAND_ROI, MAX_FRAME_BYTES, MAX_FRAME_SHAPE, SessionROIs, check_frame_bytes, clamp_roi, crop_hand, crop_to_roi,
+    decode_base64_image, decode_image_bytes, decode_scale, decode_upload, jpeg_dimensions, mirror_roi, parse_roi,
+    segment_hand
+)
+from backend.negotiation import TASK_REQUIREMENTS
+
+@pytest.mark.parametrize('value', [[10, 20, 30, 40], (10, 20, 30, 40), {'x': 10, 'y': 20, 'w': 30, 'h': 40},
+                                   ['10', '20', '30', '40']])
+def test_parse_roi(value):
+    assert parse_roi(value) == (10, 20, 30, 40)
+
+@pytest.mark.parametrize('value', [None, [1, 2, 3], {'x': 1, 'y': 2, 'w': 3}, [0, 0, 0, 10], [-1, 0, 5, 5],
+                                   ['a', 0, 5, 5]])
+def test_parse_roi_rejects(value):
+    with pytest.raises((ValueError, TypeError)):
+        parse_roi(value)
+
+def test_clamp_roi():
+    shape = (480, 640, 3)
+    assert clamp_roi((300, 100, 300, 300), shape) == (300, 100, 300, 300)
+    assert clamp_roi((500, 400, 300, 300), shape) == (500, 400, 140, 80)
+    assert clamp_roi((-10, -10, 50, 50), shape) == (0, 0, 40, 40)
+    assert clamp_roi((700, 0, 50, 50), shape) is None
+
+def test_crop_to_roi_is_a_view():
+    img = np.zeros((480, 640, 3), np.uint8)
+    crop = crop_to_roi(img, (300, 100, 300, 300))
+    assert crop.shape == (300, 300, 3)
+    crop[:] = 1
+    assert img[100:400, 300:600].all() and img.sum() == 300 * 300 * 3
+    assert crop_to_roi(img, (700, 0, 50, 50)) is img  # Nothing left: keep the frame
+
+def test_segment_hand_only_covers_the_roi():
+    img = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    hist = np.full((180, 256), 255, np.float32)
+    assert segment_hand(img, hist).shape == (HAND_ROI[3], HAND_ROI[2])
+    assert segment_hand(img[:200, :200], hist, roi=None).shape == (200, 200)
+
+def test_session_rois_are_bounded():
+    rois = SessionROIs(max_sessions=2)
+    rois.set('a', (0, 0, 10, 10))
+    rois.set('b', (0, 0, 20, 20))
+    assert rois.get('a') == (0, 0, 10, 10)  # Refreshes 'a'
+    rois.set('c', (0, 0, 30, 30))
+    assert rois.get('b') is None
+    assert rois.clear('a') is True
+    assert rois.clear('a') is False
+
+def test_mirror_roi():
+    assert mirror_roi(HAND_ROI, 640) == (40, 100, 300, 300)
+    assert mirror_roi(mirror_roi((10, 20, 30, 40), 200), 200) == (10, 20, 30, 40)
+
+def test_crop_hand_matches_flipping_first():
+    # final.py flips the camera frame, then crops HAND_ROI
+    img = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    x, y, w, h = HAND_ROI
+    np.testing.assert_array_equal(crop_hand(img), cv2.flip(img, 1)[y:y+h, x:x+w])
+    np.testing.assert_array_equal(crop_hand(img[:50, :60], roi=None), img[:50, :60][:, ::-1])
+
+def test_advertised_roi_is_the_mirrored_hand_roi():
+    roi = TASK_REQUIREMENTS['gesture']['roi']
+    assert (roi['x'], roi['y'], roi['w'], roi['h']) == mirror_roi(HAND_ROI, roi['reference'][0])
+    # Uploading only the hand box is opt-in; full frames are the default
+    assert TASK_REQUIREMENTS['gesture']['capture']['crop'] == 'none'
+    capture = TASK_REQUIREMENTS['gesture']['roi_capture']
+    assert capture['crop'] == 'roi' and (capture['width'], capture['height']) == (roi['w'], roi['h'])
+
+def encode(img, ext='.jpg'):
+    return cv2.imencode(ext, img)[1].tobytes()
+
+@pytest.fixture(scope='module')
+def webcam_frame():
+    rng = np.random.default_rng(0)
+    return cv2.GaussianBlur(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8), (0, 0), 5)
+
+def test_jpeg_dimensions(webcam_frame):
+    assert jpeg_dimensions(encode(webcam_frame)) == (640, 480)
+    progressive = cv2.imencode('.jpg', webcam_frame, [cv2.IMWRITE_JPEG_PROGRESSIVE, 1])[1].tobytes()
+    assert jpeg_dimensions(progressive) == (640, 480)
+    assert jpeg_dimensions(encode(webcam_frame, '.png')) is None
+    assert jpeg_dimensions(b'\xff\xd8\xff') is None
+
+@pytest.mark.parametrize('size, target, scale', [
+    ((640, 480), (256, 256), 2),  # 240 rows still covers 90% of 256
+    ((1280, 720), (256, 256), 2),
+    ((1920, 1080), (256, 256), 4),
+    ((640, 480), (50, 50), 8),
+    ((640, 480), (480, 480), 1),
+    ((100, 100), (256, 256), 1)
+])
+def test_decode_scale(size, target, scale):
+    assert decode_scale(size, target) == scale
+
+def test_reduced_decode(webcam_frame):
+    data = encode(webcam_frame)
+    full = decode_image_bytes(data)
+    assert full.shape == (480, 640, 3)
+    reduced = decode_image_bytes(data, target_size=(256, 256))
+    assert reduced.shape == (240, 320, 3)
+    expected = cv2.resize(full, (256, 256), interpolation=cv2.INTER_AREA).astype(np.int16)
+    assert np.abs(cv2.resize(reduced, (256, 256)).astype(np.int16) - expected).mean() < 3
+    gray = decode_image_bytes(data, target_size=(50, 50), grayscale=True)
+    assert gray.shape == (60, 80)
+
+def test_decode_rejects_garbage(webcam_frame):
+    with pytest.raises(ValueError):
+        decode_image_bytes(b'not an image', target_size=(50, 50))
+    png = 'data:image/png;base64,' + base64.b64encode(encode(webcam_frame, '.png')).decode()
+    np.testing.assert_array_equal(decode_base64_image(png, target_size=(50, 50)), webcam_frame)  # No reduced PNG decode
+
+def test_upload_limits():
+    height, width = MAX_FRAME_SHAPE[:2]
+    ok = np.zeros((height, width, 3), np.uint8)
+    check_frame_bytes(encode(ok))
+    assert decode_upload(base64.b64encode(encode(ok, '.png')).decode()).shape == ok.shape
+    assert decode_upload(base64.b64encode(encode(ok.transpose(1, 0, 2), '.png')).decode()).shape[:2] == (width, height)
+
+    # JPEGs are rejected from their header, other formats once decoded
+    big = np.zeros((height, width + 16, 3), np.uint8)
+    with pytest.raises(ValueError, match='larger than'):
+        check_frame_bytes(encode(big))
+    with pytest.raises(ValueError, match='larger than'):
+        decode_upload(base64.b64encode(encode(big, '.png')).decode())
+    with pytest.raises(ValueError, match='bytes'):
+        check_frame_bytes(b'\0' * (MAX_FRAME_BYTES + 1))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from backend.frame_ring import SLOT_ALIGNMENT, FrameRing
+
+@pytest.fixture
+def ring():
+    ring = FrameRing({'frame': ((4, 5, 3), np.uint8), 'meta': ((2,), np.float32)}, slots=2)
+    yield ring
+    ring.close()
+
+def test_slots_are_aligned(ring):
+    assert ring.slot_size % SLOT_ALIGNMENT == 0
+    assert ring.view(1, 'meta').ctypes.data % SLOT_ALIGNMENT == 0
+
+def test_acquire_release_recycles(ring):
+    with ring.acquire() as lease:
+        lease.view('frame')[:] = 7
+        slot = lease.slot
+    assert ring.stats()['in_use'] == 0
+    with ring.acquire() as other:
+        assert other.slot != slot  # Oldest free slot first
+    stats = ring.stats()
+    assert stats['acquired'] == 2 and stats['peak_in_use'] == 1
+
+def test_full_ring_times_out(ring):
+    leases = [ring.acquire(), ring.acquire()]
+    with pytest.raises(TimeoutError):
+        ring.acquire(timeout=0.01)
+    stats = ring.stats()
+    assert stats['occupancy'] == 1.0 and stats['waits'] == 1 and stats['timeouts'] == 1
+    leases[0].release()
+    ring.acquire(timeout=0.01).release()
+    leases[1].release()
+
+def test_detached_slot_is_released_by_new_owner(ring):
+    lease = ring.acquire()
+    slot = lease.detach()
+    lease.release()  # No-op once detached
+    assert ring.stats()['in_use'] == 1
+    ring.release(slot)
+    with pytest.raises(ValueError):
+        ring.release(slot)
+
+def test_attached_ring_shares_memory(ring):
+    other = FrameRing.attach(ring.spec())
+    try:
+        with ring.acquire() as lease:
+            lease.view('frame', (2, 5, 3))[:] = 42
+            assert (other.view(lease.slot, 'frame', (2, 5, 3)) == 42).all()
+        with pytest.raises(RuntimeError):
+            other.acquire()
+        with pytest.raises(ValueError):
+            ring.view(0, 'frame', (5, 5, 3))
+    finally:
+        other.close()
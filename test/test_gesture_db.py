@@ -0,0 +1,47 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'Sign-Language' / 'Code'))
+from gesture_db import GestureLabels, get_gesture_name, init_db, upsert_gestures
+
+def test_upsert_inserts_and_updates(tmp_path):
+    db = str(tmp_path / 'gesture_db.db')
+    init_db(db)
+    assert upsert_gestures([(0, 'A'), (1, 'B')], db) == 2
+    assert upsert_gestures([(1, 'C')], db) == 1
+    assert get_gesture_name(0, db) == 'A'
+    assert get_gesture_name(1, db) == 'C'
+    assert upsert_gestures([], db) == 0
+
+def test_labels_lookup(tmp_path):
+    db = str(tmp_path / 'gesture_db.db')
+    init_db(db)
+    upsert_gestures([(0, 'A'), (2, 'goodluck')], db)
+    labels = GestureLabels(db)
+    assert len(labels) == 3
+    assert labels.name(2) == 'goodluck'
+    assert labels.name(1) == '1'  # Gap in the ids
+    assert labels.name(7, default='?') == '?'
+    assert labels.names([2, 0, -1, 9]) == ['goodluck', 'A', '-1', '9']
+
+def test_refresh_sees_upsert_with_same_mtime(tmp_path):
+    db = tmp_path / 'gesture_db.db'
+    init_db(str(db))
+    upsert_gestures([(0, 'A')], str(db))
+    labels = GestureLabels(str(db), check_interval=3600)
+    assert labels.refresh(force=True) is False
+
+    mtime = db.stat().st_mtime_ns
+    upsert_gestures([(0, 'B')], str(db))
+    # Coarse mtime resolution: user_version alone must trigger the reload
+    os.utime(db, ns=(mtime, mtime))
+    assert labels.name(0) == 'A'  # Throttled until forced
+    assert labels.refresh(force=True) is True
+    assert labels.name(0) == 'B'
+
+def test_missing_database(tmp_path):
+    labels = GestureLabels(str(tmp_path / 'missing.db'))
+    assert len(labels) == 0
+    assert labels.name(3) == '3'
+    assert labels.refresh(force=True) is False
@@ -0,0 +1,105 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'train'))
+import harness
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(64, 4)).astype(np.float32)
+    y = tf.keras.utils.to_categorical((x[:, 0] > 0).astype(int), 2)
+    return (x[:48], y[:48]), (x[48:], y[48:])
+
+def build_model(lr=0.05):
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([tf.keras.Input((4,)), tf.keras.layers.Dense(2, activation='softmax')])
+    model.compile(optimizer=tf.keras.optimizers.Adam(lr), loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+def run(model, data, tmp_path, **kwargs):
+    train, val = data
+    options = dict(run_name='test', batch_size=16, checkpoint_dir=tmp_path / 'checkpoints',
+                   log_dir=tmp_path / 'logs', lr_schedule=None)
+    options.update(kwargs)
+    return harness.fit(model, train, val, **options)
+
+def test_array_batches_cover_every_sample_each_epoch():
+    x = np.arange(10)
+    batches = harness.ArrayBatches(x, x * 2, batch_size=4)
+    assert len(batches) == 3
+    for _ in range(2):
+        seen = np.concatenate([batches[i][0] for i in range(len(batches))])
+        assert sorted(seen.tolist()) == list(range(10))
+        assert (batches[0][1] == batches[0][0] * 2).all()
+        batches.on_epoch_end()
+
+def test_prefetch_cycles_and_raises():
+    assert list(harness.prefetch([1, 2, 3], 5)) == [1, 2, 3, 1, 2]
+
+    class Broken:
+        def __len__(self):
+            return 2
+
+        def __getitem__(self, i):
+            raise OSError("unreadable batch")
+
+    with pytest.raises(OSError):
+        list(harness.prefetch(Broken(), 2))
+
+def test_learning_rate_schedules():
+    cosine = harness.LearningRateSchedule('cosine', 0.1, epochs=10, min_lr=0.0)
+    assert cosine.lr_for_epoch(0, 0.5) == pytest.approx(0.1)
+    assert cosine.lr_for_epoch(5, 0.5) == pytest.approx(0.05)
+    plateau = harness.LearningRateSchedule('plateau', 0.1, epochs=10, patience=2)
+    state = {}
+    assert plateau.after_epoch(state, False, 0.1) == 0.1
+    assert plateau.after_epoch(state, False, 0.1) == 0.05
+    assert plateau.after_epoch(state, True, 0.05) == 0.05 and state['lr_wait'] == 0
+    with pytest.raises(ValueError):
+        harness.LearningRateSchedule('step', 0.1, epochs=10)
+
+def test_evaluate_matches_keras(data):
+    model = build_model()
+    _, (x, y) = data
+    expected = model.evaluate(x, y, batch_size=16, verbose=0, return_dict=True)
+    logs = harness.evaluate(model, harness.ArrayBatches(x, y, 16, shuffle=False))
+    assert logs == pytest.approx(expected, rel=1e-5)
+
+def test_fit_resumes_from_checkpoint(data, tmp_path):
+    best_path = tmp_path / 'best.h5'
+    history = run(build_model(), data, tmp_path, epochs=2, best_path=str(best_path))
+    assert [h['epoch'] for h in history] == [1, 2]
+    assert {'loss', 'val_loss', 'val_accuracy', 'input_s', 'compute_s'} <= set(history[0])
+    assert best_path.exists()
+    state = json.loads((tmp_path / 'checkpoints' / 'test' / 'state.json').read_text())
+    assert state['epoch'] == 2
+
+    # A new process with a fresh model picks up at epoch 3 with the saved weights
+    model = build_model()
+    history = run(model, data, tmp_path, epochs=4, best_path=str(best_path))
+    assert [h['epoch'] for h in history] == [1, 2, 3, 4]
+    assert history[2]['val_loss'] < history[0]['val_loss']
+
+def test_early_stopping(data, tmp_path):
+    history = run(build_model(lr=0.0), data, tmp_path, epochs=10, patience=2, run_name='frozen')
+    assert len(history) == 3  # Best at epoch 1, then two epochs without improvement
+
+def test_best_epoch_stays_out_of_the_served_model_until_published(data, tmp_path):
+    served = tmp_path / 'model' / 'served.h5'
+    best_path = harness.best_model_path('served', tmp_path / 'checkpoints')
+    assert best_path.parent == tmp_path / 'checkpoints' / 'served'
+    model = build_model()
+    run(model, data, tmp_path, epochs=2, run_name='served', best_path=best_path)
+    assert best_path.exists() and not served.exists()
+
+    harness.publish(model, served)
+    assert [p.name for p in served.parent.iterdir()] == ['served.h5']  # No partial file left behind
+    published = tf.keras.models.load_model(str(served), compile=False)
+    for a, b in zip(published.get_weights(), model.get_weights()):
+        np.testing.assert_array_equal(a, b)
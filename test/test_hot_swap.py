@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from backend.hot_swap import ModelSlot
+
+class FakeModel:
+    def __init__(self, version):
+        self.version = version
+
+def make_slot(fail=(), gate=None):
+    def loader(version):
+        if gate is not None:
+            gate.wait(5)
+        if version in fail:
+            raise OSError(f"no such version {version}")
+        version = version or 'v1'
+        return FakeModel(version), f'{version}.h5', version
+    return ModelSlot('fake', loader, warmup=lambda model: None)
+
+def wait_for_reload(slot, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while slot.status()['loading'] is not None:
+        assert time.monotonic() < deadline, "reload did not finish"
+        time.sleep(0.005)
+
+def test_load_and_use():
+    slot = make_slot()
+    with pytest.raises(RuntimeError):
+        with slot.use():
+            pass
+    slot.load()
+    with slot.use() as model:
+        assert model.version == 'v1'
+        assert slot.status()['in_flight'] == 1
+    assert slot.ready and slot.source == 'v1.h5' and slot.requested_version is None
+
+def test_swap_keeps_old_model_until_drained():
+    slot = make_slot()
+    slot.load()
+    with slot.use() as old:
+        assert slot.reload('v2')
+        wait_for_reload(slot)
+        # New requests see v2 while this one finishes on v1
+        with slot.use() as new:
+            assert new.version == 'v2'
+        assert old.version == 'v1'
+        assert slot.status()['draining'] == [{'version': 'v1', 'in_flight': 1}]
+    status = slot.status()
+    assert status['draining'] == [] and status['swaps'] == 2
+    assert slot.version == 'v2' and slot.requested_version == 'v2'
+
+def test_failed_reload_keeps_current_model():
+    slot = make_slot(fail={'broken'})
+    slot.load()
+    assert slot.reload('broken')
+    wait_for_reload(slot)
+    status = slot.status()
+    assert slot.version == 'v1'
+    assert status['last_error']['version'] == 'broken'
+    assert slot.reload('v3')
+    wait_for_reload(slot)
+    assert slot.version == 'v3' and slot.status()['last_error'] is None
+
+def test_one_reload_at_a_time():
+    gate = threading.Event()
+    gate.set()
+    slot = make_slot(gate=gate)
+    slot.load()
+    gate.clear()
+    assert slot.reload('v2')
+    assert not slot.reload('v3')
+    assert slot.status()['loading']['version'] == 'v2'
+    gate.set()
+    wait_for_reload(slot)
+    assert slot.version == 'v2'
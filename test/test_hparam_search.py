@@ -0,0 +1,73 @@
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'Sign-Language' / 'Code'))
+from hparam_search import SEARCH_SPACE, cache_dataset, objective, open_dataset, sample_trial, should_prune
+
+@pytest.fixture
+def pickles(tmp_path, monkeypatch):
+    # load_images.py writes the pickles to the working directory
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    for prefix, n in (('train', 6), ('val', 2)):
+        with open(f'{prefix}_images', 'wb') as f:
+            pickle.dump(list(rng.integers(0, 256, (n, 5, 5), dtype=np.uint8)), f)
+        with open(f'{prefix}_labels', 'wb') as f:
+            pickle.dump(list(rng.integers(0, 3, n)), f)
+    return tmp_path
+
+def test_cache_dataset_converts_once(pickles):
+    cache = cache_dataset('cache')
+    data = open_dataset(cache)
+    assert data['train_images'].shape == (6, 5, 5, 1) and data['train_images'].dtype == np.uint8
+    assert data['val_labels'].shape == (2,) and data['val_labels'].dtype == np.int32
+    assert isinstance(data['train_images'], np.memmap)
+    with pytest.raises(ValueError):
+        data['train_images'][0] = 0  # Shared between workers, so read-only
+
+    cached = cache / 'train_labels.npy'
+    mtime = cached.stat().st_mtime_ns
+    cache_dataset('cache')
+    assert cached.stat().st_mtime_ns == mtime
+    # A newer pickle is converted again
+    with open('train_labels', 'wb') as f:
+        pickle.dump([2] * 6, f)
+    os.utime('train_labels', ns=(mtime + 10**9, mtime + 10**9))
+    cache_dataset('cache')
+    assert open_dataset('cache')['train_labels'].tolist() == [2] * 6
+
+def test_sample_trial_stays_in_the_search_space():
+    rng = np.random.default_rng(0)
+    trials = [sample_trial(rng, i) for i in range(50)]
+    low, high = SEARCH_SPACE['lr']
+    for trial in trials:
+        assert tuple(trial['filters']) in SEARCH_SPACE['filters']
+        assert trial['dense_units'] in SEARCH_SPACE['dense_units']
+        assert trial['optimizer'] in SEARCH_SPACE['optimizer']
+        assert trial['batch_size'] in SEARCH_SPACE['batch_size']
+        assert low <= trial['lr'] <= high
+    assert [t['trial'] for t in trials] == list(range(50))
+    assert sample_trial(np.random.default_rng(7), 0) == sample_trial(np.random.default_rng(7), 0)
+
+def test_objective():
+    assert objective(0.9, 2.0, latency_weight=0.01) == pytest.approx(0.88)
+    assert objective(0.9, 2.0, latency_weight=0.01, latency_budget_ms=1.5) is None
+    assert objective(0.9, 1.5, latency_weight=0.0, latency_budget_ms=1.5) == 0.9
+
+def test_should_prune_below_median():
+    reports, lock = {}, threading.Lock()
+    # Nothing is pruned until min_trials others have reported at that epoch
+    assert not should_prune(reports, lock, 1, 0.5, min_trials=2, warmup_epochs=1)
+    assert not should_prune(reports, lock, 1, 0.7, min_trials=2, warmup_epochs=1)
+    assert should_prune(reports, lock, 1, 0.55, min_trials=2, warmup_epochs=1)  # Median 0.6
+    assert not should_prune(reports, lock, 1, 0.65, min_trials=2, warmup_epochs=1)  # Median 0.55
+    assert reports[1] == [0.5, 0.7, 0.55, 0.65]
+    # Or during warm-up epochs
+    reports[0] = [0.9, 0.9, 0.9]
+    assert not should_prune(reports, lock, 0, 0.1, min_trials=2, warmup_epochs=1)
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+import cv2
+import pytest
+
+from backend import inference_executor
+from backend.inference_executor import BLAS_ENV_VARS, InferenceExecutor, ResourceConfig, apply_thread_budget
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor(ResourceConfig(workers=4, intra_op=1), apply_budget=False)
+    yield executor
+    executor.shutdown()
+
+def test_config_splits_cores_between_workers(monkeypatch):
+    monkeypatch.setattr(inference_executor, 'available_cores', lambda: 8)
+    config = ResourceConfig()
+    assert (config.workers, config.intra_op, config.inter_op) == (2, 4, 1)
+    assert ResourceConfig(workers=3).intra_op == 2
+
+def test_config_from_file_and_env(monkeypatch, tmp_path):
+    path = tmp_path / 'inference.json'
+    path.write_text(json.dumps({'workers': 3, 'intra_op': 2, 'unknown': 1}))
+    monkeypatch.setenv('INFERENCE_CONFIG', str(path))
+    monkeypatch.setenv('INFERENCE_INTRA_OP', '5')
+    config = ResourceConfig.from_env()
+    assert config.to_dict() == {'workers': 3, 'intra_op': 5, 'inter_op': 1, 'cv_threads': 1, 'blas_threads': 1}
+
+def test_apply_thread_budget(monkeypatch):
+    for var in BLAS_ENV_VARS:
+        monkeypatch.setenv(var, '8')
+    threads = cv2.getNumThreads()
+    try:
+        apply_thread_budget(ResourceConfig(workers=1, intra_op=1, cv_threads=2, blas_threads=3))
+        assert cv2.getNumThreads() == 2
+        assert all(inference_executor.os.environ[var] == '3' for var in BLAS_ENV_VARS)
+    finally:
+        cv2.setNumThreads(threads)
+
+def test_run_and_stats(executor):
+    seen = []
+
+    def double(x):
+        seen.append(x)
+        return x * 2
+
+    executor.register('double', double, concurrency=8, warmup=(0,))
+    assert seen == [0]  # Warmed up once, at registration
+    assert 'double' in executor and 'other' not in executor
+    assert executor.run('double', 21) == 42
+    assert executor.submit('double', 1).result() == 2
+    stats = executor.stats()
+    assert stats['config']['workers'] == 4 and stats['pending'] == 0
+    model = stats['models']['double']
+    assert seen == [0, 21, 1] and model['calls'] == 2 and model['errors'] == 0
+    assert model['concurrency'] == 4  # Capped at the worker count
+
+def test_errors_propagate(executor):
+    def fail():
+        raise RuntimeError("boom")
+    executor.register('fail', fail)
+    with pytest.raises(RuntimeError, match='boom'):
+        executor.run('fail')
+    assert executor.stats()['models']['fail']['errors'] == 1
+
+def test_per_model_concurrency_is_enforced(executor):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    executor.register('serial', work, concurrency=1)
+    executor.register('shared', work, concurrency=3)
+    for name, limit in (('serial', 1), ('shared', 3)):
+        peak[0] = 0
+        for future in [executor.submit(name) for _ in range(8)]:
+            future.result()
+        assert peak[0] == limit, name
+        assert executor.concurrency(name) == limit
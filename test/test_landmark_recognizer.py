@@ -0,0 +1,69 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from backend.landmark_recognizer import (
+    FEATURE_SIZE, FEATURE_VERSION, NUM_LANDMARKS, LandmarkGestureRecognizer, load_classifier, normalize_landmarks
+)
+
+class FixedClassifier:
+    """Stands in for the scikit-learn classifier in train_landmarks.py bundles."""
+
+    classes_ = np.array([0, 4, 7])
+
+    def predict_proba(self, features):
+        assert features.shape == (1, FEATURE_SIZE)
+        return np.array([[0.05, 0.7, 0.25]])
+
+class FakeExtractor:
+    def __init__(self, features):
+        self.features = features
+
+    def extract(self, img):
+        return self.features
+
+def hand(seed=0):
+    return np.random.default_rng(seed).random((NUM_LANDMARKS, 3)).astype(np.float32)
+
+def save_bundle(path, feature_version=FEATURE_VERSION):
+    with open(path, 'wb') as f:
+        pickle.dump({'classifier': FixedClassifier(), 'labels': {0: 'A', 4: 'E'},
+                     'feature_version': feature_version}, f)
+    return path
+
+def test_normalized_landmarks_ignore_position_and_scale():
+    points = hand()
+    features = normalize_landmarks(points, (640, 480))
+    assert features.shape == (FEATURE_SIZE,)
+    assert np.allclose(features[:3], 0)  # Centred on the wrist
+    assert np.linalg.norm(features.reshape(-1, 3)[:, :2], axis=1).max() == pytest.approx(1.0)
+
+    moved = points * np.float32([0.5, 0.5, 0.5]) + np.float32([0.2, 0.1, 0.0])
+    np.testing.assert_allclose(normalize_landmarks(moved, (640, 480)), features, atol=1e-5)
+
+def test_left_hands_are_mirrored():
+    points = hand()
+    mirrored = points.copy()
+    mirrored[:, 0] = 1 - mirrored[:, 0]
+    np.testing.assert_allclose(normalize_landmarks(mirrored, (640, 480), 'Left'),
+                               normalize_landmarks(points, (640, 480), 'Right'), atol=1e-5)
+
+def test_load_classifier_checks_feature_version(tmp_path):
+    assert load_classifier(save_bundle(tmp_path / 'ok.pkl'))['labels'] == {0: 'A', 4: 'E'}
+    with pytest.raises(ValueError, match='features'):
+        load_classifier(save_bundle(tmp_path / 'old.pkl', feature_version='landmarks-v0'))
+
+def test_detect_gestures(tmp_path):
+    path = save_bundle(tmp_path / 'gestures.pkl')
+    recognizer = LandmarkGestureRecognizer(path, top_k=2, min_confidence=0.1,
+                                           extractor=FakeExtractor(normalize_landmarks(hand(), (640, 480))))
+    # Best first; class 7 has no stored name and falls back to its id
+    assert recognizer.detect_gestures(None) == [
+        {'gesture': 'E', 'confidence': 0.7},
+        {'gesture': '7', 'confidence': 0.25}
+    ]
+    recognizer.top_k = 3
+    assert len(recognizer.detect_gestures(None)) == 2  # 0.05 is under min_confidence
+    recognizer.extractor = FakeExtractor(None)
+    assert recognizer.detect_gestures(None) == []
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+
+from backend.calibration import build_backprojection_lut, compute_hand_hist
+from backend.frame_processing import extract_gesture_input, segment_hand_lut
+from backend.mask_classifier import GestureLabels, MaskGestureClassifier
+
+from gesture_db import init_db, upsert_gestures
+
+class RecordingModel:
+    """Stands in for the Sign-Language CNN; remembers what it was fed."""
+
+    def __init__(self, probs):
+        self.probs = np.asarray([probs], np.float32)
+        self.inputs = []
+
+    def predict(self, x, verbose=0):
+        self.inputs.append(x)
+        return self.probs
+
+def labels(tmp_path):
+    db = str(tmp_path / 'gesture_db.db')
+    init_db(db)
+    upsert_gestures([(0, 'A'), (1, 'B'), (2, 'C')], db)
+    return GestureLabels(db)
+
+def test_classify_names_top_predictions(tmp_path):
+    model = RecordingModel([0.05, 0.25, 0.7])
+    classifier = MaskGestureClassifier(model, labels(tmp_path), top_k=3, min_confidence=0.1)
+    gestures = classifier.classify(np.zeros((1, 50, 50, 1), np.uint8))
+    assert [g['gesture'] for g in gestures] == ['C', 'B']
+    assert gestures[0]['confidence'] == np.float32(0.7)
+
+def test_calibrated_mask_is_what_the_model_sees(tmp_path):
+    # The segmented mask goes to the CNN unscaled, as in final.py
+    rng = np.random.default_rng(0)
+    img = rng.integers(40, 90, size=(480, 640, 3), dtype=np.uint8)
+    cv2.ellipse(img, (190, 250), (80, 120), 0, 0, 360, (120, 160, 220), -1)
+    lut = build_backprojection_lut(compute_hand_hist([img], region=(160, 200, 60, 100)))
+    gesture_input = extract_gesture_input(segment_hand_lut(img, lut))
+    assert gesture_input is not None
+
+    model = RecordingModel([1.0, 0.0, 0.0])
+    assert MaskGestureClassifier(model, labels(tmp_path)).classify(gesture_input)[0]['gesture'] == 'A'
+    fed = model.inputs[0]
+    assert fed.dtype == np.float32 and fed.shape == (1, 50, 50, 1)
+    np.testing.assert_array_equal(fed, gesture_input)
+    assert fed.max() == 255
@@ -0,0 +1,43 @@
+import pytest
+
+from backend.negotiation import MAX_FPS, MIN_FPS, TASK_REQUIREMENTS, LoadTracker
+
+def test_idle_tracker_allows_max_fps():
+    snapshot = LoadTracker(capacity=2).snapshot()
+    assert snapshot == {'in_flight': 0, 'queue_depth': 0, 'capacity': 2,
+                        'avg_latency_ms': None, 'recommended_fps': MAX_FPS}
+
+def test_latency_is_smoothed(monkeypatch):
+    clock = iter([0.0, 0.1, 1.0, 1.3])
+    monkeypatch.setattr('backend.negotiation.time.perf_counter', lambda: next(clock))
+    tracker = LoadTracker(capacity=1, smoothing=0.5)
+    tracker.finish(tracker.start())  # 100ms
+    assert tracker.snapshot()['avg_latency_ms'] == 100.0
+    tracker.finish(tracker.start())  # 300ms, halfway there
+    snapshot = tracker.snapshot()
+    assert snapshot['avg_latency_ms'] == 200.0
+    assert snapshot['recommended_fps'] == 5.0  # One stream, one slot, 200ms each
+
+def test_queueing_backs_off_to_min_fps():
+    tracker = LoadTracker(capacity=2)
+    tracker._latency = 0.05
+    assert tracker.snapshot()['recommended_fps'] == MAX_FPS  # 20 fps would be possible
+    for _ in range(6):
+        tracker.start()
+    snapshot = tracker.snapshot()
+    assert snapshot['in_flight'] == 6 and snapshot['queue_depth'] == 4
+    assert snapshot['recommended_fps'] == pytest.approx(max(MIN_FPS, 2 / (0.05 * 6) / 5), abs=0.05)
+    for _ in range(30):
+        tracker.start()
+    assert tracker.snapshot()['recommended_fps'] == MIN_FPS
+
+def test_capacity_defaults_to_cpu_count(monkeypatch):
+    monkeypatch.setattr('backend.negotiation.os.cpu_count', lambda: 6)
+    assert LoadTracker().capacity == 6
+    assert LoadTracker(capacity=3).capacity == 3
+
+def test_task_requirements_are_complete():
+    for task, needs in TASK_REQUIREMENTS.items():
+        assert len(needs['model_input']) == 3, task
+        assert needs['capture']['width'] > 0 and needs['capture']['height'] > 0, task
+        assert 0 < needs['jpeg_quality'] <= 1, task
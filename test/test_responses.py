@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend import responses
+from backend.responses import (
+    EMOTIONS, LABELS_VERSION, MSGPACK_MIMETYPE, build_compact_emotion_results,
+    build_emotion_results, encode_response, top_k
+)
+
+PREDICTIONS = np.array([0.05, 0.01, 0.04, 0.6, 0.1, 0.15, 0.05], dtype=np.float32)
+
+def test_top_k_is_sorted_best_first():
+    assert top_k(PREDICTIONS, 3).tolist() == [3, 5, 4]
+    assert top_k(np.array([0.2, 0.8]), 5).tolist() == [1, 0]
+
+def test_compact_matches_full_results():
+    full = build_emotion_results(PREDICTIONS)
+    compact = build_compact_emotion_results(PREDICTIONS, LABELS_VERSION)
+    assert compact['v'] == LABELS_VERSION
+    assert 'labels' not in compact  # Client's cached labels are current
+    assert [EMOTIONS[i] for i in compact['top']] == [name for name, _ in full['top3_emotions']]
+    assert compact['p'] == pytest.approx(list(full['all_predictions'].values()), abs=1e-4)
+
+@pytest.mark.parametrize('labels_version', [None, LABELS_VERSION - 1, 'stale'])
+def test_compact_sends_labels_when_missing_or_stale(labels_version):
+    compact = build_compact_emotion_results(PREDICTIONS, labels_version, k=2)
+    assert compact['labels'] == EMOTIONS
+    assert compact['top'] == [3, 5]
+
+def test_encode_response_json():
+    response = encode_response({'results': build_compact_emotion_results(PREDICTIONS)}, status=201)
+    assert response.status_code == 201
+    assert response.mimetype == 'application/json'
+    body = json.loads(response.get_data())
+    assert body['results']['top'] == [3, 5, 4]
+
+def test_encode_response_serializes_numpy():
+    if responses.orjson is None:
+        pytest.skip("orjson not installed")
+    body = json.loads(encode_response({'p': PREDICTIONS[:2]}).get_data())
+    assert body['p'] == pytest.approx([0.05, 0.01])
+
+def test_encode_response_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+    payload = {'results': build_compact_emotion_results(PREDICTIONS, LABELS_VERSION)}
+    response = encode_response(payload, accept=f'{MSGPACK_MIMETYPE}, application/json')
+    assert response.mimetype == MSGPACK_MIMETYPE
+    assert msgpack.unpackb(response.get_data()) == payload
+    assert encode_response(payload, accept='application/json').mimetype == 'application/json'
@@ -0,0 +1,62 @@
+import pytest
+
+from backend.sequence_decoder import SessionDecoders, StreamingSignDecoder, top_gesture
+
+@pytest.fixture
+def decoder():
+    return StreamingSignDecoder(window_size=3, min_share=0.6, min_confidence=0.5,
+                                word_gap_frames=2, sentence_gap_frames=4)
+
+def feed(decoder, frames):
+    return [decoder.update(label) for label in frames]
+
+def test_letter_emitted_once_when_stable(decoder):
+    assert feed(decoder, ['A'] * 6) == [None, None, 'A', None, None, None]
+    assert decoder.current_word == 'A'
+
+def test_noise_does_not_emit(decoder):
+    assert feed(decoder, ['A', 'B', 'C', 'A', 'B', 'C']) == [None] * 6
+    assert decoder.sequence == ''
+
+def test_low_confidence_counts_as_blank(decoder):
+    for _ in range(3):
+        assert decoder.update('A', confidence=0.2) is None
+    assert decoder.sequence == ''
+
+def test_word_and_sentence_gaps(decoder):
+    feed(decoder, ['A'] * 3 + [None] * 2)  # Word gap closes "A"
+    assert decoder.words == ['A'] and decoder.current_word == ''
+    feed(decoder, ['A'] * 3 + ['B'] * 3)  # Same letter again after a gap is a new letter
+    assert decoder.current_word == 'AB'
+    feed(decoder, [None] * 4)  # Sentence gap
+    assert decoder.sentences == ['A AB']
+    feed(decoder, ['C'] * 3)
+    assert decoder.sequence == 'A AB. C'
+
+def test_equal_word_and_sentence_gaps():
+    decoder = StreamingSignDecoder(window_size=3, min_share=0.6, min_confidence=0.5,
+                                   word_gap_frames=3, sentence_gap_frames=3)
+    feed(decoder, ['A'] * 3 + ['B'] * 3 + [None] * 3)
+    assert decoder.sentences == ['AB'] and decoder.words == []
+    feed(decoder, ['B'] * 3)  # Letter emitted again after the gap
+    assert decoder.sequence == 'AB. B'
+
+def test_whole_word_gesture(decoder):
+    feed(decoder, ['H'] * 3 + ['goodluck'] * 3)
+    assert decoder.words == ['H', 'goodluck']
+    assert decoder.state() == {'sequence': 'H goodluck', 'current_word': '', 'last_letter': 'goodluck'}
+
+def test_session_decoders_are_bounded():
+    sessions = SessionDecoders(max_sessions=2)
+    first = sessions.get('a')
+    assert sessions.get('a') is first
+    sessions.get('b')
+    sessions.get('c')
+    assert sessions.get('a') is not first  # Evicted as least recently used
+    assert sessions.reset('c') is True
+    assert sessions.reset('c') is False
+
+def test_top_gesture():
+    assert top_gesture([{'gesture': 'A', 'confidence': 0.4}, {'gesture': 'B', 'confidence': 0.9}]) == ('B', 0.9)
+    assert top_gesture(['C']) == ('C', 1.0)
+    assert top_gesture([]) == (None, 0.0)
@@ -0,0 +1,153 @@
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.calibration import build_backprojection_lut, compute_hand_hist
+from backend.frame_processing import HAND_ROI, crop_to_roi, extract_gesture_input, segment_hand_lut
+from backend.worker_pool import MAX_FRAME_BYTES, EmotionPool, SegmentationPool, WorkerCrashed, WorkerPool
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = SegmentationPool(workers=1, slots=2)
+    yield pool
+    pool.close()
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(0)
+    img = rng.integers(40, 90, size=(480, 640, 3), dtype=np.uint8)
+    cv2.ellipse(img, (190, 250), (80, 120), 0, 0, 360, (120, 160, 220), -1)
+    return img
+
+@pytest.fixture(scope='module')
+def encoded(frame):
+    # PNG, so the worker's decode is bit-exact with the original
+    return cv2.imencode('.png', frame)[1].tobytes()
+
+@pytest.fixture(scope='module')
+def lut(frame):
+    return build_backprojection_lut(compute_hand_hist([frame], region=(160, 200, 60, 100)))
+
+def test_decode_and_crop(pool, frame, encoded):
+    with pool.process(encoded) as result:
+        np.testing.assert_array_equal(result.frame, frame)
+        assert result.has_hand is None and result.gesture_input is None
+    with pool.process(encoded, roi=(400, 150, 100, 200)) as result:
+        np.testing.assert_array_equal(result.frame, crop_to_roi(frame, (400, 150, 100, 200)))
+
+def test_segmentation_matches_inline(pool, frame, encoded, lut):
+    expected = extract_gesture_input(segment_hand_lut(frame, lut, roi=HAND_ROI))
+    assert expected is not None
+    with pool.process(encoded, lut=lut, lut_key=('u', 1), lut_roi=HAND_ROI) as result:
+        assert result.has_hand is True
+        np.testing.assert_array_equal(result.gesture_input, expected)
+
+def test_no_hand(pool, lut):
+    empty = cv2.imencode('.png', np.full((480, 640, 3), 60, np.uint8))[1].tobytes()
+    with pool.process(empty, lut=lut, lut_key=('u', 1), lut_roi=HAND_ROI) as result:
+        assert result.has_hand is False and result.gesture_input is None
+
+def test_bad_frames_give_their_slot_back(pool, encoded):
+    for _ in range(3):  # More than the pool has slots
+        with pytest.raises(ValueError):
+            pool.process(b'not an image')
+    with pytest.raises(ValueError):
+        pool.process(b'\0' * (MAX_FRAME_BYTES + 1))
+    # Same pixel limit as inline decoding, checked after the decode for PNGs
+    with pytest.raises(ValueError, match='larger than'):
+        pool.process(cv2.imencode('.png', np.zeros((800, 1300, 3), np.uint8))[1].tobytes())
+    pool.process(encoded).release()
+
+def test_lut_requires_key(pool, encoded, lut):
+    with pytest.raises(ValueError):
+        pool.process(encoded, lut=lut)
+
+def test_luts_are_replaced_per_owner(pool, frame, encoded, lut):
+    pool.publish_lut(('v', 1), lut)
+    first = pool._luts['v']
+    # A recalibration publishes a new block; the old one is unlinked once unused
+    inverted = 255 - lut
+    with pool.process(encoded, lut=inverted, lut_key=('v', 2), lut_roi=HAND_ROI) as result:
+        expected = extract_gesture_input(segment_hand_lut(frame, inverted, roi=HAND_ROI))
+        assert result.has_hand is (expected is not None)
+    assert first.retired and pool._luts['v'].version == 2 and pool._luts['v'].refs == 0
+    pool.retire_lut('v')
+    assert 'v' not in pool._luts
+
+def test_emotion_init_falls_back_when_the_store_fails(tmp_path, monkeypatch):
+    tf = pytest.importorskip('tensorflow')
+    from backend import model_store, worker_pool
+    path = tmp_path / 'emotion.h5'
+    tf.keras.Sequential([tf.keras.Input((4, 4, 3)), tf.keras.layers.Flatten(), tf.keras.layers.Dense(2)]).save(path)
+
+    def broken_store(*args, **kwargs):
+        raise RuntimeError("cached artifact is corrupt")
+    monkeypatch.setattr(model_store, 'load_model', broken_store)
+    monkeypatch.setattr(worker_pool, 'apply_thread_budget', lambda config: None)
+    state = worker_pool._emotion_init(None, None, str(path), (4, 4))
+    assert state['model'].predict(state['batch'], verbose=0).shape == (1, 2)
+
+def test_emotion_pool_defaults_to_tflite(monkeypatch):
+    # Workers each hold their own copy of the model, so default to the lighter runtime
+    monkeypatch.delenv('MODEL_RUNTIME', raising=False)
+    pool = EmotionPool(workers=1, slots=1, target_size=(4, 4))
+    try:
+        assert pool.runtime == 'tflite'
+    finally:
+        pool.close()
+
+def test_emotion_init_loads_the_requested_runtime(tmp_path, monkeypatch):
+    pytest.importorskip('tensorflow')
+    from backend import model_store, worker_pool
+    loaded = []
+
+    class Model:
+        def predict(self, batch, verbose=0):
+            return np.zeros((1, 2), np.float32)
+
+    monkeypatch.setattr(model_store, 'load_model', lambda name, version, runtime=None: loaded.append(runtime) or Model())
+    monkeypatch.setattr(worker_pool, 'apply_thread_budget', lambda config: None)
+    worker_pool._emotion_init(None, None, None, (4, 4), 'tflite')
+    assert loaded == ['tflite']
+
+def _echo_or_exit(ring, slot, payload, state):
+    """Test handler: ('exit', delay) kills the worker process after `delay` seconds."""
+    if isinstance(payload, tuple) and payload[0] == 'exit':
+        time.sleep(payload[1])
+        os._exit(3)
+    return payload
+
+@pytest.fixture
+def fragile_pool():
+    pool = WorkerPool({'x': ((4,), np.uint8)}, _echo_or_exit, workers=1, slots=2, poll_interval=0.05)
+    yield pool
+    pool.close()
+
+def wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+def test_dead_worker_fails_its_call_and_is_replaced(fragile_pool):
+    with fragile_pool.acquire() as lease:
+        with pytest.raises(WorkerCrashed):
+            fragile_pool.call(lease, ('exit', 0), timeout=30)
+    assert fragile_pool.stats()['restarts'] == 1
+    assert fragile_pool.ring.stats()['in_use'] == 0
+    with fragile_pool.acquire() as lease:
+        assert fragile_pool.call(lease, 'still serving', timeout=30) == 'still serving'
+
+def test_dead_worker_gives_back_slots_of_timed_out_calls(fragile_pool):
+    done = []
+    lease = fragile_pool.acquire()
+    with pytest.raises(TimeoutError):
+        fragile_pool.call(lease, ('exit', 0.5), timeout=0.05, on_done=lambda: done.append(True))
+    assert fragile_pool.ring.stats()['in_use'] == 1  # Detached: still the worker's
+    wait_until(lambda: fragile_pool.ring.stats()['in_use'] == 0)
+    assert done == [True]
+    with fragile_pool.acquire() as lease:
+        assert fragile_pool.call(lease, 'ok', timeout=30) == 'ok'
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from backend import xla_inference
+
+def test_xla_is_opt_in(monkeypatch):
+    monkeypatch.delenv('INFERENCE_XLA', raising=False)
+    assert not xla_inference.xla_requested()
+    monkeypatch.setenv('INFERENCE_XLA', '1')
+    assert xla_inference.xla_requested()
+
+def test_batch_sizes_from_env(monkeypatch):
+    monkeypatch.delenv('XLA_BATCH_SIZES', raising=False)
+    assert xla_inference.batch_sizes_from_env((1, 8)) == (1, 8)
+    monkeypatch.setenv('XLA_BATCH_SIZES', '1, 4,,16')
+    assert xla_inference.batch_sizes_from_env() == (1, 4, 16)
+
+@pytest.fixture(scope='module')
+def keras_model():
+    tf = pytest.importorskip('tensorflow')
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential([
+        tf.keras.Input((6, 6, 1)),
+        tf.keras.layers.Conv2D(2, 3, activation='relu'),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(3, activation='softmax')
+    ])
+
+def test_compiled_model_matches_keras(keras_model):
+    model = xla_inference.XLAModel(keras_model, batch_sizes=(4, 1))
+    assert model.batch_sizes == (1, 4) and set(model.compile_ms) == {1, 4}
+    x = np.random.default_rng(0).random((7, 6, 6, 1)).astype(np.float32)
+    expected = keras_model.predict(x, verbose=0)
+    for n in (1, 3, 7):  # Exact, padded, and split into 4 + padded 3
+        np.testing.assert_allclose(model.predict(x[:n]), expected[:n], rtol=1e-4, atol=1e-5)
+    assert model.stats()['fallbacks'] == 0
+
+def test_unexpected_shapes_fall_back(keras_model):
+    model = xla_inference.XLAModel(keras_model, batch_sizes=(1,))
+    with pytest.raises(Exception):
+        model.predict(np.zeros((1, 5, 5, 1), np.float32))  # Keras' own predict rejects it too
+    assert model.stats()['fallbacks'] == 1 and model.enabled
+
+def test_compile_model_leaves_other_models_alone(keras_model):
+    other = object()
+    assert xla_inference.compile_model(other) is other
+    assert isinstance(xla_inference.compile_model(keras_model), xla_inference.XLAModel)
@@ -0,0 +1,103 @@
+import io
+import tarfile
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip('tensorflow')
+from server import app as yale
+
+PROBS = np.linspace(0.01, 0.2, len(yale.emotion_classes)).astype(np.float32)
+
+class FakeModel:
+    input_shape = (None, 32, 48, 3)
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        self.batches.append(batch.shape)
+        return np.tile(PROBS, (len(batch), 1))
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(yale, 'model', model)
+    # No weights here, so nothing was registered at import
+    yale.executor.register('yale', yale.predict_yale)
+    return model
+
+@pytest.fixture
+def client():
+    return yale.app.test_client()
+
+def encode(fmt='JPEG', size=(64, 40)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(buf, fmt)
+    return buf.getvalue()
+
+def zip_archive(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def tar_archive(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+def test_images_are_predicted_in_one_batch(model, client):
+    response = client.post('/predict_batch', data={
+        'images': [(io.BytesIO(encode()), 'a.jpg'), (io.BytesIO(encode('PNG')), 'b.png'),
+                   (io.BytesIO(b'not an image'), 'broken.jpg')],
+        'top_k': '2'
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 2
+    assert [r['image'] for r in body['results']] == ['a.jpg', 'b.png']
+    assert list(body['errors']) == ['broken.jpg']
+    best = yale.emotion_classes[-1]
+    assert all(r['emotion'] == best and len(r['top_predictions']) == 2 for r in body['results'])
+    assert body['results'][0]['confidence'] == pytest.approx(float(PROBS[-1]))
+    assert model.batches == [(2, 32, 48, 3)]  # Resized to the model's input
+
+@pytest.mark.parametrize('archive, filename', [
+    (zip_archive, 'faces.zip'),
+    (tar_archive, 'faces.tar.gz')
+])
+def test_archive_upload_skips_non_images(model, client, archive, filename):
+    data = archive({'s1/a.jpg': encode(), 's1/b.pgm': encode('PPM'), 'README.txt': b'notes'})
+    response = client.post('/predict_batch', data={'archive': (io.BytesIO(data), filename)})
+    assert response.status_code == 200
+    assert sorted(r['image'] for r in response.get_json()['results']) == ['s1/a.jpg', 's1/b.pgm']
+
+def test_rejects_bad_requests(model, client, monkeypatch):
+    assert client.post('/predict_batch', data={}).status_code == 400
+    response = client.post('/predict_batch', data={'images': (io.BytesIO(encode()), 'a.jpg'), 'top_k': 'x'})
+    assert response.status_code == 400
+    response = client.post('/predict_batch', data={'archive': (io.BytesIO(b'plain text'), 'faces.rar')})
+    assert response.status_code == 400
+    monkeypatch.setattr(yale, 'MAX_BATCH_IMAGES', 1)
+    response = client.post('/predict_batch', data={'images': [(io.BytesIO(encode()), 'a.jpg'),
+                                                              (io.BytesIO(encode()), 'b.jpg')]})
+    assert response.status_code == 400
+    assert model.batches == []
+
+def test_oversized_uploads_are_rejected(model, client, monkeypatch):
+    # An archive that would expand past the per-image limit is refused before decoding
+    bomb = zip_archive({'bomb.png': bytes(21 << 20)})
+    response = client.post('/predict_batch', data={'archive': (io.BytesIO(bomb), 'faces.zip')})
+    assert response.status_code == 413
+    monkeypatch.setitem(yale.app.config, 'MAX_CONTENT_LENGTH', 4096)
+    response = client.post('/predict_batch', data={'images': (io.BytesIO(bytes(8192)), 'a.jpg')})
+    assert response.status_code == 413
+    assert model.batches == []
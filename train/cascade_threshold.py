@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from backend.cascade import DEFAULT_CONFIG_PATH, GATE_METRICS, gate_scores
+from evaluate import (
+    MODELS, REPORT_DIR, git_commit, list_images, load_backend, single_image_latency, stream_batches, test_dir_for
+)
+
+# Calibrates the emotion cascade (backend/cascade.py): runs the student and
+# the full model over a labelled test set, sweeps the gate threshold, and
+# picks the cheapest one that stays within --max-accuracy-loss of the full
+# model. Cost per frame is the student's latency plus the escalated share
+# of the full model's latency.
+
+def collect_probs(models, config, paths, batch_size):
+    """Probabilities from every model in `models` over the same decoded batches."""
+    outputs = {name: [] for name in models}
+    sample = None
+    for batch, _ in stream_batches(paths, config['img_size'], config['color'], batch_size):
+        x = config['preprocess'](batch.astype(np.float32))
+        if sample is None:
+            sample = x[0].copy()
+        for name, model in models.items():
+            outputs[name].append(np.asarray(model.predict(x), dtype=np.float32))
+    return {name: np.concatenate(probs) for name, probs in outputs.items()}, sample
+
+def sweep(fast_probs, full_probs, targets, metric, fast_ms, full_ms, steps=200):
+    """Accuracy, escalation rate and cost per frame for a range of thresholds."""
+    scores = gate_scores(fast_probs, metric)
+    fast_correct = fast_probs.argmax(axis=1) == targets
+    full_correct = full_probs.argmax(axis=1) == targets
+    # Every distinct score is a possible cut; subsample to `steps` points
+    candidates = np.unique(np.concatenate([[0.0], scores, [np.inf]]))
+    if len(candidates) > steps:
+        candidates = np.unique(np.quantile(candidates[:-1], np.linspace(0, 1, steps)).tolist() + [np.inf])
+    rows = []
+    for threshold in candidates:
+        escalate = scores < threshold
+        rate = float(escalate.mean())
+        rows.append({
+            'threshold': float(threshold) if np.isfinite(threshold) else None,  # None: escalate everything
+            'accuracy': round(float(np.where(escalate, full_correct, fast_correct).mean()), 4),
+            'escalation_rate': round(rate, 4),
+            'cost_ms_per_frame': round(fast_ms + rate * full_ms, 3)
+        })
+    return rows
+
+def choose(rows, full_accuracy, max_loss):
+    """Cheapest threshold whose accuracy is within `max_loss` of the full model."""
+    eligible = [r for r in rows if r['threshold'] is not None and r['accuracy'] >= full_accuracy - max_loss]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r['cost_ms_per_frame'], -r['accuracy']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the emotion cascade gate threshold for a target accuracy loss")
+    parser.add_argument('--fast-model-path', help="Student model (defaults to the registered emotion_student)")
+    parser.add_argument('--full-model-path', help="Full model (defaults to the registered emotion model)")
+    parser.add_argument('--backend', choices=['keras', 'tflite', 'tflite-quant'], default='keras')
+    parser.add_argument('--test-dir', help="Labelled images, one folder per emotion")
+    parser.add_argument('--metric', choices=GATE_METRICS + ('best',), default='best',
+                        help="Gate on top-1 confidence, top-1/top-2 margin, or whichever is cheaper")
+    parser.add_argument('--max-accuracy-loss', type=float, default=0.01,
+                        help="Allowed accuracy drop vs the full model (absolute, e.g. 0.01 = 1 point)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--limit', type=int, help="Use at most this many images")
+    parser.add_argument('--config', default=str(DEFAULT_CONFIG_PATH), help="Where the serving config is written")
+    parser.add_argument('--output', help="Report path (defaults to logs/eval/cascade_<time>.json)")
+    args = parser.parse_args()
+
+    config = MODELS['emotion']
+    try:
+        test_dir = test_dir_for('emotion', args.test_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    paths, targets, names = list_images(test_dir, config['labels'])
+    if args.limit and args.limit < len(paths):
+        keep = np.linspace(0, len(paths) - 1, args.limit).astype(int)
+        paths, targets = [paths[i] for i in keep], targets[keep]
+
+    models = {
+        'fast': load_backend('emotion_student', args.backend, args.fast_model_path),
+        'full': load_backend('emotion', args.backend, args.full_model_path)
+    }
+    print(f"Running student and full model over {len(paths)} images")
+    probs, sample = collect_probs(models, config, paths, args.batch_size)
+    latency = {name: single_image_latency(model, sample)['p50'] for name, model in models.items()}
+    accuracy = {name: float((p.argmax(axis=1) == targets).mean()) for name, p in probs.items()}
+    print(f"student: accuracy {accuracy['fast']:.4f}, {latency['fast']:.2f} ms/frame")
+    print(f"full:    accuracy {accuracy['full']:.4f}, {latency['full']:.2f} ms/frame")
+
+    metrics = GATE_METRICS if args.metric == 'best' else (args.metric,)
+    sweeps = {m: sweep(probs['fast'], probs['full'], targets, m, latency['fast'], latency['full']) for m in metrics}
+    choices = {m: choose(rows, accuracy['full'], args.max_accuracy_loss) for m, rows in sweeps.items()}
+    chosen_metric = min((m for m in metrics if choices[m]), key=lambda m: choices[m]['cost_ms_per_frame'], default=None)
+
+    print(f"\n{'metric':>10}{'threshold':>11}{'accuracy':>10}{'escalated':>11}{'ms/frame':>10}")
+    for m in metrics:
+        c = choices[m]
+        if c is None:
+            print(f"{m:>10}  no threshold within {args.max_accuracy_loss} of the full model")
+        else:
+            print(f"{m:>10}{c['threshold']:>11.4f}{c['accuracy']:>10.4f}{c['escalation_rate']:>10.1%}{c['cost_ms_per_frame']:>10.2f}")
+
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'images': len(paths),
+        'backend': args.backend,
+        'max_accuracy_loss': args.max_accuracy_loss,
+        'fast': {'model_path': args.fast_model_path, 'accuracy': round(accuracy['fast'], 4), 'latency_ms': latency['fast']},
+        'full': {'model_path': args.full_model_path, 'accuracy': round(accuracy['full'], 4), 'latency_ms': latency['full']},
+        'chosen': dict(choices[chosen_metric], metric=chosen_metric) if chosen_metric else None,
+        'sweeps': sweeps
+    }
+    if chosen_metric:
+        chosen = report['chosen']
+        savings = 1 - chosen['cost_ms_per_frame'] / latency['full']
+        report['chosen']['cost_saving'] = round(savings, 4)
+        print(f"\nChosen: {chosen_metric} < {chosen['threshold']:.4f} escalates {chosen['escalation_rate']:.1%} of frames; "
+              f"{chosen['cost_ms_per_frame']:.2f} ms/frame vs {latency['full']:.2f} ms full-only ({savings:.0%} less)")
+        Path(args.config).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.config).write_text(json.dumps({
+            'metric': chosen_metric,
+            'threshold': chosen['threshold'],
+            'expected_accuracy': chosen['accuracy'],
+            'expected_escalation_rate': chosen['escalation_rate'],
+            'expected_cost_ms_per_frame': chosen['cost_ms_per_frame'],
+            'full_accuracy': round(accuracy['full'], 4),
+            'calibrated': report['created']
+        }, indent=2))
+        print(f"Serving config written to {args.config} (EMOTION_CASCADE=1 to enable)")
+    else:
+        print(f"\nNo threshold keeps accuracy within {args.max_accuracy_loss}; config not written")
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = Path(args.output or REPORT_DIR / f"cascade_{stamp}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output}")
+
+if __name__ == '__main__':
+    main()
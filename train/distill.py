@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.applications import MobileNetV3Small
+from tensorflow.keras.applications.vgg19 import preprocess_input as vgg19_preprocess
+from tensorflow.keras.models import Model, load_model
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+# Define constants
+BATCH_SIZE = 32
+EPOCHS = 20
+TEMPERATURE = 4.0
+ALPHA = 0.1  # Weight of the hard-label loss; the rest goes to the teacher's soft labels
+
+def scale_to_unit(x):
+    # Matches preprocess_image in server/server.py
+    return x / 255.0
+
+# Teachers and the preprocessing their serving path applies
+TEACHERS = {
+    'emotion': {
+        'model_path': '../model/emotion_model.h5',
+        'img_size': (256, 256),
+        'preprocess': scale_to_unit,
+        'train_dir': 'data/expw/train',
+        'val_dir': 'data/expw/val',
+        'output_path': '../model/emotion_student.h5'
+    },
+    'yale': {
+        'model_path': 'model/yale_vgg19_model.h5',
+        'img_size': (224, 224),
+        'preprocess': vgg19_preprocess,
+        'train_dir': 'model/processed_yale/train',
+        'val_dir': 'model/processed_yale/val',
+        'output_path': 'model/yale_student.h5'
+    }
+}
+
+def create_student(input_shape, num_classes, kind='mobilenet'):
+    """Small student network that outputs logits."""
+    inputs = layers.Input(shape=input_shape)
+    if kind == 'mobilenet':
+        base_model = MobileNetV3Small(
+            input_shape=input_shape, alpha=0.75, minimalistic=True,
+            include_top=False, weights=None, include_preprocessing=False
+        )
+        x = base_model(inputs)
+        x = layers.GlobalAveragePooling2D()(x)
+    else:
+        x = inputs
+        for filters in (32, 64, 128, 256):
+            x = layers.SeparableConv2D(filters, 3, padding='same', use_bias=False)(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.ReLU()(x)
+            x = layers.MaxPooling2D()(x)
+        x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(0.3)(x)
+    logits = layers.Dense(num_classes)(x)
+    return Model(inputs=inputs, outputs=logits, name=f'{kind}_student')
+
+class Distiller(Model):
+    """Trains a student on a mix of hard labels and the teacher's softened outputs."""
+
+    def __init__(self, student, teacher, temperature=TEMPERATURE, alpha=ALPHA):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.temperature = temperature
+        self.alpha = alpha
+        self.teacher.trainable = False
+
+    def compile(self, optimizer, metrics=None):
+        super().compile(optimizer=optimizer, metrics=metrics)
+        self.hard_loss_fn = tf.keras.losses.CategoricalCrossentropy(from_logits=True)
+        self.soft_loss_fn = tf.keras.losses.KLDivergence()
+
+    def teacher_logits(self, x):
+        # The served teachers end in softmax, so recover logits from probabilities
+        probs = self.teacher(x, training=False)
+        return tf.math.log(tf.clip_by_value(probs, 1e-7, 1.0))
+
+    def train_step(self, data):
+        x, y = data
+        teacher_soft = tf.nn.softmax(self.teacher_logits(x) / self.temperature)
+        with tf.GradientTape() as tape:
+            student_logits = self.student(x, training=True)
+            hard_loss = self.hard_loss_fn(y, student_logits)
+            soft_loss = self.soft_loss_fn(
+                teacher_soft, tf.nn.softmax(student_logits / self.temperature)
+            ) * self.temperature ** 2
+            loss = self.alpha * hard_loss + (1 - self.alpha) * soft_loss
+        grads = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.student.trainable_variables))
+        self.compiled_metrics.update_state(y, tf.nn.softmax(student_logits))
+        results = {m.name: m.result() for m in self.metrics}
+        results.update({'loss': loss, 'hard_loss': hard_loss, 'soft_loss': soft_loss})
+        return results
+
+    def test_step(self, data):
+        x, y = data
+        student_logits = self.student(x, training=False)
+        loss = self.hard_loss_fn(y, student_logits)
+        self.compiled_metrics.update_state(y, tf.nn.softmax(student_logits))
+        results = {m.name: m.result() for m in self.metrics}
+        results['loss'] = loss
+        return results
+
+def export_student(student):
+    """Wrap the logits model with softmax so it serves like the teacher."""
+    probs = layers.Softmax()(student.output)
+    return Model(inputs=student.input, outputs=probs, name=student.name)
+
+def count_flops(model, input_shape):
+    """FLOPs of a single forward pass, via the TF profiler."""
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+    concrete = tf.function(lambda x: model(x, training=False)).get_concrete_function(
+        tf.TensorSpec((1,) + tuple(input_shape), tf.float32)
+    )
+    frozen = convert_variables_to_constants_v2(concrete)
+    opts = tf.compat.v1.profiler.ProfileOptionBuilder.float_operation()
+    opts['output'] = 'none'
+    info = tf.compat.v1.profiler.profile(graph=frozen.graph, options=opts)
+    return int(info.total_float_ops)
+
+def cpu_latency_ms(model, input_shape, runs=50, warmup=5):
+    """Median single-frame latency on CPU, in milliseconds."""
+    x = np.random.random((1,) + tuple(input_shape)).astype(np.float32)
+    with tf.device('/CPU:0'):
+        for _ in range(warmup):
+            model(x, training=False)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(x, training=False)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def describe(model, generator, input_shape):
+    generator.reset()
+    _, accuracy = model.evaluate(generator, verbose=0)
+    return {
+        'accuracy': float(accuracy),
+        'params': int(model.count_params()),
+        'flops': count_flops(model, input_shape),
+        'cpu_latency_ms': cpu_latency_ms(model, input_shape)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill a served teacher model into a small student")
+    parser.add_argument('--teacher', choices=sorted(TEACHERS), default='yale')
+    parser.add_argument('--student', choices=['mobilenet', 'cnn'], default='mobilenet')
+    parser.add_argument('--teacher-path', help="Override the teacher model path")
+    parser.add_argument('--train-dir')
+    parser.add_argument('--val-dir')
+    parser.add_argument('--output', help="Where to save the student .h5")
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--temperature', type=float, default=TEMPERATURE)
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    args = parser.parse_args()
+
+    config = TEACHERS[args.teacher]
+    img_size = config['img_size']
+    input_shape = (*img_size, 3)
+    output_path = args.output or config['output_path']
+
+    # Create data generators with the teacher's serving-time preprocessing
+    train_datagen = ImageDataGenerator(
+        preprocessing_function=config['preprocess'],
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        horizontal_flip=True,
+        fill_mode='nearest'
+    )
+    validation_datagen = ImageDataGenerator(preprocessing_function=config['preprocess'])
+
+    train_generator = train_datagen.flow_from_directory(
+        args.train_dir or config['train_dir'],
+        target_size=img_size,
+        batch_size=BATCH_SIZE,
+        class_mode='categorical'
+    )
+    validation_generator = validation_datagen.flow_from_directory(
+        args.val_dir or config['val_dir'],
+        target_size=img_size,
+        batch_size=BATCH_SIZE,
+        class_mode='categorical',
+        shuffle=False
+    )
+    num_classes = train_generator.num_classes
+
+    # Load the teacher and build the student
+    teacher = load_model(args.teacher_path or config['model_path'])
+    if teacher.output_shape[-1] != num_classes:
+        raise ValueError(f"Teacher predicts {teacher.output_shape[-1]} classes but the data has {num_classes}")
+    student = create_student(input_shape, num_classes, args.student)
+
+    distiller = Distiller(student, teacher, args.temperature, args.alpha)
+    distiller.compile(optimizer=Adam(learning_rate=0.001), metrics=['accuracy'])
+    distiller.fit(
+        train_generator,
+        validation_data=validation_generator,
+        epochs=args.epochs
+    )
+
+    # Save the student as a drop-in replacement for the teacher
+    served_student = export_student(student)
+    served_student.compile(loss='categorical_crossentropy', metrics=['accuracy'])
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    served_student.save(output_path)
+    print(f"Student saved to {output_path}")
+
+    teacher.compile(loss='categorical_crossentropy', metrics=['accuracy'])
+    report = {
+        'teacher': describe(teacher, validation_generator, input_shape),
+        'student': describe(served_student, validation_generator, input_shape),
+        'student_path': output_path
+    }
+    report['speedup'] = report['teacher']['cpu_latency_ms'] / report['student']['cpu_latency_ms']
+    print(f"{'':10}{'accuracy':>10}{'params':>14}{'GFLOPs':>10}{'CPU ms':>10}")
+    for name in ('teacher', 'student'):
+        row = report[name]
+        print(f"{name:10}{row['accuracy']:>10.4f}{row['params']:>14,}{row['flops'] / 1e9:>10.2f}{row['cpu_latency_ms']:>10.1f}")
+    with open(os.path.splitext(output_path)[0] + '_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from backend import model_store
+from backend.frame_processing import decode_image_bytes
+from backend.responses import EMOTIONS
+
+BATCH_SIZE = 32
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff'}
+REPORT_DIR = Path('logs/eval')
+
+def scale_to_unit(x):
+    # Matches preprocess_emotion_frame in backend/frame_processing.py
+    return x / 255.0
+
+def vgg19_preprocess(x):
+    from tensorflow.keras.applications.vgg19 import preprocess_input
+    return preprocess_input(x)
+
+def raw_pixels(x):
+    # final.py feeds the 50x50 threshold image to the CNN unscaled
+    return x
+
+YALE_CLASSES = [
+    'centerlight', 'glasses', 'happy', 'leftlight', 'noglasses',
+    'normal', 'rightlight', 'sad', 'sleepy', 'surprised', 'wink'
+]
+
+# Registered models and the preprocessing their serving path applies.
+# `test_dir` is where a held-out split is expected when --test-dir is not
+# given; neither default ships with the repo:
+#   emotion: data/expw/test, beside the train/val folders quick_train.py and distill.py read
+#   yale:    model/processed_yale/test, beside the train/val folders distill.py reads
+# The gesture model has no default: gestures/ is its training data, and
+# load_images.py's held-out split only exists as the val_images/val_labels
+# pickles, so its images must be exported to folders and passed explicitly.
+MODELS = {
+    'emotion': {
+        'img_size': (256, 256),
+        'color': 'rgb',
+        'preprocess': scale_to_unit,
+        'labels': EMOTIONS,
+        'test_dir': 'data/expw/test'
+    },
+    'yale': {
+        'img_size': (224, 224),
+        'color': 'rgb',
+        'preprocess': vgg19_preprocess,
+        'labels': YALE_CLASSES,
+        'test_dir': 'model/processed_yale/test'
+    },
+    'gesture': {
+        'img_size': (50, 50),
+        'color': 'grayscale',
+        'preprocess': raw_pixels,
+        'labels': None,  # Folder names are the numeric gesture ids
+        'test_dir': None
+    }
+}
+
+BACKENDS = ['keras', 'tflite', 'tflite-quant', 'onnx']
+
+class OnnxModel:
+    """predict() over an onnxruntime session, transposing for NCHW graphs."""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+        self._session = ort.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+        self._input = self._session.get_inputs()[0]
+        shape = self._input.shape
+        self._channels_first = len(shape) == 4 and shape[1] in (1, 3) and shape[-1] not in (1, 3)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if self._channels_first:
+            x = np.ascontiguousarray(x.transpose(0, 3, 1, 2))
+        return self._session.run(None, {self._input.name: x})[0]
+
+class KerasModel:
+    """Calls the model directly; Model.predict adds per-call overhead that skews batch timings."""
+
+    def __init__(self, model):
+        self._model = model
+
+    def predict(self, x, batch_size=None, verbose=0):
+        return np.asarray(self._model(x, training=False))
+
+def load_backend(name, backend, model_path=None, version=None):
+    """Model for `backend`, from an explicit file or the model store."""
+    if backend == 'onnx':
+        if not model_path:
+            raise ValueError("The onnx backend needs --model-path")
+        return OnnxModel(model_path)
+    if model_path:
+        if backend == 'keras':
+            import tensorflow as tf
+            return KerasModel(tf.keras.models.load_model(model_path, compile=False))
+        return model_store.TFLiteModel(model_path)
+    model = model_store.load_model(name, version, runtime=backend)
+    return KerasModel(model) if backend == 'keras' else model
+
+def test_dir_for(model, test_dir=None):
+    """--test-dir if given, else the model's default held-out split; ValueError if there is none."""
+    if test_dir:
+        return Path(test_dir)
+    default = MODELS[model]['test_dir']
+    if default is None:
+        raise ValueError(f"{model} has no held-out test set by default; pass --test-dir")
+    if not Path(default).is_dir():
+        raise ValueError(f"No held-out {model} test set at {default}; create it or pass --test-dir")
+    return Path(default)
+
+def list_images(test_dir, labels=None):
+    """(paths, class indices, class names) in flow_from_directory layout.
+
+    Folders whose names all appear in `labels` map onto the model's label
+    order; otherwise folders are ordered numerically when they are all
+    numbers, and alphabetically like flow_from_directory when not.
+    """
+    test_dir = Path(test_dir)
+    folders = sorted(p.name for p in test_dir.iterdir() if p.is_dir())
+    if not folders:
+        raise ValueError(f"No class folders under {test_dir}")
+    lowered = [l.lower() for l in labels] if labels else []
+    if labels and all(f.lower() in lowered for f in folders):
+        names = list(labels)
+        index = {f: lowered.index(f.lower()) for f in folders}
+    else:
+        if all(f.isdigit() for f in folders):
+            folders.sort(key=int)
+        names = folders
+        index = {f: i for i, f in enumerate(folders)}
+
+    paths, targets = [], []
+    for folder in folders:
+        for path in sorted((test_dir / folder).iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                paths.append(path)
+                targets.append(index[folder])
+    return paths, np.array(targets, dtype=np.int64), names
+
+def load_image(path, img_size, color):
+    # Same reduced-scale decode as the serving path, so accuracy matches it
+    try:
+        img = decode_image_bytes(np.fromfile(str(path), np.uint8), img_size, grayscale=color == 'grayscale')
+    except ValueError:
+        raise ValueError(f"Could not read {path}")
+    if (img.shape[1], img.shape[0]) != tuple(img_size):
+        img = cv2.resize(img, tuple(img_size))
+    if color == 'grayscale':
+        return img[..., None]
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+def stream_batches(paths, img_size, color, batch_size, workers=4, prefetch=2):
+    """Yield uint8 batches, decoding the next ones on a thread pool meanwhile."""
+    out = queue.Queue(maxsize=prefetch)
+
+    def produce():
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for start in range(0, len(paths), batch_size):
+                chunk = paths[start:start + batch_size]
+                t0 = time.perf_counter()
+                batch = np.stack(list(pool.map(lambda p: load_image(p, img_size, color), chunk)))
+                out.put((batch, time.perf_counter() - t0))
+        out.put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = out.get()
+        if item is None:
+            return
+        yield item
+
+def confusion_matrix(targets, predictions, num_classes):
+    matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(matrix, (targets, predictions), 1)
+    return matrix
+
+def per_class_metrics(matrix, names):
+    tp = np.diag(matrix).astype(np.float64)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros_like(tp), where=denom > 0)
+    per_class = {
+        name: {
+            'precision': round(float(precision[i]), 4),
+            'recall': round(float(recall[i]), 4),
+            'f1': round(float(f1[i]), 4),
+            'support': int(support[i])
+        }
+        for i, name in enumerate(names)
+    }
+    present = support > 0
+    summary = {
+        'macro_f1': round(float(f1[present].mean()), 4) if present.any() else 0.0,
+        'weighted_f1': round(float((f1 * support).sum() / support.sum()), 4) if support.sum() else 0.0
+    }
+    return per_class, summary
+
+def latency_summary(timings_ms):
+    return {
+        'mean': round(float(np.mean(timings_ms)), 3),
+        'p50': round(float(np.percentile(timings_ms, 50)), 3),
+        'p95': round(float(np.percentile(timings_ms, 95)), 3),
+        'p99': round(float(np.percentile(timings_ms, 99)), 3)
+    }
+
+def single_image_latency(model, sample, runs=50, warmup=5):
+    """Batch-of-one latency, which is what the live /process_frame path sees."""
+    x = sample[None]
+    for _ in range(warmup):
+        model.predict(x)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict(x)
+        timings.append((time.perf_counter() - start) * 1000)
+    return latency_summary(timings)
+
+def evaluate(model, config, paths, targets, names, batch_size=BATCH_SIZE, top_k=3, single_runs=50):
+    num_classes = len(names)
+    predictions = np.empty(len(paths), dtype=np.int64)
+    in_top_k = np.zeros(len(paths), dtype=bool)
+    batch_ms, decode_s = [], 0.0
+    first = None
+    seen = 0
+    started = time.perf_counter()
+    for batch, decode_time in stream_batches(paths, config['img_size'], config['color'], batch_size):
+        decode_s += decode_time
+        x = config['preprocess'](batch.astype(np.float32))
+        if first is None:
+            first = x[0].copy()
+            model.predict(x[:1])  # Warm up graph tracing / allocation outside the timings
+        t0 = time.perf_counter()
+        probs = np.asarray(model.predict(x))
+        batch_ms.append((time.perf_counter() - t0) * 1000)
+        if probs.shape[-1] != num_classes:
+            raise ValueError(f"Model predicts {probs.shape[-1]} classes but the test set has {num_classes}")
+        batch_targets = targets[seen:seen + len(batch)]
+        predictions[seen:seen + len(batch)] = probs.argmax(axis=1)
+        k = min(top_k, num_classes)
+        top = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        in_top_k[seen:seen + len(batch)] = (top == batch_targets[:, None]).any(axis=1)
+        seen += len(batch)
+    wall_s = time.perf_counter() - started
+    if seen == 0:
+        raise ValueError("Test set is empty")
+
+    matrix = confusion_matrix(targets, predictions, num_classes)
+    per_class, summary = per_class_metrics(matrix, names)
+    inference_s = sum(batch_ms) / 1000
+    return {
+        'images': seen,
+        'accuracy': round(float((predictions == targets).mean()), 4),
+        f'top_{top_k}_accuracy': round(float(in_top_k.mean()), 4),
+        **summary,
+        'per_class': per_class,
+        'labels': names,
+        'confusion_matrix': matrix.tolist(),
+        'timing': {
+            'batch_size': batch_size,
+            'batches': len(batch_ms),
+            'inference_s': round(inference_s, 3),
+            'decode_s': round(decode_s, 3),
+            'wall_s': round(wall_s, 3),
+            'throughput_ips': round(seen / inference_s, 1) if inference_s else None,
+            'end_to_end_ips': round(seen / wall_s, 1),
+            'per_image_ms': round(inference_s * 1000 / seen, 3),
+            'batch_latency_ms': latency_summary(batch_ms),
+            'single_image_latency_ms': single_image_latency(model, first, single_runs) if single_runs else None
+        }
+    }
+
+def print_report(report):
+    names = report['labels']
+    width = max(8, max(len(n) for n in names) + 1)
+    print(f"\n{report['model']} [{report['backend']}] on {report['test_dir']}: {report['images']} images")
+    print(f"{'':{width}}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>10}")
+    for name in names:
+        row = report['per_class'][name]
+        print(f"{name:{width}}{row['precision']:>10.4f}{row['recall']:>10.4f}{row['f1']:>10.4f}{row['support']:>10}")
+    print(f"\naccuracy {report['accuracy']:.4f}  macro f1 {report['macro_f1']:.4f}  weighted f1 {report['weighted_f1']:.4f}")
+
+    print("\nconfusion matrix (rows = true, columns = predicted)")
+    cell = max(5, len(str(max(max(r) for r in report['confusion_matrix']))) + 1)
+    print(f"{'':{width}}" + ''.join(f"{i:>{cell}}" for i in range(len(names))))
+    for i, row in enumerate(report['confusion_matrix']):
+        print(f"{names[i]:{width}}" + ''.join(f"{v:>{cell}}" for v in row))
+
+    timing = report['timing']
+    print(f"\nthroughput {timing['throughput_ips']} img/s (end to end {timing['end_to_end_ips']} img/s), "
+          f"batch p50 {timing['batch_latency_ms']['p50']} ms / p95 {timing['batch_latency_ms']['p95']} ms")
+    if timing['single_image_latency_ms']:
+        single = timing['single_image_latency_ms']
+        print(f"single image p50 {single['p50']} ms / p95 {single['p95']} ms")
+
+def compare(report, baseline):
+    """Accuracy and speed deltas against an earlier report."""
+    base_ips = baseline['timing']['throughput_ips']
+    delta = {
+        'baseline': baseline.get('path'),
+        'accuracy_delta': round(report['accuracy'] - baseline['accuracy'], 4),
+        'macro_f1_delta': round(report['macro_f1'] - baseline['macro_f1'], 4),
+        'throughput_ratio': round(report['timing']['throughput_ips'] / base_ips, 3) if base_ips else None
+    }
+    base_single = baseline['timing'].get('single_image_latency_ms')
+    single = report['timing']['single_image_latency_ms']
+    if base_single and single:
+        delta['single_image_speedup'] = round(base_single['p50'] / single['p50'], 3)
+    print(f"\nvs {delta['baseline']}: accuracy {delta['accuracy_delta']:+.4f}, "
+          f"macro f1 {delta['macro_f1_delta']:+.4f}, throughput x{delta['throughput_ratio']}")
+    return delta
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a model's accuracy and speed on a held-out test set")
+    parser.add_argument('--model', choices=sorted(MODELS), required=True)
+    parser.add_argument('--backend', choices=BACKENDS, default='keras')
+    parser.add_argument('--model-path', help="Evaluate this file instead of the registered model")
+    parser.add_argument('--version', help="Registered model version (defaults to latest)")
+    parser.add_argument('--test-dir', help="Held-out images, one sub-folder per class (required for gesture)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--limit', type=int, help="Evaluate at most this many images (spread over classes)")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--single-runs', type=int, default=50, help="Batch-of-one latency samples (0 to skip)")
+    parser.add_argument('--baseline', help="Earlier report to compare against")
+    parser.add_argument('--output', help="Report path (defaults to logs/eval/<model>_<backend>_<time>.json)")
+    args = parser.parse_args()
+
+    config = MODELS[args.model]
+    try:
+        test_dir = test_dir_for(args.model, args.test_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    paths, targets, names = list_images(test_dir, config['labels'])
+    if args.limit and args.limit < len(paths):
+        keep = np.linspace(0, len(paths) - 1, args.limit).astype(int)
+        paths, targets = [paths[i] for i in keep], targets[keep]
+    print(f"Evaluating {args.model} [{args.backend}] on {len(paths)} images in {len(names)} classes")
+
+    model = load_backend(args.model, args.backend, args.model_path, args.version)
+    report = {
+        'model': args.model,
+        'backend': args.backend,
+        'model_path': args.model_path,
+        'version': args.version,
+        'test_dir': str(test_dir),
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds')
+    }
+    report.update(evaluate(model, config, paths, targets, names, args.batch_size, args.top_k, args.single_runs))
+    print_report(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline['path'] = args.baseline
+        report['comparison'] = compare(report, baseline)
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = Path(args.output or REPORT_DIR / f"{args.model}_{args.backend}_{stamp}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+import cv2
+import numpy as np
+
+# FER2013 straight from the bundled zip: the CSV (emotion,"p p p ...",Usage)
+# is streamed out of the archive in blocks and the pixel strings are parsed
+# with array operations over the raw bytes, then written once as .npy files
+# that training memory-maps:
+#   images.npy (n, 48, 48) uint8, labels.npy (n,) int8, usage.npy (n,) int8
+# Label ids are FER2013's, which are the order of EMOTIONS in backend/responses.py.
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ZIP = PROJECT_ROOT / 'model' / 'resources' / 'emotion_dataset' / 'fer2013.zip'
+DEFAULT_CACHE = PROJECT_ROOT / 'data' / 'fer2013'
+USAGES = ('Training', 'PublicTest', 'PrivateTest')
+SPLITS = {'train': 0, 'val': 1, 'test': 2}
+NUM_CLASSES = 7
+PIXELS = 48 * 48
+BLOCK_SIZE = 16 << 20
+LFS_POINTER_PREFIX = b'version https://git-lfs.github.com/spec/v1'
+
+def is_lfs_pointer(path):
+    with open(path, 'rb') as f:
+        return f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX
+
+def open_csv(zip_path):
+    """(ZipFile, name of the CSV member) for a FER2013 archive."""
+    if is_lfs_pointer(zip_path):
+        raise ValueError(f"{zip_path} is a Git LFS pointer; run `git lfs pull`")
+    archive = zipfile.ZipFile(zip_path)
+    members = [n for n in archive.namelist() if n.lower().endswith('.csv') and not n.startswith('__MACOSX')]
+    if not members:
+        archive.close()
+        raise ValueError(f"No CSV in {zip_path}")
+    # fer2013.csv carries all three splits; prefer it over per-split files
+    members.sort(key=lambda n: (Path(n).name.lower() != 'fer2013.csv', n))
+    return archive, members[0]
+
+def iter_blocks(stream, block_size=BLOCK_SIZE):
+    """Blocks of whole lines, without the header line."""
+    tail, first = b'', True
+    while True:
+        chunk = stream.read(block_size)
+        if not chunk:
+            break
+        chunk = tail + chunk
+        cut = chunk.rfind(b'\n') + 1
+        block, tail = chunk[:cut], chunk[cut:]
+        if first and block:
+            if not block[:1].isdigit():
+                block = block[block.index(b'\n') + 1:]
+            first = False
+        if block:
+            yield block
+    if tail.strip():
+        if first and not tail[:1].isdigit():
+            return
+        yield tail + b'\n'
+
+def parse_block(block, first_line=1):
+    """(labels, pixels, usage) for a block of CSV lines, without a per-row loop.
+
+    Every run of digits is one number: runs are found from the edges of a
+    digit mask and their values built from at most three digit bytes. Each
+    line must hold 1 + 2304 numbers (the Usage column has no digits), so
+    the numbers reshape straight into rows.
+    """
+    buf = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    digit = ((buf >= ord('0')) & (buf <= ord('9'))).view(np.int8)
+    edges = np.diff(digit, prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    if lengths.size and lengths.max() > 3:
+        bad = int(np.searchsorted(newlines, starts[lengths.argmax()]))
+        raise ValueError(f"Line {first_line + bad}: value out of range")
+
+    last = len(buf) - 1
+    d0, d1, d2 = (buf[np.minimum(starts + k, last)].astype(np.int16) - ord('0') for k in range(3))
+    values = np.where(lengths == 1, d0, np.where(lengths == 2, d0 * 10 + d1, d0 * 100 + d1 * 10 + d2))
+
+    # Numbers per line from where each newline falls among the run starts
+    per_line = np.diff(np.searchsorted(starts, newlines), prepend=0)
+    bad = np.flatnonzero(per_line != PIXELS + 1)
+    if bad.size:
+        raise ValueError(f"Line {first_line + int(bad[0])}: expected {PIXELS + 1} numbers, found {int(per_line[bad[0]])}")
+    rows = values.reshape(len(newlines), PIXELS + 1)
+    if rows[:, 1:].max(initial=0) > 255 or rows[:, 0].max(initial=0) >= NUM_CLASSES:
+        raise ValueError(f"Lines {first_line}-{first_line + len(rows) - 1}: pixel or label out of range")
+
+    # Usage is the text after the last comma: T(raining), Pu(blicTest), Pr(ivateTest)
+    commas = np.flatnonzero(buf == ord(','))
+    last_comma = commas[np.searchsorted(commas, newlines) - 1]
+    first_char, second_char = buf[last_comma + 1], buf[np.minimum(last_comma + 2, len(buf) - 1)]
+    usage = np.where(first_char == ord('T'), 0, np.where(second_char == ord('u'), 1, 2)).astype(np.int8)
+    unknown = (first_char != ord('T')) & (first_char != ord('P'))
+    if unknown.any():
+        raise ValueError(f"Line {first_line + int(np.argmax(unknown))}: unknown Usage")
+    return rows[:, 0].astype(np.int8), rows[:, 1:].astype(np.uint8), usage
+
+def count_rows(zip_path):
+    archive, member = open_csv(zip_path)
+    with archive, archive.open(member) as stream:
+        return sum(block.count(b'\n') for block in iter_blocks(stream))
+
+def source_info(zip_path):
+    stat = os.stat(zip_path)
+    return {'path': str(Path(zip_path).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def convert(zip_path=DEFAULT_ZIP, cache_dir=DEFAULT_CACHE, block_size=BLOCK_SIZE):
+    """Stream the CSV out of the zip into cache_dir; returns the metadata written.
+
+    The archive is read twice: once to count rows so the image array can
+    be allocated at its final size on disk, once to fill it.
+    """
+    started = time.perf_counter()
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    rows = count_rows(zip_path)
+    side = math.isqrt(PIXELS)
+    tmp = {name: cache / f'{name}.tmp.npy' for name in ('images', 'labels', 'usage')}
+    images = np.lib.format.open_memmap(tmp['images'], mode='w+', dtype=np.uint8, shape=(rows, side, side))
+    labels = np.empty(rows, dtype=np.int8)
+    usage = np.empty(rows, dtype=np.int8)
+
+    archive, member = open_csv(zip_path)
+    filled = 0
+    with archive, archive.open(member) as stream:
+        for block in iter_blocks(stream, block_size):
+            block_labels, pixels, block_usage = parse_block(block, first_line=filled + 2)
+            end = filled + len(block_labels)
+            images[filled:end] = pixels.reshape(-1, side, side)
+            labels[filled:end] = block_labels
+            usage[filled:end] = block_usage
+            filled = end
+    images.flush()
+    del images
+    np.save(tmp['labels'], labels)
+    np.save(tmp['usage'], usage)
+    for name, path in tmp.items():
+        os.replace(path, cache / f'{name}.npy')
+
+    meta = {
+        'source': source_info(zip_path),
+        'member': member,
+        'rows': rows,
+        'shape': [side, side],
+        'usage': {USAGES[i]: int((usage == i).sum()) for i in range(len(USAGES))},
+        'labels': np.bincount(labels, minlength=NUM_CLASSES).tolist(),
+        'convert_s': round(time.perf_counter() - started, 2)
+    }
+    (cache / 'meta.json').write_text(json.dumps(meta, indent=2))
+    return meta
+
+def is_current(zip_path=DEFAULT_ZIP, cache_dir=DEFAULT_CACHE):
+    """Whether cache_dir holds a conversion that can be used as is.
+
+    A cache built from a different zip is stale, but one whose zip is
+    missing (or only an LFS pointer) is all there is, so it is used.
+    """
+    try:
+        meta = json.loads((Path(cache_dir) / 'meta.json').read_text())
+    except (OSError, ValueError):
+        return False
+    try:
+        if is_lfs_pointer(zip_path):
+            return True
+        source = source_info(zip_path)
+    except OSError:
+        return True
+    return meta.get('source') == source
+
+def load(cache_dir=DEFAULT_CACHE, zip_path=DEFAULT_ZIP):
+    """{'images', 'labels', 'usage'} as read-only memory maps, converting the zip first if needed."""
+    if not is_current(zip_path, cache_dir):
+        print(f"Converting {zip_path} -> {cache_dir}")
+        convert(zip_path, cache_dir)
+    return {name: np.load(Path(cache_dir) / f'{name}.npy', mmap_mode='r') for name in ('images', 'labels', 'usage')}
+
+def resize_batch(images, size):
+    """Resize (n, h, w) uint8 images in one cv2 call by treating the batch as channels."""
+    out = []
+    for i in range(0, len(images), 512):  # OpenCV caps channels at 512
+        chunk = np.ascontiguousarray(np.moveaxis(images[i:i + 512], 0, -1))
+        resized = cv2.resize(chunk, (size[1], size[0]), interpolation=cv2.INTER_LINEAR)
+        out.append(np.moveaxis(resized.reshape(size[0], size[1], -1), -1, 0))
+    return np.concatenate(out) if out else np.empty((0,) + tuple(size), dtype=images.dtype)
+
+class FerBatches:
+    """harness.ArrayBatches over one split, resized to the model input per batch.
+
+    Only the indices are shuffled; each batch reads its 48x48 rows from the
+    memory map, resizes them, repeats the grey channel to RGB and applies
+    `preprocess`, so the decoded dataset never sits in memory at model size.
+    """
+
+    def __init__(self, data, split, batch_size, img_size, preprocess=None, shuffle=True, flip=False, seed=0):
+        import harness
+        self.images = data['images']
+        indices = np.flatnonzero(np.asarray(data['usage']) == SPLITS[split])
+        self._batches = harness.ArrayBatches(indices, np.asarray(data['labels'])[indices], batch_size, shuffle=shuffle, seed=seed)
+        self.img_size = tuple(img_size)
+        self.preprocess = preprocess
+        self.flip = flip
+        self.samples = len(indices)
+        self.num_classes = NUM_CLASSES
+        self._rng = np.random.default_rng(seed)
+        self._eye = np.eye(NUM_CLASSES, dtype=np.float32)
+
+    def __len__(self):
+        return len(self._batches)
+
+    def __getitem__(self, i):
+        idx, y = self._batches[i]
+        order = np.argsort(idx)  # Ascending reads from the memory map
+        idx, y = idx[order], y[order]
+        x = resize_batch(self.images[idx], self.img_size)
+        if self.flip:
+            mirror = self._rng.random(len(x)) < 0.5
+            x[mirror] = x[mirror, :, ::-1]
+        x = np.repeat(x[..., None], 3, axis=-1).astype(np.float32)
+        if self.preprocess is not None:
+            x = self.preprocess(x)
+        return x, self._eye[y]
+
+    def on_epoch_end(self):
+        self._batches.on_epoch_end()
+
+def as_generator(batches):
+    """Endless (x, y) stream over a FerBatches for Model.fit with steps_per_epoch."""
+    while True:
+        for i in range(len(batches)):
+            yield batches[i]
+        batches.on_epoch_end()
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the FER2013 zip into memory-mappable .npy files")
+    parser.add_argument('--zip', default=str(DEFAULT_ZIP))
+    parser.add_argument('--output', default=str(DEFAULT_CACHE))
+    parser.add_argument('--force', action='store_true', help="Convert even if the cache matches the zip")
+    args = parser.parse_args()
+
+    if not args.force and is_current(args.zip, args.output):
+        meta = json.loads((Path(args.output) / 'meta.json').read_text())
+        print(f"{args.output} is up to date ({meta['rows']} images)")
+        return
+    try:
+        meta = convert(args.zip, args.output)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{meta['rows']} images {meta['shape'][0]}x{meta['shape'][1]} in {meta['convert_s']} s -> {args.output}")
+    for name, count in meta['usage'].items():
+        print(f"  {name:<12}{count:>7}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+import json
+import math
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+
+# Shared training loop for train/train.py and Sign-Language/Code/cnn_model_train.py:
+# resumable checkpoints (weights + optimizer state), early stopping on
+# val_loss, a learning-rate schedule, and per-epoch input vs compute time
+# written to TensorBoard under logs/train/<run>.
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOG_DIR = PROJECT_ROOT / 'logs' / 'train'
+CHECKPOINT_DIR = PROJECT_ROOT / 'checkpoints'
+PREFETCH_BATCHES = 4
+
+class ArrayBatches:
+    """Shuffled mini-batches over in-memory arrays, re-shuffled every epoch."""
+
+    def __init__(self, x, y, batch_size, shuffle=True, seed=0):
+        self.x, self.y = x, y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(x))
+
+    def __len__(self):
+        return math.ceil(len(self.x) / self.batch_size)
+
+    def __getitem__(self, i):
+        idx = self._order[i * self.batch_size:(i + 1) * self.batch_size]
+        return self.x[idx], self.y[idx]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+def as_batches(data, batch_size=None):
+    """Accept (x, y) arrays or anything indexable by batch (Sequence, flow_from_directory)."""
+    if isinstance(data, tuple):
+        return ArrayBatches(data[0], data[1], batch_size)
+    return data
+
+def prefetch(batches, steps):
+    """Yield `steps` batches produced on a background thread."""
+    out = queue.Queue(maxsize=PREFETCH_BATCHES)
+
+    def produce():
+        try:
+            for i in range(steps):
+                out.put(batches[i % len(batches)])
+        except Exception as e:
+            out.put(e)
+
+    threading.Thread(target=produce, daemon=True).start()
+    for _ in range(steps):
+        item = out.get()
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+class LearningRateSchedule:
+    """'plateau' halves the rate when val_loss stalls; 'cosine' anneals over the run."""
+
+    def __init__(self, kind, initial_lr, epochs, patience=2, factor=0.5, min_lr=1e-6):
+        if kind not in (None, 'plateau', 'cosine'):
+            raise ValueError(f"Unknown learning-rate schedule '{kind}'")
+        self.kind = kind
+        self.initial_lr = initial_lr
+        self.epochs = epochs
+        self.patience = patience
+        self.factor = factor
+        self.min_lr = min_lr
+
+    def lr_for_epoch(self, epoch, current_lr):
+        if self.kind == 'cosine':
+            return self.min_lr + 0.5 * (self.initial_lr - self.min_lr) * (1 + math.cos(math.pi * epoch / self.epochs))
+        return current_lr
+
+    def after_epoch(self, state, improved, current_lr):
+        if self.kind != 'plateau':
+            return current_lr
+        state['lr_wait'] = 0 if improved else state.get('lr_wait', 0) + 1
+        if state['lr_wait'] >= self.patience:
+            state['lr_wait'] = 0
+            return max(self.min_lr, current_lr * self.factor)
+        return current_lr
+
+def evaluate(model, batches):
+    """Metrics over every batch of `batches` (works for arrays and directory iterators alike)."""
+    model.reset_metrics()
+    logs = {}
+    for i in range(len(batches)):
+        x, y = batches[i]
+        logs = model.test_on_batch(x, y, reset_metrics=False, return_dict=True)
+    return {k: float(v) for k, v in logs.items()}
+
+def get_lr(optimizer):
+    return float(tf.keras.backend.get_value(optimizer.learning_rate))
+
+def set_lr(optimizer, lr):
+    tf.keras.backend.set_value(optimizer.learning_rate, lr)
+
+def best_model_path(run_name, checkpoint_dir=CHECKPOINT_DIR):
+    """Where a run keeps its best epoch: next to its checkpoints, not over a served model."""
+    return Path(checkpoint_dir) / run_name / 'best.h5'
+
+def publish(model, path):
+    """Save the finished model to `path` in one step (temp file, then rename).
+
+    Servers watching the file (MODEL_WATCH_INTERVAL) never load a half-written one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.stem}.partial{path.suffix}')
+    model.save(str(tmp))
+    os.replace(tmp, path)
+    print(f"Published {path}")
+
+def fit(model, train_data, validation_data=None, *, run_name, epochs, batch_size=None,
+        steps_per_epoch=None, best_path=None, patience=5, min_delta=1e-4, lr_schedule='plateau',
+        checkpoint_every=1, max_checkpoints=3, resume=True, checkpoint_dir=CHECKPOINT_DIR, log_dir=LOG_DIR):
+    """Train a compiled model; returns the per-epoch history.
+
+    train_data / validation_data are (x, y) arrays (with batch_size) or a
+    batch-indexable object such as a flow_from_directory iterator. The run
+    resumes from checkpoint_dir/<run_name> when a checkpoint is there.
+    Whenever val_loss improves the model is saved to `best_path` (see
+    best_model_path; not the served model, which should only be replaced
+    by publish() once training is done), and the best weights are
+    restored at the end.
+    """
+    train_batches = as_batches(train_data, batch_size)
+    steps = steps_per_epoch or len(train_batches)
+    val = as_batches(validation_data, batch_size) if validation_data is not None else None
+    monitor = 'val_loss' if val is not None else 'loss'
+
+    run_dir = Path(checkpoint_dir) / run_name
+    run_dir.mkdir(parents=True, exist_ok=True)
+    state_path = run_dir / 'state.json'
+    checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer)
+    manager = tf.train.CheckpointManager(checkpoint, str(run_dir), max_to_keep=max_checkpoints)
+
+    state = {'epoch': 0, 'best': None, 'wait': 0, 'initial_lr': get_lr(model.optimizer), 'history': []}
+    if resume and manager.latest_checkpoint and state_path.exists():
+        checkpoint.restore(manager.latest_checkpoint)
+        state = json.loads(state_path.read_text())
+        print(f"Resuming {run_name} from {manager.latest_checkpoint} (epoch {state['epoch']})")
+    schedule = LearningRateSchedule(lr_schedule, state['initial_lr'], epochs, patience=max(1, patience // 2))
+    writer = tf.summary.create_file_writer(str(Path(log_dir) / run_name))
+    best_weights = None
+
+    def save_checkpoint():
+        manager.save(checkpoint_number=state['epoch'])
+        tmp = state_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, state_path)
+
+    stopped = False
+    while state['epoch'] < epochs and not stopped:
+        epoch = state['epoch']
+        lr = schedule.lr_for_epoch(epoch, get_lr(model.optimizer))
+        set_lr(model.optimizer, lr)
+        model.reset_metrics()
+
+        epoch_start = time.perf_counter()
+        input_s = compute_s = 0.0
+        logs = {}
+        fetch_start = time.perf_counter()
+        for x, y in prefetch(train_batches, steps):
+            step_start = time.perf_counter()
+            input_s += step_start - fetch_start
+            logs = model.train_on_batch(x, y, reset_metrics=False, return_dict=True)
+            fetch_start = time.perf_counter()
+            compute_s += fetch_start - step_start
+        if hasattr(train_batches, 'on_epoch_end'):
+            train_batches.on_epoch_end()
+        logs = {k: float(v) for k, v in logs.items()}
+
+        val_s = 0.0
+        if val is not None:
+            val_start = time.perf_counter()
+            val_logs = evaluate(model, val)
+            val_s = time.perf_counter() - val_start
+            logs.update({f'val_{k}': v for k, v in val_logs.items()})
+        epoch_s = time.perf_counter() - epoch_start
+
+        current = logs[monitor]
+        improved = state['best'] is None or current < state['best'] - min_delta
+        if improved:
+            state['best'] = current
+            state['wait'] = 0
+            best_weights = model.get_weights()
+            if best_path:
+                model.save(str(best_path))
+        else:
+            state['wait'] += 1
+        set_lr(model.optimizer, schedule.after_epoch(state, improved, lr))
+
+        timing = {'epoch_s': epoch_s, 'input_s': input_s, 'compute_s': compute_s, 'val_s': val_s}
+        state['epoch'] = epoch + 1
+        state['history'].append({'epoch': epoch + 1, 'lr': lr, **logs, **timing})
+        with writer.as_default(step=epoch + 1):
+            for key, value in logs.items():
+                tf.summary.scalar(key, value)
+            tf.summary.scalar('learning_rate', lr)
+            for key, value in timing.items():
+                tf.summary.scalar(f'time/{key}', value)
+            tf.summary.scalar('time/input_fraction', input_s / (input_s + compute_s) if input_s + compute_s else 0.0)
+        writer.flush()
+
+        metrics = '  '.join(f'{k} {v:.4f}' for k, v in logs.items())
+        print(f"Epoch {epoch + 1}/{epochs}  {metrics}  lr {lr:.2e}  "
+              f"{epoch_s:.1f}s (input {input_s:.1f}s, compute {compute_s:.1f}s, val {val_s:.1f}s)")
+
+        stopped = state['wait'] >= patience
+        if stopped:
+            print(f"Early stopping: {monitor} has not improved for {patience} epochs (best {state['best']:.4f})")
+        if stopped or state['epoch'] % checkpoint_every == 0 or state['epoch'] == epochs:
+            save_checkpoint()
+
+    # Finish on the best epoch, even if it came before a resume
+    if best_weights is None and best_path and Path(best_path).exists():
+        best_weights = tf.keras.models.load_model(str(best_path), compile=False).get_weights()
+    if best_weights is not None:
+        model.set_weights(best_weights)
+    return state['history']
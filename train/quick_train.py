@@ -1,3 +1,4 @@
+import argparse
 import tensorflow as tf
 from tensorflow.keras.applications.efficientnet_v2 import EfficientNetV2B0, preprocess_input
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout
@@ -6,6 +7,8 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 import os
 
+import fer2013
+
 # Define constants
 IMG_SIZE = (256, 256)
 BATCH_SIZE = 32
@@ -32,7 +35,7 @@ def create_model():
     
     return model
 
-def main():
+def folder_data():
     # Create data generators
     train_datagen = ImageDataGenerator(
         preprocessing_function=preprocess_input,
@@ -61,7 +64,28 @@ def main():
         batch_size=BATCH_SIZE,
         class_mode='categorical'
     )
-    
+    return train_generator, validation_generator
+
+def main():
+    parser = argparse.ArgumentParser(description="Quick emotion model training run")
+    parser.add_argument('--data', choices=['folders', 'fer2013'], default='folders',
+                        help="data/expw image folders or FER2013 from the bundled zip (see fer2013.py)")
+    parser.add_argument('--fer2013-cache', default=str(fer2013.DEFAULT_CACHE))
+    args = parser.parse_args()
+
+    if args.data == 'fer2013':
+        data = fer2013.load(args.fer2013_cache)
+        train_generator = fer2013.FerBatches(data, 'train', BATCH_SIZE, IMG_SIZE, preprocess_input, flip=True)
+        validation_generator = fer2013.FerBatches(data, 'val', BATCH_SIZE, IMG_SIZE, preprocess_input, shuffle=False)
+        # Model.fit takes these as endless generators bounded by the step counts,
+        # which must be whole passes so every epoch starts at batch 0
+        train_data, validation_data = fer2013.as_generator(train_generator), fer2013.as_generator(validation_generator)
+        steps, validation_steps = len(train_generator), len(validation_generator)
+    else:
+        train_generator, validation_generator = folder_data()
+        train_data, validation_data = train_generator, validation_generator
+        steps, validation_steps = train_generator.samples // BATCH_SIZE, validation_generator.samples // BATCH_SIZE
+
     # Create and compile the model
     model = create_model()
     model.compile(
@@ -72,10 +96,10 @@ def main():
     
     # Train the model
     history = model.fit(
-        train_generator,
-        steps_per_epoch=train_generator.samples // BATCH_SIZE,
-        validation_data=validation_generator,
-        validation_steps=validation_generator.samples // BATCH_SIZE,
+        train_data,
+        steps_per_epoch=steps,
+        validation_data=validation_data,
+        validation_steps=validation_steps,
         epochs=EPOCHS
     )
     
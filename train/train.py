@@ -1,3 +1,4 @@
+import argparse
 import tensorflow as tf
 from tensorflow.keras.applications.efficientnet_v2 import EfficientNetV2B0, preprocess_input
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D
@@ -5,11 +6,15 @@ from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
+import fer2013
+import harness
+
 # Define constants
 IMG_SIZE = (256, 256)
 BATCH_SIZE = 32
 NUM_CLASSES = 7
-EPOCHS = 50
+EPOCHS = 50  # Upper bound; early stopping on val_loss usually ends sooner
+PATIENCE = 5
 
 def create_model():
     # Load the EfficientNetV2B0 model without top layers
@@ -30,7 +35,7 @@ def create_model():
     
     return model
 
-def main():
+def folder_data():
     # Create data generators
     train_datagen = ImageDataGenerator(
         preprocessing_function=preprocess_input,
@@ -59,7 +64,22 @@ def main():
         batch_size=BATCH_SIZE,
         class_mode='categorical'
     )
-    
+    return train_generator, validation_generator
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the emotion model")
+    parser.add_argument('--data', choices=['folders', 'fer2013'], default='folders',
+                        help="Image folders or FER2013 from the bundled zip (memory-mapped, see fer2013.py)")
+    parser.add_argument('--fer2013-cache', default=str(fer2013.DEFAULT_CACHE))
+    args = parser.parse_args()
+
+    if args.data == 'fer2013':
+        data = fer2013.load(args.fer2013_cache)
+        train_generator = fer2013.FerBatches(data, 'train', BATCH_SIZE, IMG_SIZE, preprocess_input, flip=True)
+        validation_generator = fer2013.FerBatches(data, 'val', BATCH_SIZE, IMG_SIZE, preprocess_input, shuffle=False)
+    else:
+        train_generator, validation_generator = folder_data()
+
     # Create and compile the model
     model = create_model()
     model.compile(
@@ -68,17 +88,23 @@ def main():
         metrics=['accuracy']
     )
     
-    # Train the model
-    history = model.fit(
+    # Train the model; resumes from checkpoints/emotion if a previous run was interrupted.
+    # The best epoch (by val_loss) is kept in checkpoints/emotion while training and is
+    # what gets published to ../model at the end, so a serving process never sees a
+    # half-trained model
+    history = harness.fit(
+        model,
         train_generator,
-        steps_per_epoch=train_generator.samples // BATCH_SIZE,
         validation_data=validation_generator,
-        validation_steps=validation_generator.samples // BATCH_SIZE,
-        epochs=EPOCHS
+        run_name='emotion',
+        epochs=EPOCHS,
+        steps_per_epoch=len(train_generator),
+        best_path=harness.best_model_path('emotion'),
+        patience=PATIENCE
     )
     
-    # Save the model
-    model.save('../model/emotion_model.h5')
+    # Publish the model
+    harness.publish(model, '../model/emotion_model.h5')
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file